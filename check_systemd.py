@@ -22,6 +22,8 @@ Data sources
 ============
 
 * D-Bus (``dbus``)
+* D-Bus wire protocol without PyGObject (``wire``)
+* D-Bus over the command line client ``busctl`` (``busctl``)
 * Command line interface (``cli``)
 
 This plugin is based on a Python package named `nagiosplugin
@@ -39,6 +41,7 @@ Acquisition (``Resource``)
 * :class:`TimersResource` (``context=timers``)
 * :class:`StartupTimeResource` (``context=startup_time``)
 * :class:`PerformanceDataResource` (``context=performance_data``)
+* :class:`SystemStateResource` (``context=units``, ``context=system_state``)
 
 Evaluation (``Context``)
 ========================
@@ -57,22 +60,36 @@ Presentation (``Summary``)
 from __future__ import annotations
 
 import argparse
+import io
+import json
 import logging
+import os
 import re
 import subprocess
+import sys
+import time
 from abc import abstractmethod
-from dataclasses import dataclass
-from datetime import datetime
+from bisect import bisect_left
+from collections import Counter
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from itertools import chain, compress
 from typing import (
+    TYPE_CHECKING,
     Any,
+    Callable,
+    ClassVar,
     Generator,
     Generic,
     Iterable,
+    Iterator,
     Literal,
     MutableSequence,
     NamedTuple,
     Optional,
     Sequence,
+    TextIO,
     TypeVar,
     Union,
     cast,
@@ -86,6 +103,7 @@ try:
     from nagiosplugin.context import Context, ScalarContext
     from nagiosplugin.error import CheckError
     from nagiosplugin.metric import Metric
+    from nagiosplugin.output import Output
     from nagiosplugin.performance import Performance
     from nagiosplugin.range import Range
     from nagiosplugin.resource import Resource
@@ -96,14 +114,55 @@ except ImportError:
     print("Failed to import the NagiosPlugin library.")
     exit(3)
 
-is_dbus = True
+if TYPE_CHECKING:
+    import socket
+    from array import array
+
+    # The names are assigned at runtime by import_gi().
+    from gi.repository.Gio import (
+        BusType,  # noqa: TC004
+        DBusCallFlags,  # noqa: TC004
+        DBusProxy,  # noqa: TC004
+        DBusProxyFlags,  # noqa: TC004
+        bus_get_sync,  # noqa: TC004
+    )
+    from gi.repository.GLib import (
+        MainContext,  # noqa: TC004
+        Variant,  # noqa: TC004
+        VariantType,  # noqa: TC004
+    )
 
-try:
-    # Look for gi https://gnome.pages.gitlab.gnome.org/pygobject
-    from gi.repository.Gio import BusType, DBusProxy, DBusProxyFlags
-except ImportError:
-    # Fallback to the command line interface source.
-    is_dbus = False
+is_dbus: bool | None = None
+"""Whether the package PyGObject (gi) is available. ``None`` as long as
+:func:`import_gi` hasn’t tried to import it."""
+
+
+def import_gi() -> bool:
+    """Import the package PyGObject (gi) on first use. The plugin is started
+    for every check and importing gi takes longer than importing the rest of
+    the plugin, so it is only imported for the data source ``dbus``.
+
+    :return: True if gi is available.
+    """
+    global is_dbus, BusType, DBusCallFlags, DBusProxy, DBusProxyFlags
+    global bus_get_sync, MainContext, Variant, VariantType
+    if is_dbus is None:
+        try:
+            # Look for gi https://gnome.pages.gitlab.gnome.org/pygobject
+            from gi.repository.Gio import (
+                BusType,
+                DBusCallFlags,
+                DBusProxy,
+                DBusProxyFlags,
+                bus_get_sync,
+            )
+            from gi.repository.GLib import MainContext, Variant, VariantType
+
+            is_dbus = True
+        except ImportError:
+            # Fallback to the command line interface source.
+            is_dbus = False
+    return is_dbus
 
 
 __version__: str = "4.1.0"
@@ -296,18 +355,37 @@ class Logger:
 
     __logger: logging.Logger
 
-    __BLUE = "\x1b[0;34m"
-    __PURPLE = "\x1b[0;35m"
-    __CYAN = "\x1b[0;36m"
-    __RESET = "\x1b[0m"
-
     __INFO = logging.INFO
     __DEBUG = logging.DEBUG
     __VERBOSE = 5
 
+    class Formatter(logging.Formatter):
+        """Colours the arguments of a message according to its level. The
+        arguments are only converted into strings when a record is emitted,
+        not when the message is logged below the level of the logger."""
+
+        __COLORS: ClassVar[dict[int, str]] = {
+            logging.INFO: "\x1b[0;34m",  # blue
+            logging.DEBUG: "\x1b[0;35m",  # purple
+            5: "\x1b[0;36m",  # cyan
+        }
+
+        __RESET = "\x1b[0m"
+
+        def format(self, record: logging.LogRecord) -> str:
+            color = self.__COLORS.get(record.levelno)
+            args = record.args
+            if color is None or not isinstance(args, tuple):
+                return super().format(record)
+            record.args = tuple(color + str(arg) + self.__RESET for arg in args)
+            try:
+                return super().format(record)
+            finally:
+                record.args = args
+
     def __init__(self) -> None:
         handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler.setFormatter(Logger.Formatter("%(message)s"))
         logging.basicConfig(handlers=[handler])
         self.__logger = logging.getLogger(__name__)
 
@@ -326,11 +404,19 @@ class Logger:
         elif level > 2:
             self.__logger.setLevel(5)
 
-    def __log(self, level: int, color: str, msg: str, *args: object) -> None:
-        a: list[str] = []
-        for arg in args:
-            a.append(color + str(arg) + self.__RESET)
-        self.__logger.log(level, msg, *a)
+    def is_enabled(self, level: int) -> bool:
+        """Check whether a debug level (``1``: ``-d``, ``2``: ``-dd``, ``3``:
+        ``-ddd``) is enabled, for example to skip collecting expensive log
+        arguments."""
+        return self.__logger.isEnabledFor(
+            (self.__INFO, self.__DEBUG, self.__VERBOSE)[level - 1]
+        )
+
+    def __log(self, level: int, msg: str, *args: object) -> None:
+        # The arguments are formatted by the Formatter, only if the level is
+        # enabled.
+        if self.__logger.isEnabledFor(level):
+            self.__logger.log(level, msg, *args)
 
     def info(self, msg: str, *args: object) -> None:
         """Log on debug level ``1``: ``-d``.
@@ -342,7 +428,7 @@ class Logger:
         :param args: The arguments which are merged into ``msg`` using the
             string formatting operator.
         """
-        self.__log(self.__INFO, self.__BLUE, msg, *args)
+        self.__log(self.__INFO, msg, *args)
 
     def debug(self, msg: str, *args: object) -> None:
         """Log on debug level ``2``: ``-dd``.
@@ -354,7 +440,7 @@ class Logger:
         :param args: The arguments which are merged into ``msg`` using the
             string formatting operator.
         """
-        self.__log(self.__DEBUG, self.__PURPLE, msg, *args)
+        self.__log(self.__DEBUG, msg, *args)
 
     def verbose(self, msg: str, *args: object) -> None:
         """Log on debug level ``3``: ``-ddd``
@@ -366,7 +452,7 @@ class Logger:
         :param args: The arguments which are merged into ``msg`` using the
             string formatting operator.
         """
-        self.__log(self.__VERBOSE, self.__CYAN, msg, *args)
+        self.__log(self.__VERBOSE, msg, *args)
 
     def show_levels(self) -> None:
         msg = "log level %s (%s): %s"
@@ -380,45 +466,79 @@ logger = Logger()
 
 class Source:
     class BaseUnit:
+        __slots__ = ()
+
         name: str
         """The name of the system unit, for example ``nginx.service``. In the
         command line table of the command ``systemctl list-units`` is the
         column containing unit names titled with “UNIT”.
         """
 
+        @property
+        def type(self) -> str:
+            """The unit type, for example ``service`` for ``nginx.service``."""
+            return self.name[self.name.rfind(".") + 1 :]
+
     class Unit(BaseUnit):
         """This class bundles all state related informations of a systemd unit in a
-        object. This class is inherited by the class ``DbusUnit`` and the
-        attributes are overwritten by properties.
+        object.
+
+        Hundred thousands of units may be listed, so the instances are
+        compact: They have no ``__dict__``, the unit name is interned and the
+        states are stored as small integer codes, which index precomputed
+        tables of the state strings.
         """
 
-        active_state: ActiveState
+        __slots__ = ("__active", "__load", "__sub", "name")
 
-        sub_state: SubState
+        __ACTIVE_STATES: tuple[ActiveState, ...] = get_args(ActiveState)
 
-        load_state: LoadState
+        __ACTIVE_CODES: ClassVar[dict[object, int]] = {
+            state: code for code, state in enumerate(__ACTIVE_STATES)
+        }
+
+        __SUB_STATES: tuple[SubState, ...] = get_args(SubState)
+
+        __SUB_CODES: ClassVar[dict[object, int]] = {
+            state: code for code, state in enumerate(__SUB_STATES)
+        }
+
+        __LOAD_STATES: tuple[LoadState, ...] = get_args(LoadState)
+
+        __LOAD_CODES: ClassVar[dict[object, int]] = {
+            state: code for code, state in enumerate(__LOAD_STATES)
+        }
+
+        __active: int
+
+        __sub: int
+
+        __load: int
+
+        @staticmethod
+        def __get_code(codes: dict[object, int], state: object, kind: str) -> int:
+            try:
+                return codes[state]
+            except (KeyError, TypeError):
+                raise ValueError(f"Invalid {kind} state: {state}") from None
 
         @staticmethod
         def __check_active_state(state: object) -> ActiveState:
-            states: tuple[ActiveState] = get_args(ActiveState)
-            if state in states:
-                # https://github.com/python/mypy/issues/9718
-                return state  # type: ignore
-            raise ValueError(f"Invalid active state: {state}")
+            return Source.Unit.__ACTIVE_STATES[
+                Source.Unit.__get_code(Source.Unit.__ACTIVE_CODES, state, "active")
+            ]
 
         @staticmethod
         def __check_sub_state(state: object) -> SubState:
-            states: tuple[SubState] = get_args(SubState)
-            if state in states:
-                return state  # type: ignore
-            raise ValueError(f"Invalid sub state: {state}")
+            return Source.Unit.__SUB_STATES[
+                Source.Unit.__get_code(Source.Unit.__SUB_CODES, state, "sub")
+            ]
 
         @staticmethod
         def __check_load_state(state: object) -> LoadState:
-            states: tuple[LoadState] = get_args(LoadState)
-            if state in states:
-                return state  # type: ignore
-            raise ValueError(f"Invalid load state: {state}")
+            return Source.Unit.__LOAD_STATES[
+                Source.Unit.__get_code(Source.Unit.__LOAD_CODES, state, "load")
+            ]
 
         def __init__(
             self,
@@ -427,18 +547,34 @@ class Source:
             sub_state: Optional[object] = None,
             load_state: Optional[object] = None,
         ) -> None:
-            self.name = name
-            self.active_state = self.__check_active_state(active_state)
-            self.sub_state = self.__check_sub_state(sub_state)
-            self.load_state = self.__check_load_state(load_state)
+            get_code = Source.Unit.__get_code
+            self.name = sys.intern(name)
+            self.__active = get_code(Source.Unit.__ACTIVE_CODES, active_state, "active")
+            self.__sub = get_code(Source.Unit.__SUB_CODES, sub_state, "sub")
+            self.__load = get_code(Source.Unit.__LOAD_CODES, load_state, "load")
+
+            # Hot path: one unit per listed unit
+            if logger.is_enabled(2):
+                logger.debug(
+                    "Create unit object: name: %s, active_state: %s, sub_state: %s, "
+                    "load_state: %s",
+                    name,
+                    active_state,
+                    sub_state,
+                    load_state,
+                )
 
-            logger.debug(
-                "Create unit object: name: %s, active_state: %s, sub_state: %s, load_state: %s",
-                self.name,
-                self.active_state,
-                self.sub_state,
-                self.load_state,
-            )
+        @property
+        def active_state(self) -> ActiveState:
+            return Source.Unit.__ACTIVE_STATES[self.__active]
+
+        @property
+        def sub_state(self) -> SubState:
+            return Source.Unit.__SUB_STATES[self.__sub]
+
+        @property
+        def load_state(self) -> LoadState:
+            return Source.Unit.__LOAD_STATES[self.__load]
 
         def convert_to_exitcode(self) -> ServiceState:
             """Convert the different systemd states into a Nagios compatible
@@ -484,6 +620,204 @@ class Source:
         next: Optional[int]
         """Timestamp"""
 
+    class ManagerCounters(NamedTuple):
+        """The counters of the systemd manager. They are available as single
+        properties, so no unit has to be listed to read them."""
+
+        system_state: str
+        """The state of the whole system, for example ``running`` or
+        ``degraded``."""
+
+        n_failed_units: int
+        """The number of units in the ``failed`` state."""
+
+        n_names: int
+        """The number of currently loaded units including aliases."""
+
+        n_jobs: int
+        """The number of queued jobs."""
+
+    class Selection(NamedTuple):
+        """The part of the unit selection that systemd applies itself
+        (``systemctl list-units --type=… --state=… PATTERN…`` or
+        ``ListUnitsByPatterns``), so that irrelevant units are neither
+        transferred nor parsed."""
+
+        patterns: tuple[str, ...] = ()
+        """Shell-style glob patterns, for example ``*.service``. A unit is
+        selected if its name matches one of the patterns."""
+
+        types: tuple[str, ...] = ()
+        """Unit types, for example ``service``. The types are combined with
+        the patterns by a logical AND."""
+
+        states: tuple[str, ...] = ()
+        """Load, active or sub states, for example ``failed``."""
+
+        def match(self, unit: Source.Unit) -> bool:
+            """Apply the selection in Python like ``ListUnitsByPatterns``,
+            for example to units that are already in memory."""
+            if self.patterns and not any(
+                fnmatchcase(unit.name, pattern) for pattern in self.patterns
+            ):
+                return False
+            if self.types and unit.type not in self.types:
+                return False
+            return not self.states or not set(self.states).isdisjoint(
+                (unit.active_state, unit.sub_state, unit.load_state)
+            )
+
+    class NameMatcher:
+        """Matches unit names against the include or the exclude options. The
+        options are validated and compiled only once: Literal unit names
+        (``-u``, ``--exclude-unit``) are looked up in a set, unit types
+        (``--include-type``, ``--exclude-type``) by the suffix of the unit name
+        and the regular expressions are combined into one alternation. A long
+        list of excluded units costs a set lookup per unit instead of a regular
+        expression call per excluded unit."""
+
+        __slots__ = ("__patterns", "__types", "names", "prefixes", "regexes", "types")
+
+        names: frozenset[str]
+        """Literal unit names, for example ``nginx.service``."""
+
+        types: tuple[str, ...]
+        """Unit types, for example ``service``."""
+
+        regexes: tuple[str, ...]
+        """Regular expressions that are matched with :func:`re.match` at the
+        beginning of the unit name."""
+
+        prefixes: tuple[str, ...] | None
+        """The literal prefixes of the regular expressions, for example
+        ``nginx`` for ``nginx.*``. ``None`` if one regular expression has no
+        literal prefix and may match any unit name."""
+
+        __types: frozenset[str]
+
+        __patterns: tuple[re.Pattern[str], ...]
+
+        __FLAGS: int = re.compile("").flags
+
+        __BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+        def __init__(
+            self,
+            regexes: str | Sequence[str] | None = None,
+            unit_names: str | Sequence[str] | None = None,
+            unit_types: Sequence[str] | None = None,
+        ) -> None:
+            """
+            :raises CheckSystemdRegexpError: If a regular expression is
+              invalid.
+
+            :raises ValueError: If a unit type is invalid.
+            """
+            if isinstance(regexes, str):
+                regexes = [regexes]
+            if isinstance(unit_names, str):
+                unit_names = [unit_names]
+            self.names = frozenset(
+                Source.NameMatcher.complete_name(name) for name in unit_names or ()
+            )
+            self.types = ()
+            if unit_types:
+                self.types = tuple(SystemdUnitTypesList(*unit_types))
+            self.__types = frozenset(self.types)
+            self.regexes = tuple(dict.fromkeys(regexes or ()))
+            self.__patterns = Source.NameMatcher.__compile(self.regexes)
+            prefixes = tuple(
+                Source.NameMatcher.__get_prefix(regex) for regex in self.regexes
+            )
+            self.prefixes = None if "" in prefixes else prefixes
+
+        @staticmethod
+        def complete_name(unit_name: str) -> str:
+            """systemd appends ``.service`` to a unit name without a valid unit
+            type suffix, for example ``systemctl status nginx``."""
+            if unit_name[unit_name.rfind(".") + 1 :] in get_args(UnitType):
+                return unit_name
+            return unit_name + ".service"
+
+        @staticmethod
+        def __get_prefix(regex: str) -> str:
+            """Get the literal characters every unit name that the regular
+            expression matches starts with.
+
+            :return: for example ``user@`` for ``user@\\d+\\.service`` or an
+              empty string for ``.*\\.timer``.
+            """
+            if "|" in regex:
+                return ""
+            prefix: list[str] = []
+            index = 1 if regex.startswith("^") else 0
+            while index < len(regex):
+                char = regex[index]
+                step = 1
+                if char == "\\" and regex[index + 1 : index + 2] in (".", "-", "@"):
+                    char = regex[index + 1]
+                    step = 2
+                elif not char.isalnum() and char not in "-_@:":
+                    break
+                # The character is optional.
+                if regex[index + step : index + step + 1] in ("*", "?", "{"):
+                    break
+                prefix.append(char)
+                index += step
+            return "".join(prefix)
+
+        @staticmethod
+        def __compile(regexes: Sequence[str]) -> tuple[re.Pattern[str], ...]:
+            patterns: list[re.Pattern[str]] = []
+            for regex in regexes:
+                try:
+                    patterns.append(re.compile(regex))
+                except Exception:
+                    raise CheckSystemdRegexpError(
+                        "Invalid regular expression: '{}'".format(regex)
+                    ) from None
+            # Inline flags (?i), backreferences and conditionals (?(1)...)
+            # would change their meaning in an alternation.
+            if len(patterns) > 1 and all(
+                pattern.flags == Source.NameMatcher.__FLAGS
+                and not Source.NameMatcher.__BACKREFERENCE.search(pattern.pattern)
+                for pattern in patterns
+            ):
+                try:
+                    return (re.compile("|".join(f"(?:{r})" for r in regexes)),)
+                except re.error:
+                    # For example the same named group in two expressions
+                    pass
+            return tuple(patterns)
+
+        @staticmethod
+        def of(
+            regexes: str | Sequence[str] | Source.NameMatcher | None,
+        ) -> Source.NameMatcher:
+            """Compile regular expressions unless they already are compiled."""
+            if isinstance(regexes, Source.NameMatcher):
+                return regexes
+            return Source.NameMatcher(regexes)
+
+        def match(self, unit_name: str) -> bool:
+            if unit_name in self.names:
+                return True
+            if self.__types and unit_name[unit_name.rfind(".") + 1 :] in self.__types:
+                return True
+            for pattern in self.__patterns:
+                if pattern.match(unit_name):
+                    return True
+            return False
+
+        def __len__(self) -> int:
+            return len(self.names) + len(self.types) + len(self.regexes)
+
+        def __repr__(self) -> str:
+            return (
+                f"NameMatcher(names={sorted(self.names)}, types={list(self.types)}, "
+                f"regexes={list(self.regexes)})"
+            )
+
     class NameFilter:
         """This class stores all system unit names (e. g. ``nginx.service`` or
         ``fstrim.timer``) and provides a interface to filter the names by regular
@@ -491,15 +825,30 @@ class Source:
 
         __unit_names: set[str]
 
+        __sorted: list[str] | None
+        """The unit names sorted once and only sorted again after a new name
+        has been added."""
+
+        __by_type: dict[str, list[str]] | None
+        """The sorted unit names per unit type."""
+
         def __init__(self, unit_names: Sequence[str] = ()) -> None:
             self.__unit_names = set(unit_names)
+            self.__sorted = None
+            self.__by_type = None
 
-        def __iter__(self) -> Generator[str, None, None]:
-            for name in sorted(self.__unit_names):
-                yield name
+        def __iter__(self) -> Iterator[str]:
+            yield from self.__get_sorted()
+
+        def __get_sorted(self) -> list[str]:
+            if self.__sorted is None:
+                self.__sorted = sorted(self.__unit_names)
+            return self.__sorted
 
         @staticmethod
-        def match(unit_name: str, regexes: str | Sequence[str]) -> bool:
+        def match(
+            unit_name: str, regexes: str | Sequence[str] | Source.NameMatcher
+        ) -> bool:
             """
             Match multiple regular expressions against a unit name.
 
@@ -509,24 +858,25 @@ class Source:
                 list of regular expressions (``include=('.*service', '.*mount')``).
 
             :return: True if one regular expression matches"""
-            if isinstance(regexes, str):
-                regexes = [regexes]
-            for regex in regexes:
-                try:
-                    if re.match(regex, unit_name):
-                        return True
-                except Exception:
-                    raise CheckSystemdRegexpError(
-                        "Invalid regular expression: '{}'".format(regex)
-                    )
-            return False
+            return Source.NameMatcher.of(regexes).match(unit_name)
 
         def add(self, unit_name: str) -> None:
             """Add one unit name.
 
             :param unit_name: The name of the unit, for example ``apt.timer``.
             """
-            self.__unit_names.add(unit_name)
+            if unit_name not in self.__unit_names:
+                self.__unit_names.add(unit_name)
+                self.__sorted = None
+                self.__by_type = None
+
+        def remove(self, unit_name: str) -> None:
+            """Remove one unit name, for example after systemd has unloaded
+            the unit."""
+            if unit_name in self.__unit_names:
+                self.__unit_names.remove(unit_name)
+                self.__sorted = None
+                self.__by_type = None
 
         def get(self) -> set[str]:
             """Get all stored unit names."""
@@ -534,8 +884,8 @@ class Source:
 
         def filter(
             self,
-            include: str | Sequence[str] | None = None,
-            exclude: str | Sequence[str] | None = None,
+            include: str | Sequence[str] | Source.NameMatcher | None = None,
+            exclude: str | Sequence[str] | Source.NameMatcher | None = None,
         ) -> Generator[str, None, None]:
             """
             List all unit names or apply filters (``include`` or ``exclude``) to
@@ -551,28 +901,134 @@ class Source:
                 regular expression (``exclude='.*service'``) or a list of regular
                 expressions (``exclude=('.*service', '.*mount')``).
             """
-            match = Source.NameFilter.match
-            for name in sorted(self.__unit_names):
-                output: Optional[str] = name
-                if include and not match(name, include):
-                    output = None
+            include = Source.NameMatcher.of(include)
+            exclude = Source.NameMatcher.of(exclude)
+            names: Iterable[str] = self.__get_sorted()
+            if include and include.prefixes is not None:
+                names = self.__get_candidates(include, include.prefixes)
+            for name in names:
+                if include and not include.match(name):
+                    continue
+                if exclude and exclude.match(name):
+                    continue
+                yield name
+
+        def with_prefix(self, prefix: str) -> list[str]:
+            """List the sorted unit names that start with a prefix, for example
+            ``user@``, without scanning all names."""
+            names = self.__get_sorted()
+            start = end = bisect_left(names, prefix)
+            while end < len(names) and names[end].startswith(prefix):
+                end += 1
+            return names[start:end]
+
+        def with_type(self, unit_type: str) -> list[str]:
+            """List the sorted unit names of a unit type, for example all
+            ``*.timer`` units."""
+            if self.__by_type is None:
+                self.__by_type = {}
+                for name in self.__get_sorted():
+                    self.__by_type.setdefault(name[name.rfind(".") + 1 :], []).append(
+                        name
+                    )
+            return self.__by_type.get(unit_type, [])
+
+        def __get_candidates(
+            self, include: Source.NameMatcher, prefixes: Sequence[str]
+        ) -> list[str]:
+            """Collect only the unit names that can match the include options:
+            the literal names, the names of the unit types and the ranges of
+            the literal prefixes of the regular expressions."""
+            candidates = set(include.names & self.__unit_names)
+            for unit_type in include.types:
+                candidates.update(self.with_type(unit_type))
+            for prefix in prefixes:
+                candidates.update(self.with_prefix(prefix))
+            return sorted(candidates)
+
+    class Column:
+        """A column of a unit property in which every value is stored as a
+        small integer code in an array (dictionary encoding). Counting the
+        values of one or more columns is a single pass over the codes."""
+
+        __slots__ = ("__codes", "codes", "values")
+
+        values: list[str]
+        """The distinct values in the order of their codes."""
 
-                if output and exclude and match(name, exclude):
-                    output = None
+        codes: array[int]
 
-                if output:
-                    yield output
+        __codes: dict[str, int]
+
+        def __init__(self) -> None:
+            from array import array
+
+            self.values = []
+            self.codes = array("H")
+            self.__codes = {}
+
+        def append(self, value: str) -> None:
+            code = self.__codes.get(value)
+            if code is None:
+                code = self.__codes[value] = len(self.values)
+                self.values.append(value)
+            self.codes.append(code)
+
+        def count(self, selection: Sequence[bool] | None = None) -> Counter[str]:
+            """Count the values.
+
+            :param selection: Only count the rows that are true in this
+              sequence.
+            """
+            codes: Iterable[int] = self.codes
+            if selection is not None:
+                codes = compress(codes, selection)
+            values = self.values
+            return Counter(
+                {values[code]: number for code, number in Counter(codes).items()}
+            )
+
+        @staticmethod
+        def count_by(
+            *columns: Source.Column, selection: Sequence[bool] | None = None
+        ) -> dict[tuple[str, ...], int]:
+            """Count the combinations of the values of several columns of the
+            same length."""
+            codes: Iterable[tuple[int, ...]] = zip(
+                *(column.codes for column in columns)
+            )
+            if selection is not None:
+                codes = compress(codes, selection)
+            return {
+                tuple(
+                    column.values[code] for column, code in zip(columns, combination)
+                ): number
+                for combination, number in Counter(codes).items()
+            }
 
     class Cache(Generic[T]):
         """This class is a container class for systemd units."""
 
+        PROPERTIES: tuple[str, ...] = (
+            "type",
+            "active_state",
+            "sub_state",
+            "load_state",
+        )
+        """The properties of the units that can be counted."""
+
         __units: dict[str, T]
 
         __name_filter: Source.NameFilter
 
+        __columns: dict[str, Source.Column] | None
+        """The properties of the units in the order of :attr:`__units`. They
+        are built when the units are counted for the first time."""
+
         def __init__(self) -> None:
             self.__units = {}
             self.__name_filter = Source.NameFilter()
+            self.__columns = None
 
         def __iter__(self) -> Generator[T, None, None]:
             for name in self.__name_filter:
@@ -581,6 +1037,16 @@ class Source:
         def add(self, name: str, unit: T) -> None:
             self.__units[name] = unit
             self.__name_filter.add(name)
+            self.__columns = None
+
+        def remove(self, name: str) -> None:
+            if name in self.__units:
+                del self.__units[name]
+                self.__name_filter.remove(name)
+                self.__columns = None
+
+        def __contains__(self, name: str) -> bool:
+            return name in self.__units
 
         def get(self, name: Optional[str] = None) -> T | None:
             if name:
@@ -589,8 +1055,8 @@ class Source:
 
         def filter(
             self,
-            include: str | Sequence[str] | None = None,
-            exclude: str | Sequence[str] | None = None,
+            include: str | Sequence[str] | Source.NameMatcher | None = None,
+            exclude: str | Sequence[str] | Source.NameMatcher | None = None,
         ) -> Generator[T, None, None]:
             """
             List all units or apply filters (``include`` or ``exclude``) to
@@ -609,40 +1075,369 @@ class Source:
             for name in self.__name_filter.filter(include=include, exclude=exclude):
                 yield self.__units[name]
 
+        def with_prefix(self, prefix: str) -> Generator[T, None, None]:
+            """List the units whose names start with a prefix, for example
+            ``user@``."""
+            for name in self.__name_filter.with_prefix(prefix):
+                yield self.__units[name]
+
+        def with_type(self, unit_type: str) -> Generator[T, None, None]:
+            """List the units of a unit type, for example ``timer``."""
+            for name in self.__name_filter.with_type(unit_type):
+                yield self.__units[name]
+
         @property
         def count(self) -> int:
             return len(self.__units)
 
+        def __get_columns(self) -> dict[str, Source.Column]:
+            if self.__columns is None:
+                self.__columns = {
+                    property: Source.Column() for property in Source.Cache.PROPERTIES
+                }
+                for unit in self.__units.values():
+                    for property, column in self.__columns.items():
+                        column.append(getattr(unit, property))
+            return self.__columns
+
+        def __select(
+            self,
+            include: str | Sequence[str] | Source.NameMatcher | None,
+            exclude: str | Sequence[str] | Source.NameMatcher | None,
+        ) -> list[bool] | None:
+            if not include and not exclude:
+                return None
+            names = set(self.__name_filter.filter(include=include, exclude=exclude))
+            return [name in names for name in self.__units]
+
         def count_by_states(
             self,
             states: Sequence[str],
-            include: str | Sequence[str] | None = None,
-            exclude: str | Sequence[str] | None = None,
+            include: str | Sequence[str] | Source.NameMatcher | None = None,
+            exclude: str | Sequence[str] | Source.NameMatcher | None = None,
         ) -> dict[str, int]:
-            states_normalized: list[dict[str, str]] = []
+            """
+            :param states: for example ``('active_state:failed',)``
+            """
+            columns = self.__get_columns()
+            selection = self.__select(include, exclude)
+            counts: dict[str, Counter[str]] = {}
             counter: dict[str, int] = {}
             for state_spec in states:
-                # state_proerty:state_value
+                # state_property:state_value
                 # for example: active_state:failed
-                state_property = state_spec.split(":")[0]
-                state_value = state_spec.split(":")[1]
-                state: dict[str, str] = {
-                    "property": state_property,
-                    "value": state_value,
-                    "spec": state_spec,
-                }
-                states_normalized.append(state)
-                counter[state_spec] = 0
+                state_property, state_value = state_spec.split(":")
+                if state_property not in counts:
+                    counts[state_property] = columns[state_property].count(selection)
+                counter[state_spec] = counts[state_property][state_value]
+            return counter
 
-            for unit in self.filter(include=include, exclude=exclude):
-                for state in states_normalized:
-                    if getattr(unit, state["property"]) == state["value"]:
-                        counter[state["spec"]] += 1
+        def count_by(
+            self,
+            *properties: str,
+            include: str | Sequence[str] | Source.NameMatcher | None = None,
+            exclude: str | Sequence[str] | Source.NameMatcher | None = None,
+        ) -> dict[tuple[str, ...], int]:
+            """Count the units by the combinations of the values of some
+            properties.
 
-            return counter
+            :param properties: for example ``('type', 'active_state')``
+
+            :return: for example ``{('service', 'active'): 35, ('service',
+              'failed'): 1, ('timer', 'active'): 7}``
+            """
+            columns = self.__get_columns()
+            return Source.Column.count_by(
+                *(columns[property] for property in properties),
+                selection=self.__select(include, exclude),
+            )
+
+    class Digest:
+        """Evaluates the units in one pass while they are listed. The units
+        scope and the performance data only need a few counters and the units
+        that appear in the output. Only these units are retained, so that the
+        memory doesn’t grow with the number of units."""
+
+        include: Source.NameMatcher
+
+        exclude: Source.NameMatcher
+
+        retain_all: bool
+        """Retain also the units in the OK state, for example to list them
+        in the verbose output."""
+
+        unit_names: frozenset[str]
+        """The names of the units of the option ``-u``. They are retained if
+        they are listed, so that they aren’t counted twice when they are added
+        again."""
+
+        count: int
+        """The number of all units."""
+
+        matched: int
+        """The number of units that are selected by the include and the
+        exclude regular expressions."""
+
+        states: Sequence[str]
+        """The state specifications of :attr:`counters`."""
+
+        __cube: Counter[tuple[str, ...]]
+        """The number of units per combination of the values of
+        :attr:`Source.Cache.PROPERTIES` without the excluded units. There are
+        only a few distinct combinations, so any breakdown can be computed from
+        it afterwards."""
+
+        __units: Source.Cache[Source.Unit]
+
+        def __init__(
+            self,
+            include: str | Sequence[str] | Source.NameMatcher | None = None,
+            exclude: str | Sequence[str] | Source.NameMatcher | None = None,
+            states: Sequence[str] = (),
+            retain_all: bool = False,
+            unit_names: Sequence[str] = (),
+        ) -> None:
+            """
+            :param states: for example ``('active_state:failed',)``
+            """
+            self.include = Source.NameMatcher.of(include)
+            self.exclude = Source.NameMatcher.of(exclude)
+            self.retain_all = retain_all
+            self.unit_names = frozenset(unit_names)
+            self.count = 0
+            self.matched = 0
+            self.states = states
+            self.__cube = Counter()
+            self.__units = Source.Cache()
+
+        def __count(self, unit: Source.Unit, increment: int) -> None:
+            self.count += increment
+            if self.exclude and self.exclude.match(unit.name):
+                return
+            self.__cube[
+                (unit.type, unit.active_state, unit.sub_state, unit.load_state)
+            ] += increment
+            if not self.include or self.include.match(unit.name):
+                self.matched += increment
+
+        def add(self, unit: Source.Unit, retain: bool = False) -> None:
+            """Evaluate one unit.
+
+            :param retain: Retain the unit even if it is in the OK state, for
+              example the units of the option ``-u``.
+            """
+            previous = self.__units.get(unit.name) if unit.name in self else None
+            if previous is not None:
+                # A unit of -u has been listed as well.
+                self.__count(previous, -1)
+            self.__count(unit, 1)
+            if (
+                retain
+                or self.retain_all
+                or unit.name in self.unit_names
+                or previous is not None
+                or unit.convert_to_exitcode() != Ok
+            ):
+                self.__units.add(unit.name, unit)
+
+        def __contains__(self, name: str) -> bool:
+            return name in self.__units
+
+        def count_by(self, *properties: str) -> dict[tuple[str, ...], int]:
+            """Count the units without the excluded units by the combinations
+            of the values of some properties.
+
+            :param properties: for example ``('type', 'active_state')``
+            """
+            indexes = [Source.Cache.PROPERTIES.index(p) for p in properties]
+            counter: Counter[tuple[str, ...]] = Counter()
+            for combination, number in self.__cube.items():
+                counter[tuple(combination[index] for index in indexes)] += number
+            return {
+                combination: number
+                for combination, number in counter.items()
+                if number > 0
+            }
+
+        @property
+        def counters(self) -> dict[str, int]:
+            """The number of units per state specification of :attr:`states`
+            (for example ``active_state:failed``) without the excluded
+            units."""
+            counts: dict[str, dict[tuple[str, ...], int]] = {}
+            counters: dict[str, int] = {}
+            for state_spec in self.states:
+                state_property, state_value = state_spec.split(":")
+                if state_property not in counts:
+                    counts[state_property] = self.count_by(state_property)
+                counters[state_spec] = counts[state_property].get((state_value,), 0)
+            return counters
+
+        @property
+        def units(self) -> Generator[Source.Unit, None, None]:
+            """The retained units that are selected by the include and the
+            exclude regular expressions sorted by name."""
+            return self.__units.filter(include=self.include, exclude=self.exclude)
+
+    class Snapshot:
+        """Persists the parsed units and timers in a directory (for example
+        ``/run/check_systemd``), so that many checks on the same host can share
+        one enumeration. Every snapshot is stored in a file with one JSON
+        array per line. A snapshot is fresh as long as its age doesn’t exceed
+        the time to live."""
+
+        directory: str
+
+        ttl: float
+        """Time to live in seconds."""
+
+        def __init__(self, directory: str, ttl: float) -> None:
+            self.directory = directory
+            self.ttl = ttl
+
+        def __get_path(self, key: str) -> str:
+            return os.path.join(self.directory, key + ".jsonl")
+
+        @staticmethod
+        def __is_trusted(status: os.stat_result) -> bool:
+            """Only the user running the checks may have written the
+            snapshot: The owner must be this user and neither the group nor
+            others may write."""
+            return status.st_uid == os.getuid() and not status.st_mode & 0o022
+
+        def load(self, key: str, ttl: float | None = None) -> list[list[Any]] | None:
+            """Load the rows of a fresh snapshot.
+
+            :param key: for example ``cli-system-units``
+            :param ttl: Overwrite the time to live of the snapshot.
+
+            :return: ``None`` if there is no fresh snapshot or if the
+              directory or the file could have been written by someone else.
+            """
+            path = self.__get_path(key)
+            if ttl is None:
+                ttl = self.ttl
+            try:
+                if not self.__is_trusted(os.stat(self.directory)):
+                    logger.info("Ignore snapshots in untrusted '%s'", self.directory)
+                    return None
+                with open(path, encoding="utf-8") as snapshot:
+                    status = os.fstat(snapshot.fileno())
+                    if not self.__is_trusted(status):
+                        logger.info("Ignore untrusted snapshot '%s'", path)
+                        return None
+                    age = time.time() - status.st_mtime
+                    if age > ttl:
+                        logger.debug("Snapshot '%s' is stale (age: %s s)", path, age)
+                        return None
+                    rows = [json.loads(line) for line in snapshot]
+            except (OSError, ValueError):
+                return None
+            logger.debug("Load snapshot '%s' (age: %s s)", path, age)
+            return rows
+
+        class Writer:
+            """Writes the rows of a snapshot one by one into a temporary file,
+            which replaces the snapshot atomically on :meth:`commit`. Errors
+            are logged and otherwise ignored, since the check itself doesn’t
+            depend on the snapshot."""
+
+            path: str
+
+            __tmp_path: str | None
+
+            __file: TextIO | None
+
+            def __init__(self, directory: str, path: str) -> None:
+                self.path = path
+                self.__tmp_path = None
+                self.__file = None
+                import tempfile
+
+                try:
+                    # Only the user running the checks may read the snapshots.
+                    os.makedirs(directory, mode=0o700, exist_ok=True)
+                    fd, self.__tmp_path = tempfile.mkstemp(dir=directory, prefix=".")
+                    self.__file = os.fdopen(fd, "w", encoding="utf-8")
+                except OSError as e:
+                    self.__fail(e)
+
+            def __fail(self, error: OSError) -> None:
+                logger.info("Failed to store snapshot '%s': %s", self.path, error)
+                self.discard()
+
+            def write(self, row: Sequence[Any]) -> None:
+                if self.__file is None:
+                    return
+                try:
+                    self.__file.write(json.dumps(row) + "\n")
+                except OSError as e:
+                    self.__fail(e)
+
+            def commit(self) -> None:
+                if self.__file is None or self.__tmp_path is None:
+                    return
+                try:
+                    self.__file.close()
+                    os.replace(self.__tmp_path, self.path)
+                except OSError as e:
+                    self.__fail(e)
+                    return
+                self.__file = None
+                logger.debug("Store snapshot '%s'", self.path)
+
+            def discard(self) -> None:
+                if self.__file is not None:
+                    self.__file.close()
+                    self.__file = None
+                if self.__tmp_path is not None:
+                    try:
+                        os.unlink(self.__tmp_path)
+                    except OSError:
+                        pass
+                    self.__tmp_path = None
+
+        def open(self, key: str) -> Source.Snapshot.Writer:
+            """Open a snapshot to write its rows one by one.
+
+            :param key: for example ``cli-system-units``
+            """
+            return Source.Snapshot.Writer(self.directory, self.__get_path(key))
+
+        def store(self, key: str, rows: Iterable[Sequence[Any]]) -> None:
+            """Store the rows atomically.
+
+            :param key: for example ``cli-system-units``
+            """
+            writer = self.open(key)
+            try:
+                for row in rows:
+                    writer.write(row)
+            except BaseException:
+                writer.discard()
+                raise
+            writer.commit()
+
+    data_source: str
+    """The name of the data source, for example ``cli`` or ``dbus``."""
 
     _user: bool = False
 
+    _snapshot: Source.Snapshot | None = None
+
+    _selection: Source.Selection = Selection()
+
+    _digest: Source.Digest | None = None
+
+    concurrent: bool = True
+    """Run the independent acquisitions of :meth:`prefetch` concurrently in
+    a thread pool."""
+
+    __results: dict[str, tuple[Any, BaseException | None]]
+
+    def __init__(self) -> None:
+        self.__results = {}
+
     def _round_1(
         self,
         value: float,
@@ -688,23 +1483,240 @@ class Source:
     def set_user(self, user: bool) -> None:
         self._user = user
 
+    def set_snapshot(self, snapshot: Source.Snapshot | None) -> None:
+        self._snapshot = snapshot
+
+    def set_selection(self, selection: Source.Selection) -> None:
+        self._selection = selection
+
+    def set_digest(self, digest: Source.Digest | None) -> None:
+        """Evaluate the listed units with this digest instead of storing all
+        of them in a :class:`Source.Cache`."""
+        self._digest = digest
+
+    def _get_manager_key(self) -> str:
+        """
+        :return: ``system`` or for example ``user-1000``
+        """
+        return f"user-{os.getuid()}" if self._user else "system"
+
+    def _get_snapshot_key(self, kind: str) -> str:
+        """
+        :param kind: ``units`` or ``timers``
+
+        :return: for example ``cli-system-units`` or ``dbus-user-1000-timers``
+        """
+        return f"{self.data_source}-{self._get_manager_key()}-{kind}"
+
+    def _load_snapshot(self, kind: str) -> list[list[Any]] | None:
+        if self._snapshot is None:
+            return None
+        return self._snapshot.load(self._get_snapshot_key(kind))
+
+    @staticmethod
+    def _read_boot_id() -> str | None:
+        """Read the random ID of the current boot, which changes on every
+        reboot."""
+        try:
+            with open("/proc/sys/kernel/random/boot_id", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _store_snapshot(self, kind: str, rows: Iterable[Sequence[Any]]) -> None:
+        if self._snapshot is not None:
+            self._snapshot.store(self._get_snapshot_key(kind), rows)
+
+    def __acquire(self, key: str, acquire: Callable[[], Any]) -> Any:
+        """Acquire some data only once per instance. The result or the
+        exception is memoized, so that data prefetched in a thread is
+        evaluated at the same place as data acquired on demand.
+
+        :param key: for example ``units`` or ``unit:nginx.service``
+        :param acquire: A function without arguments that acquires the data.
+        """
+        if key not in self.__results:
+            start = time.perf_counter()
+            try:
+                self.__results[key] = (acquire(), None)
+            except BaseException as e:  # noqa: BLE001
+                self.__results[key] = (None, e)
+            logger.debug(
+                "Acquire '%s' in %s s",
+                key,
+                f"{time.perf_counter() - start:.3f}",
+            )
+        result, exception = self.__results[key]
+        if exception is not None:
+            raise exception
+        return result
+
+    def prefetch(self, plan: AcquisitionPlan) -> None:
+        """Acquire all data of the plan that doesn’t depend on each other
+        before the check evaluates it. The commands are waiting for systemd
+        most of the time, so they are executed concurrently and the wall
+        clock time is the time of the slowest call and not the sum of all
+        calls.
+        """
+        tasks: list[tuple[str, Callable[[], Any]]] = []
+        if plan.units:
+            if self._digest is not None:
+                tasks.append(("units", lambda: self.digest))
+            else:
+                tasks.append(("units", lambda: self.units))
+        if plan.unit_names:
+            names = plan.unit_names
+            tasks.append(("units:" + " ".join(names), lambda: self.get_units(names)))
+        if plan.manager_counters:
+            tasks.append(("manager_counters", lambda: self.manager_counters))
+        if plan.startup_time:
+            tasks.append(("startup_time", lambda: self.startup_time))
+        if plan.timers:
+            tasks.append(("timers", lambda: self.timers))
+        if not self.concurrent or len(tasks) < 2:
+            return
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            # The exceptions are raised again when the data is accessed.
+            wait([executor.submit(acquire) for _, acquire in tasks])
+        logger.debug(
+            "Acquire %s concurrently in %s s",
+            ", ".join(key for key, _ in tasks),
+            f"{time.perf_counter() - start:.3f}",
+        )
+
+    def get_unit(self, name: str) -> Source.Unit:
+        return self.__acquire("unit:" + name, lambda: self._get_unit(name))
+
+    @abstractmethod
+    def _get_unit(self, name: str) -> Source.Unit: ...
+
+    def get_units(self, names: Sequence[str]) -> list[Source.Unit]:
+        """Fetch several units at once, for example the units of ``-u``.
+
+        :param names: The complete names of the units, for example
+          ``('nginx.service', 'ssh.service')``.
+
+        :return: The units in the order of the names.
+        """
+        return self.__acquire(
+            "units:" + " ".join(names), lambda: self._get_units(names)
+        )
+
+    def _get_units(self, names: Sequence[str]) -> list[Source.Unit]:
+        """Fetch the units one by one. The data sources override this method
+        to fetch all of them with one command or one round trip."""
+        return [self._get_unit(name) for name in names]
+
     @abstractmethod
-    def get_unit(self, name: str) -> Source.Unit: ...
+    def _list_units(
+        self, selection: Source.Selection
+    ) -> Generator[Source.Unit, Any, None]: ...
+
+    @property
+    def _all_units(self) -> Generator[Source.Unit, Any, None]:
+        return self._list_units(self._selection)
+
+    @property
+    def failed_units(self) -> Source.Cache[Source.Unit]:
+        """Only the units in the ``failed`` state."""
+        cache: Source.Cache[Source.Unit] = Source.Cache()
+        for unit in self._list_units(self._selection._replace(states=("failed",))):
+            cache.add(unit.name, unit)
+        return cache
+
+    @property
+    def manager_counters(self) -> Source.ManagerCounters:
+        return self.__acquire("manager_counters", lambda: self._manager_counters)
 
     @property
     @abstractmethod
-    def _all_units(self) -> Generator[Source.Unit, Any, None]: ...
+    def _manager_counters(self) -> Source.ManagerCounters: ...
 
     @property
     def units(self) -> Source.Cache[Source.Unit]:
+        return self.__acquire("units", self.__read_units)
+
+    def __read_units(self) -> Source.Cache[Source.Unit]:
         cache: Source.Cache[Source.Unit] = Source.Cache()
-        for unit in self._all_units:
+        for unit in self.__stream_units():
             cache.add(unit.name, unit)
         return cache
 
+    @property
+    def digest(self) -> Source.Digest:
+        """The digest of :meth:`set_digest` after all units are listed and
+        evaluated."""
+        return self.__acquire("digest", self.__read_digest)
+
+    def __read_digest(self) -> Source.Digest:
+        if self._digest is None:
+            raise CheckSystemdError("No digest is set.")
+        for unit in self.__stream_units():
+            self._digest.add(unit)
+        return self._digest
+
+    def __stream_units(self) -> Generator[Source.Unit, None, None]:
+        """List the units from a fresh snapshot or from systemd. The listed
+        units are written to the snapshot while they are yielded."""
+        kind = "units"
+        if self._selection != Source.Selection():
+            # A snapshot of a narrowed down unit list must not be served to
+            # checks that need other units.
+            import hashlib
+
+            digest = hashlib.sha1(json.dumps(self._selection).encode()).hexdigest()
+            kind += "-" + digest[:12]
+        rows = self._load_snapshot(kind)
+        if rows is not None:
+            for name, active_state, sub_state, load_state in rows:
+                yield Source.Unit(name, active_state, sub_state, load_state)
+            return
+        writer = None
+        if self._snapshot is not None:
+            writer = self._snapshot.open(self._get_snapshot_key(kind))
+        try:
+            for unit in self._all_units:
+                if writer is not None:
+                    writer.write(
+                        (unit.name, unit.active_state, unit.sub_state, unit.load_state)
+                    )
+                yield unit
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+        if writer is not None:
+            writer.commit()
+
     @property
     @abstractmethod
-    def startup_time(self) -> float | None: ...
+    def _startup_time(self) -> float | None: ...
+
+    @property
+    def startup_time(self) -> float | None:
+        """The startup time in seconds or ``None`` if the boot process is not
+        yet finished. The startup time can’t change until the next reboot. It
+        is therefore stored together with the boot ID in the snapshot
+        directory and only measured again after a reboot."""
+        return self.__acquire("startup_time", self.__read_startup_time)
+
+    def __read_startup_time(self) -> float | None:
+        boot_id = Source._read_boot_id()
+        key = f"{self._get_manager_key()}-startup-time"
+        if self._snapshot is not None and boot_id is not None:
+            rows = self._snapshot.load(key, ttl=float("inf"))
+            if rows and rows[0][0] == boot_id:
+                return rows[0][1]
+        startup_time = self._startup_time
+        if startup_time is None:
+            # Bootup is not yet finished. Please try again later.
+            return None
+        if self._snapshot is not None and boot_id is not None:
+            self._snapshot.store(key, [(boot_id, startup_time)])
+        return startup_time
 
     @property
     @abstractmethod
@@ -712,13 +1724,40 @@ class Source:
 
     @property
     def timers(self) -> Source.Cache[Source.Timer]:
+        return self.__acquire("timers", self.__read_timers)
+
+    def __read_timers(self) -> Source.Cache[Source.Timer]:
         cache: Source.Cache[Source.Timer] = Source.Cache()
+        rows = self._load_snapshot("timers")
+        if rows is not None:
+            for name, last, next in rows:
+                cache.add(name, Source.Timer(name=name, last=last, next=next))
+            return cache
         for timer in self._all_timers:
             cache.add(timer.name, timer)
+        self._store_snapshot(
+            "timers", ((timer.name, timer.last, timer.next) for timer in cache)
+        )
         return cache
 
 
 class CliSource(Source):
+    data_source = "cli"
+
+    json_output: bool | None = None
+    """Whether ``systemctl`` prints its tables as JSON (``--output=json``).
+    ``None`` means that the capability isn’t probed yet."""
+
+    CHUNK_SIZE: ClassVar[int] = 65536
+    """The number of characters of the JSON output of ``systemctl`` that
+    :meth:`decode_rows` reads at once."""
+
+    __JSON_REFUSED = re.compile(
+        "Unknown output|unrecognized option|invalid option", re.IGNORECASE
+    )
+    """The error messages of the versions of ``systemctl`` that refuse
+    ``--output=json``. Only these results of the probe are stored."""
+
     class Table:
         """This class reads the text tables that some systemd commands like
         ``systemctl list-units`` or ``systemctl list-timers`` produce."""
@@ -728,26 +1767,36 @@ class CliSource(Source):
         column_lengths: list[int]
         columns: list[str]
 
-        def __init__(self, stdout: str) -> None:
-            """
+        __slices: list[slice]
+        """The slices to cut the columns out of a row. They are computed
+        once from the header row."""
+
+        __FOOTER = re.compile(r"^\d+ (loaded units|timers) listed")
+
+        __WORD_START = re.compile(r"(?:^|(?<= ))[^ ]")
+
+        def __init__(self, stdout: str) -> None:
+            """
             :param stdout: The standard output of certain systemd command line
             utilities.
             :param expected_column_headers: The expected column headers
             (for example ``('UNIT', 'LOAD', 'ACTIVE')``)
             """
+            # The table footer is separted by a blank line. An empty table
+            # is directly followed by the footer, for example
+            # “0 loaded units listed.”
             rows: list[str] = stdout.splitlines()
+            if "" in rows:
+                del rows[rows.index("") :]
+            if len(rows) > 1 and CliSource.Table.__FOOTER.match(rows[1]):
+                del rows[1:]
             self.header_row = CliSource.Table.__normalize_header(rows[0])
             self.column_lengths = CliSource.Table.__detect_lengths(self.header_row)
+            self.__slices = CliSource.Table.__get_slices(self.column_lengths)
             self.columns = CliSource.Table.__split_row(
                 self.header_row, self.column_lengths
             )
-            counter = 0
-            for line in rows:
-                # The table footer is separted by a blank line
-                if line == "":
-                    break
-                counter += 1
-            self.body_rows = rows[1:counter]
+            self.body_rows = rows[1:]
 
         @staticmethod
         def __normalize_header(header_row: str) -> str:
@@ -764,39 +1813,33 @@ class CliSource(Source):
 
             :return: A list of column lengths in number of characters.
             """
-            column_lengths: list[int] = []
-            match = re.search(r"^ +", header_row)
-            if match:
-                whitespace_prefix_length = match.end()
-                column_lengths.append(whitespace_prefix_length)
-                header_row = header_row[whitespace_prefix_length:]
-
-            word = 0
-            space = 0
-
-            for char in header_row:
-                if word and space >= 1 and char != " ":
-                    column_lengths.append(word + space)
-                    word = 0
-                    space = 0
-
-                if char == " ":
-                    space += 1
-                else:
-                    word += 1
-
-            return column_lengths
+            # A column starts with the first character of a word.
+            starts = [
+                match.start()
+                for match in CliSource.Table.__WORD_START.finditer(header_row)
+            ]
+            if starts and starts[0] > 0:
+                # The whitespace prefix forms the first column.
+                starts.insert(0, 0)
+            return [right - left for left, right in zip(starts, starts[1:])]
 
         @staticmethod
-        def __split_row(line: str, column_lengths: list[int]) -> list[str]:
-            columns: list[str] = []
+        def __get_slices(column_lengths: list[int]) -> list[slice]:
+            slices: list[slice] = []
             right = 0
             for length in column_lengths:
                 left = right
                 right = right + length
-                columns.append(line[left:right].strip())
-            columns.append(line[right:].strip())
-            return columns
+                slices.append(slice(left, right))
+            slices.append(slice(right, None))
+            return slices
+
+        @staticmethod
+        def __split_row(line: str, column_lengths: list[int]) -> list[str]:
+            return [
+                line[column].strip()
+                for column in CliSource.Table.__get_slices(column_lengths)
+            ]
 
         @property
         def row_count(self) -> int:
@@ -811,8 +1854,12 @@ class CliSource(Source):
             :param column_headers: The expected column headers
               (for example ``('UNIT', 'LOAD', 'ACTIVE')``)
             """
+            CliSource.Table.__check_header(self.header_row, column_header)
+
+        @staticmethod
+        def __check_header(header_row: str, column_header: Sequence[str]) -> None:
             for column_name in column_header:
-                if self.header_row.find(column_name.lower()) == -1:
+                if header_row.find(column_name.lower()) == -1:
                     msg = (
                         "The column heading '{}' couldn’t found in the "
                         "table header. Possibly the table layout of systemctl "
@@ -820,6 +1867,38 @@ class CliSource(Source):
                     )
                     raise ValueError(msg.format(column_name))
 
+        @staticmethod
+        def stream(
+            lines: Iterable[str], *columns: str
+        ) -> Generator[tuple[str, ...], None, None]:
+            """Parse a table row by row while it is read, for example from the
+            pipe of a running command. Only one row is held in memory.
+
+            :param lines: The lines of the table without line breaks.
+            :param columns: The column names in lower case, for example
+              ``('unit', 'active', 'sub', 'load')``
+
+            :return: One tuple per row with the values in the order of the
+              requested columns.
+            """
+            lines = iter(lines)
+            header_row = next(lines, None)
+            if header_row is None:
+                return
+            header_row = CliSource.Table.__normalize_header(header_row)
+            CliSource.Table.__check_header(header_row, columns)
+            column_lengths = CliSource.Table.__detect_lengths(header_row)
+            names = CliSource.Table.__split_row(header_row, column_lengths)
+            slices = CliSource.Table.__get_slices(column_lengths)
+            selected = [slices[names.index(column)] for column in columns]
+            for line in lines:
+                if line == "" or CliSource.Table.__FOOTER.match(line):
+                    break
+                yield tuple(map(str.strip, map(line.__getitem__, selected)))
+            # Read the footer, so that the command can finish.
+            for _ in lines:
+                pass
+
         def get_row(self, row_number: int) -> dict[str, str]:
             """Retrieve a table row as a dictionary. The keys are taken from the
             header row. The first row number is 0.
@@ -827,9 +1906,8 @@ class CliSource(Source):
             :param row_number: The index number of the table row starting at 0.
 
             """
-            body_columns = CliSource.Table.__split_row(
-                self.body_rows[row_number], self.column_lengths
-            )
+            row = self.body_rows[row_number]
+            body_columns = [row[column].strip() for column in self.__slices]
 
             result: dict[str, str] = {}
 
@@ -849,7 +1927,7 @@ class CliSource(Source):
                 yield self.get_row(i)
 
     @staticmethod
-    def __execute_cli(args: str | Sequence[str]) -> str | None:
+    def execute_cli(args: str | Sequence[str]) -> str | None:
         """Execute a command on the command line (cli = command line interface))
         and capture the stdout. This is a wrapper around ``subprocess.Popen``.
 
@@ -870,7 +1948,7 @@ class CliSource(Source):
             stdout, stderr = p.communicate()
             logger.debug("Execute command on the command line: %s", " ".join(args))
         except OSError as e:
-            raise CheckError(e)
+            raise CheckError(e) from e
 
         if p.returncode != 0:
             raise CheckError(
@@ -888,6 +1966,65 @@ class CliSource(Source):
             return result
         return None
 
+    @staticmethod
+    def stream_cli(
+        args: Sequence[str], size: int | None = None
+    ) -> Generator[str, None, None]:
+        """Execute a command on the command line and yield its stdout line by
+        line while the command is still writing. Unlike
+        :meth:`execute_cli` the whole output is never held in memory.
+
+        :param args: A list of programm arguments.
+        :param size: Yield chunks of this number of characters instead of
+          lines, for example for JSON output, which has no line breaks.
+
+        :raises nagiosplugin.CheckError: After the last line, if the command
+          exits with a non-zero return code or produces some stderr output.
+          Also if an OSError exception occurs.
+
+        :return: The lines of the stdout without line breaks or the chunks of
+          the stdout.
+        """
+        try:
+            p = subprocess.Popen(
+                args,
+                stderr=subprocess.PIPE,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+            )
+        except OSError as e:
+            raise CheckError(e) from e
+        logger.debug("Execute command on the command line: %s", " ".join(args))
+        assert p.stdout is not None and p.stderr is not None
+        stdout = io.TextIOWrapper(p.stdout, encoding="utf-8")
+        count = 0
+        try:
+            if size is None:
+                for line in stdout:
+                    count += 1
+                    yield line.rstrip("\n")
+            else:
+                for chunk in iter(lambda: stdout.read(size), ""):
+                    count += chunk.count("\n")
+                    yield chunk
+        finally:
+            # Closing the pipe early terminates the command with SIGPIPE.
+            stdout.close()
+            # The few error messages fit into the pipe buffer.
+            stderr = p.stderr.read()
+            p.stderr.close()
+            returncode = p.wait()
+        logger.debug("Read %s lines from the stdout of: %s", count, " ".join(args))
+
+        if returncode != 0:
+            message = f"The command exits with a none-zero return code ({returncode})"
+            if stderr:
+                message += ": " + stderr.decode("utf-8", "replace").strip()
+            raise CheckError(message)
+
+        if stderr:
+            raise CheckError(stderr)
+
     @staticmethod
     def __convert_to_sec(fmt_timespan: str) -> float:
         """Convert a timespan format string to seconds. Take a look at the
@@ -928,67 +2065,270 @@ class CliSource(Source):
 
     @staticmethod
     def __convert_to_timestamp(date_format: str) -> int:
+        from datetime import datetime
+
         return int(
             datetime.strptime(date_format, "%a %Y-%m-%d %H:%M:%S %Z").timestamp()
         )
 
-    def get_unit(self, name: str) -> Source.Unit:
-        command = [
-            "systemctl",
-            "show",
-            "--property",
-            "Id",
-            "--property",
-            "ActiveState",
-            "--property",
-            "SubState",
-            "--property",
-            "LoadState",
-            name,
-        ]
+    @staticmethod
+    def __get_systemctl_id() -> str | None:
+        """Identify the installed ``systemctl`` binary without executing it.
+        The ID changes if systemd is updated.
+
+        :return: for example ``/usr/bin/systemctl:1700000000000000000:321864``
+        """
+        import shutil
+
+        path = shutil.which("systemctl")
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def __load_json_output(self) -> bool | None:
+        """Load the probed JSON capability of ``systemctl`` from the
+        snapshot directory."""
+        if self.json_output is None and self._snapshot is not None:
+            systemctl_id = CliSource.__get_systemctl_id()
+            rows = self._snapshot.load("systemctl-json-output", ttl=float("inf"))
+            if systemctl_id is not None and rows and rows[0][0] == systemctl_id:
+                self.json_output = rows[0][1]
+        return self.json_output
+
+    def __store_json_output(self, json_output: bool) -> None:
+        logger.debug("systemctl supports --output=json: %s", json_output)
+        self.json_output = json_output
+        if self._snapshot is None:
+            return
+        systemctl_id = CliSource.__get_systemctl_id()
+        if systemctl_id is not None:
+            self._snapshot.store("systemctl-json-output", [(systemctl_id, json_output)])
+
+    def __list(self, command: list[str]) -> tuple[Iterator[str], bool]:
+        """Execute a ``systemctl list-*`` command and request the table as
+        JSON if ``systemctl`` supports it. Older versions of ``systemctl``
+        ignore ``--output=json`` for tables or refuse it. The result of this
+        probe is stored, so that it isn’t repeated on every run.
+
+        :param command: for example ``['systemctl', 'list-units', '--all']``
+
+        :return: The stdout, which is read while the command is still
+          running, and whether it is JSON: The chunks of the JSON array (see
+          :meth:`decode_rows`) or the lines of the table.
+        """
+        json_output = self.__load_json_output()
+        if json_output is False:
+            return CliSource.stream_cli(command), False
+        chunks = CliSource.stream_cli(command + ["--output=json"], self.CHUNK_SIZE)
+        try:
+            first_chunk = next(chunks, None)
+        except CheckError as e:
+            if json_output:
+                raise
+            if CliSource.__JSON_REFUSED.search(str(e)):
+                self.__store_json_output(False)
+            else:
+                # For example a timeout: The probe is repeated on the next run.
+                logger.info("Failed to probe --output=json: %s", e)
+                self.json_output = False
+            return CliSource.stream_cli(command), False
+        if first_chunk is None:
+            # Empty output doesn’t reveal the capability.
+            return iter(()), bool(json_output)
+        is_json = first_chunk.lstrip().startswith("[")
+        if json_output is None:
+            self.__store_json_output(is_json)
+        if is_json:
+            return chain([first_chunk], chunks), True
+        return CliSource.split_lines(chain([first_chunk], chunks)), False
+
+    @staticmethod
+    def split_lines(chunks: Iterable[str]) -> Generator[str, None, None]:
+        """Join the chunks of a text and split it into lines without line
+        breaks."""
+        rest = ""
+        for chunk in chunks:
+            lines = (rest + chunk).split("\n")
+            rest = lines.pop()
+            yield from lines
+        if rest:
+            yield rest
+
+    @staticmethod
+    def decode_rows(chunks: Iterable[str]) -> Generator[Any, None, None]:
+        """Decode the rows of a JSON array, for example the output of
+        ``systemctl list-units --output=json``, one by one while the chunks
+        are read. Only the unread part of the current chunk and one row are
+        held in memory.
+
+        :raises CheckSystemdError: If the chunks aren’t a complete JSON array.
+        """
+        decoder = json.JSONDecoder()
+        buffer = ""
+        started = False
+        finished = False
+        for chunk in chunks:
+            buffer += chunk
+            index = 0
+            while not finished:
+                while index < len(buffer) and buffer[index] in " \t\r\n,":
+                    index += 1
+                if index == len(buffer):
+                    break
+                if not started:
+                    if buffer[index] != "[":
+                        raise CheckSystemdError("The JSON output isn’t an array.")
+                    started = True
+                    index += 1
+                    continue
+                if buffer[index] == "]":
+                    finished = True
+                    break
+                try:
+                    row, end = decoder.raw_decode(buffer, index)
+                except json.JSONDecodeError:
+                    # The row continues in the next chunk.
+                    break
+                if end == len(buffer):
+                    # A number or a literal may continue in the next chunk.
+                    break
+                index = end
+                yield row
+            buffer = buffer[index:]
+        if not finished and (started or buffer.strip()):
+            raise CheckSystemdError("The JSON output is incomplete.")
+
+    @staticmethod
+    def __convert_usec(timestamp: int | None, now: float) -> int | None:
+        """Convert a realtime timestamp of the JSON output of ``systemctl
+        list-timers`` into the seconds from now.
+
+        :param timestamp: Microseconds since the epoch, ``0``, ``null`` or
+          ``USEC_INFINITY`` if the timer has never elapsed or won’t elapse.
+        """
+        if not timestamp or timestamp >= 2**64 - 1:
+            return None
+        return int(abs(timestamp / 1_000_000 - now))
+
+    def __show(
+        self, properties: Sequence[str], names: Sequence[str] = ()
+    ) -> list[dict[str, str]] | None:
+        """Read some properties of units or of the manager with ``systemctl
+        show``. The properties of several units are read with one command,
+        which prints them in blocks separated by an empty line.
+
+        :param properties: for example ``('Id', 'ActiveState')``
+        :param names: The names of the units. Without names the properties of
+          the manager are read.
+
+        :return: One dictionary of properties per block, in the order of the
+          names.
+        """
+        command = ["systemctl", "show"]
+        for property in properties:
+            command += ["--property", property]
+        command += names
         if self._user:
             command += ["--user"]
-        stdout = CliSource.__execute_cli(command)
+        stdout = CliSource.execute_cli(command)
         if stdout is None:
-            raise CheckSystemdError(f"The unit '{name}' couldn't be found.")
-        rows = stdout.splitlines()
+            return None
 
-        properties: dict[str, str] = {}
-        for row in rows:
+        blocks: list[dict[str, str]] = []
+        result: dict[str, str] = {}
+        for row in stdout.splitlines():
+            if not row:
+                if result:
+                    blocks.append(result)
+                result = {}
+                continue
             index_equal_sign = row.index("=")
-            properties[row[:index_equal_sign]] = row[index_equal_sign + 1 :]
+            result[row[:index_equal_sign]] = row[index_equal_sign + 1 :]
+        if result:
+            blocks.append(result)
+        return blocks
+
+    def _get_unit(self, name: str) -> Source.Unit:
+        return self._get_units((name,))[0]
+
+    def _get_units(self, names: Sequence[str]) -> list[Source.Unit]:
+        blocks = self.__show(("Id", "ActiveState", "SubState", "LoadState"), names)
+        if blocks is None or len(blocks) != len(names):
+            raise CheckSystemdError(
+                "The unit{} '{}' couldn't be found.".format(
+                    "s" if len(names) > 1 else "", "', '".join(names)
+                )
+            )
 
-        logger.debug("Properties of unit '%s': %s", name, properties)
+        units: list[Source.Unit] = []
+        for name, properties in zip(names, blocks):
+            logger.debug("Properties of unit '%s': %s", name, properties)
+            units.append(
+                Source.Unit(
+                    name=properties["Id"],
+                    active_state=properties["ActiveState"],
+                    sub_state=properties["SubState"],
+                    load_state=properties["LoadState"],
+                )
+            )
+        return units
 
-        return Source.Unit(
-            name=properties["Id"],
-            active_state=properties["ActiveState"],
-            sub_state=properties["SubState"],
-            load_state=properties["LoadState"],
+    @property
+    def _manager_counters(self) -> Source.ManagerCounters:
+        blocks = self.__show(("SystemState", "NFailedUnits", "NNames", "NJobs"))
+        if not blocks:
+            raise CheckSystemdError("The manager properties couldn't be read.")
+        properties = blocks[0]
+
+        logger.debug("Properties of the manager: %s", properties)
+
+        return Source.ManagerCounters(
+            system_state=properties["SystemState"],
+            n_failed_units=int(properties["NFailedUnits"]),
+            n_names=int(properties["NNames"]),
+            n_jobs=int(properties["NJobs"]),
         )
 
-    @property
-    def _all_units(self) -> Generator[Source.Unit, None, None]:
+    def _list_units(
+        self, selection: Source.Selection
+    ) -> Generator[Source.Unit, None, None]:
         command = ["systemctl", "list-units", "--all"]
+        if selection.types:
+            command.append("--type={}".format(",".join(selection.types)))
+        if selection.states:
+            command.append("--state={}".format(",".join(selection.states)))
         if self._user:
             command += ["--user"]
-        stdout = CliSource.__execute_cli(command)
-        if stdout:
-            table_parser = self.Table(stdout)
-            table_parser.check_header(("unit", "active", "sub", "load"))
-            for row in table_parser.list_rows():
+        command += selection.patterns
+        lines, is_json = self.__list(command)
+        if is_json:
+            for row in CliSource.decode_rows(lines):
                 yield self.Unit(
                     name=row["unit"],
                     active_state=row["active"],
                     sub_state=row["sub"],
                     load_state=row["load"],
                 )
+        else:
+            for name, active_state, sub_state, load_state in CliSource.Table.stream(
+                lines, "unit", "active", "sub", "load"
+            ):
+                yield self.Unit(
+                    name=name,
+                    active_state=active_state,
+                    sub_state=sub_state,
+                    load_state=load_state,
+                )
 
     @property
-    def startup_time(self) -> float | None:
+    def _startup_time(self) -> float | None:
         stdout = None
         try:
-            stdout = CliSource.__execute_cli(["systemd-analyze"])
+            stdout = CliSource.execute_cli(["systemd-analyze"])
         except CheckError:
             pass
 
@@ -1014,7 +2354,7 @@ class CliSource(Source):
     @property
     def _all_timers(self) -> list[Source.Timer]:
         """https://github.com/systemd/systemd/blob/e0270bab43a4c37028ee32ae853037df22999767/src/systemctl/systemctl-list-units.c#L641-L689"""
-        stdout = CliSource.__execute_cli(["systemctl", "list-timers", "--all"])
+        lines, is_json = self.__list(["systemctl", "list-timers", "--all"])
 
         # NEXT                          LEFT
         # Sat 2020-05-16 15:11:15 CEST  34min left
@@ -1025,33 +2365,40 @@ class CliSource(Source):
         # UNIT             ACTIVATES
         # apt-daily.timer  apt-daily.service
         timers: list[Source.Timer] = []
-        if stdout:
-            table_parser = CliSource.Table(stdout)
-            table_parser.check_header(("unit", "left", "passed"))
-
-            for row in table_parser.list_rows():
-                name = row["unit"]
-
+        if is_json:
+            now = time.time()
+            for row in CliSource.decode_rows(lines):
+                timers.append(
+                    Source.Timer(
+                        name=row["unit"],
+                        next=CliSource.__convert_usec(row["next"], now),
+                        last=CliSource.__convert_usec(row["last"], now),
+                    )
+                )
+        else:
+            for name, left, passed in CliSource.Table.stream(
+                lines, "unit", "left", "passed"
+            ):
                 next: Optional[int] = None
                 last: Optional[int] = None
 
                 def convert(value: str) -> int:
                     return int(CliSource.__convert_to_sec(value))
 
-                if row["left"] != "n/a":
-                    next = convert(row["left"])
-                if row["passed"] != "n/a":
-                    last = convert(row["passed"])
+                if left != "n/a":
+                    next = convert(left)
+                if passed != "n/a":
+                    last = convert(passed)
 
                 timers.append(Source.Timer(name=name, next=next, last=last))
         return timers
 
 
-class GiSource(CliSource):
+class DbusSource(Source):
     """
-    Data source via D-Bus using the ``gi`` (GObject introspection) package.
-
-    TODO Intherit from DataSource if the full Dbus Api is implemented
+    Base class of the data sources that use the systemd D-Bus API. The
+    subclasses only differ in the :class:`DbusSource.Connection` they use to
+    talk to the bus.
 
     This class holds the main entry point object of the D-Bus systemd API. See
     the section `The Manager Object
@@ -1059,30 +2406,42 @@ class GiSource(CliSource):
     in the systemd D-Bus API.
     """
 
+    # The connection to the bus is created lazily and its calls are not
+    # thread safe.
+    concurrent = False
+
     class UnitTuple(NamedTuple):
         name: str
         """The primary unit name as string, for example ``dbus.service``"""
 
         description: str
-        """The human readable description string, for example ``D-Bus System Message Bus``"""
+        """The human readable description string, for example
+        ``D-Bus System Message Bus``"""
 
         load_state: LoadState
-        """The load state (i.e. whether the unit file has been loaded successfully), for example ``loaded``"""
+        """The load state (i.e. whether the unit file has been loaded successfully), for
+        example ``loaded``"""
 
         active_state: ActiveState
-        """The active state (i.e. whether the unit is currently started or not), for example ``active``"""
+        """The active state (i.e. whether the unit is currently started or not), for
+        example ``active``"""
 
         sub_state: SubState
-        """The sub state (a more fine-grained version of the active state that is specific to the unit type, which the active state is not), for example ``running``"""
+        """The sub state (a more fine-grained version of the active state that is
+        specific to the unit type, which the active state is not), for example
+        ``running``"""
 
         followed_by: str
-        """A unit that is being followed in its state by this unit, if there is any, otherwise the empty string, for example ``''``"""
+        """A unit that is being followed in its state by this unit, if there is any,
+        otherwise the empty string, for example ``''``"""
 
         unit_object_path: str
-        """The unit object path, for example ``/org/freedesktop/systemd1/unit/dbus_2eservice``"""
+        """The unit object path, for example
+        ``/org/freedesktop/systemd1/unit/dbus_2eservice``"""
 
         job_id: str
-        """If there is a job queued for the job unit, the numeric job id, 0 otherwise, for example ``0``"""
+        """If there is a job queued for the job unit, the numeric job id, 0 otherwise,
+        for example ``0``"""
 
         job_type: str
         """The job type as string, for example ``''``"""
@@ -1090,53 +2449,149 @@ class GiSource(CliSource):
         job_object_path: str
         """The job object path, for example ``/``"""
 
+    class Connection:
+        """A connection to the system or the session bus. The subclasses
+        implement :meth:`call`. Properties are read with
+        ``org.freedesktop.DBus.Properties.Get`` and ``GetAll``."""
+
+        _user: bool
+
+        _timeout: int
+        """The timeout of each call in milliseconds."""
+
+        MAX_PENDING: int = 64
+        """The maximum number of calls of :meth:`get_many` that wait for their
+        reply at the same time. The dbus-daemon of the system bus rejects more
+        than 128 pending replies per connection (``max_replies_per_connection``)
+        with ``LimitsExceeded``."""
+
+        def __init__(self, user: bool = False, timeout: int = 10_000) -> None:
+            self._user = user
+            self._timeout = timeout
+
+        @abstractmethod
+        def call(
+            self,
+            object_path: str,
+            interface_name: str,
+            method: str,
+            signature: str | None = None,
+            *args: Any,
+        ) -> tuple[Any, ...]:
+            """Call a method of ``org.freedesktop.systemd1`` and wait for the
+            reply.
+
+            :param object_path: for example ``/org/freedesktop/systemd1``
+            :param interface_name: for example
+              ``org.freedesktop.systemd1.Manager``
+            :param method: for example ``GetUnit``
+            :param signature: The signature of the arguments, for example
+              ``(s)``.
+            :param args: The arguments of the method.
+
+            :return: The unpacked output arguments as a tuple.
+            """
+            ...
+
+        def get(self, object_path: str, interface_name: str, name: str) -> Any:
+            """Read one property."""
+            return self.call(
+                object_path,
+                "org.freedesktop.DBus.Properties",
+                "Get",
+                "(ss)",
+                interface_name,
+                name,
+            )[0]
+
+        def get_all(self, object_path: str, interface_name: str) -> dict[str, Any]:
+            """Read all properties of an interface in one call."""
+            return self.call(
+                object_path,
+                "org.freedesktop.DBus.Properties",
+                "GetAll",
+                "(s)",
+                interface_name,
+            )[0]
+
+        def get_many(
+            self, requests: Sequence[tuple[str, str, str]]
+        ) -> list[Any | None]:
+            """Read properties of many objects. The subclasses send up to
+            :attr:`MAX_PENDING` ``Get`` calls at once and collect the replies
+            afterwards, so reading the properties of hundreds of objects costs
+            only a few round trips.
+
+            :param requests: A list of tuples of an object path, an interface
+              name and a property name, for example
+              ``('/org/freedesktop/systemd1/unit/apt_2ddaily_2etimer',
+              'org.freedesktop.systemd1.Timer', 'NextElapseUSecMonotonic')``
+
+            :return: The values in the order of the requests. ``None`` if a
+              property couldn’t be read, for example because the unit was
+              unloaded in the meantime.
+            """
+            values: list[Any | None] = []
+            for object_path, interface_name, name in requests:
+                try:
+                    values.append(self.get(object_path, interface_name, name))
+                except Exception as e:  # noqa: BLE001
+                    self._log_get_error(object_path, interface_name, name, e)
+                    values.append(None)
+            return values
+
+        @staticmethod
+        def _log_get_error(
+            object_path: str, interface_name: str, name: str, error: Exception
+        ) -> None:
+            logger.info(
+                "Failed to get property '%s' from object path %s of interface %s: %s",
+                name,
+                object_path,
+                interface_name,
+                error,
+            )
+
     class Proxy:
+        """An object of the systemd D-Bus API with one interface. The
+        properties are read and the methods are called over a shared
+        :class:`DbusSource.Connection`."""
+
+        _connection: DbusSource.Connection
         _object_path: str
         _interface_name: str
-        _user: bool = False
-        __proxy: Optional[DBusProxy] = None
 
         def __init__(
-            self, object_path: str, interface_name: str, user: bool = False
+            self,
+            connection: DbusSource.Connection,
+            object_path: str,
+            interface_name: str,
         ) -> None:
+            self._connection = connection
             self._object_path = object_path
             self._interface_name = interface_name
-            self._user = user
 
-        @property
-        def _bus_type(self) -> BusType:
-            if not BusType is not None:
-                raise Exception("The package PyGObject (gi) is not available.")
-            return BusType.SESSION if self._user else BusType.SYSTEM
+        def _call(self, method: str, signature: str | None = None, *args: Any) -> Any:
+            """Call a method of the interface and return its first output
+            argument."""
+            return self._connection.call(
+                self._object_path, self._interface_name, method, signature, *args
+            )[0]
 
-        @property
-        def _proxy(self) -> DBusProxy:
-            if self.__proxy is None:
-                if DBusProxy is None or DBusProxyFlags is None:
-                    raise Exception("The package PyGObject (gi) is not available.")
-                self.__proxy = DBusProxy.new_for_bus_sync(
-                    self._bus_type,
-                    DBusProxyFlags.NONE,
-                    None,
-                    "org.freedesktop.systemd1",
-                    self._object_path,
-                    self._interface_name,
-                    None,
-                )
-            return self.__proxy
+        def get_all(self) -> dict[str, Any]:
+            """Read all properties of the interface in one call."""
+            return self._connection.get_all(self._object_path, self._interface_name)
 
         def get(self, name: str) -> Any:
-            variant = self._proxy.get_cached_property(name)
-            if variant is not None:
-                value = variant.unpack()
-                logger.verbose(
-                    "Get property '%s' from object path %s of interface %s: %s",
-                    name,
-                    self._object_path,
-                    self._interface_name,
-                    value,
-                )
-                return value
+            value = self._connection.get(self._object_path, self._interface_name, name)
+            logger.verbose(
+                "Get property '%s' from object path %s of interface %s: %s",
+                name,
+                self._object_path,
+                self._interface_name,
+                value,
+            )
+            return value
 
         @property
         def object_path(self) -> str:
@@ -1147,39 +2602,73 @@ class GiSource(CliSource):
             return self._interface_name
 
     class ManagerProxy(Proxy):
-        def __init__(self, user: bool = False) -> None:
+        def __init__(self, connection: DbusSource.Connection) -> None:
             super().__init__(
-                "/org/freedesktop/systemd1", "org.freedesktop.systemd1.Manager", user
+                connection,
+                "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager",
             )
 
         @property
         def default_target(self) -> str:
-            return self._proxy.GetDefaultTarget()  # type: ignore
+            return self._call("GetDefaultTarget")
 
         @property
         def userspace_timestamp_monotonic(self) -> int:
             return self.get("UserspaceTimestampMonotonic")
 
         def get_object_path(self, name: str) -> str:
-            return self._proxy.GetUnit("(s)", name)  # type: ignore
-            # return self._proxy.call_sync('GetUnit', Variant('(s)', name), DBusCallFlags.NONE, -1, None)
+            return self._call("GetUnit", "(s)", name)
+
+        def load_unit(self, name: str) -> str:
+            """Load a unit if it isn’t loaded yet (unlike ``GetUnit``) and
+            return its object path."""
+            return self._call("LoadUnit", "(s)", name)
+
+        @property
+        def units(self) -> list[DbusSource.UnitTuple]:
+            return self._call("ListUnits")
+
+        def list_units_by_patterns(
+            self, states: Sequence[str], patterns: Sequence[str]
+        ) -> list[DbusSource.UnitTuple]:
+            return self._call("ListUnitsByPatterns", "(asas)", states, patterns)
+
+        def list_units_by_names(
+            self, names: Sequence[str]
+        ) -> list[DbusSource.UnitTuple]:
+            """List the given units. Units that aren’t loaded yet are loaded
+            (like ``LoadUnit``)."""
+            return self._call("ListUnitsByNames", "(as)", names)
 
         @property
-        def units(self) -> list[GiSource.UnitTuple]:
-            return self._proxy.ListUnits()  # type: ignore
+        def system_state(self) -> str:
+            return self.get("SystemState")
+
+        @property
+        def n_failed_units(self) -> int:
+            return self.get("NFailedUnits")
+
+        @property
+        def n_names(self) -> int:
+            return self.get("NNames")
+
+        @property
+        def n_jobs(self) -> int:
+            return self.get("NJobs")
 
     class UnitProxy(Proxy):
         def __init__(
             self,
+            connection: DbusSource.Connection,
             name: Optional[str] = None,
             object_path: Optional[str] = None,
-            user: bool = False,
         ) -> None:
             if not object_path and name:
-                object_path = GiSource.get_manager(user).get_object_path(name)
+                object_path = DbusSource.ManagerProxy(connection).get_object_path(name)
             if not object_path:
                 raise ValueError("Either name or object_path must be set.")
-            super().__init__(object_path, "org.freedesktop.systemd1.Unit", user)
+            super().__init__(connection, object_path, "org.freedesktop.systemd1.Unit")
 
         @property
         def active_state(self) -> str:
@@ -1197,47 +2686,59 @@ class GiSource(CliSource):
         def active_enter_timestamp_monotonic(self) -> int:
             return self.get("ActiveEnterTimestampMonotonic")
 
-    class TimerProxy(UnitProxy):
-        __timer_proxy: Optional[GiSource.Proxy] = None
-
-        @property
-        def _timer_proxy(self) -> GiSource.Proxy:
-            if not self.__timer_proxy:
-                self.__timer_proxy = GiSource.Proxy(
-                    self._object_path, "org.freedesktop.systemd1.Timer", self._user
-                )
-            return self.__timer_proxy
-
-        @property
-        def last(self) -> int:
-            """Timestamp in microseconds"""
-            return self._timer_proxy.get("LastTriggerUSecMonotonic")
+    @staticmethod
+    def split_signature(signature: str) -> list[str]:
+        """Split a signature into its complete types.
 
-        @property
-        def next(self) -> int:
-            """Timestamp in microseconds"""
-            return self._timer_proxy.get("NextElapseUSecMonotonic")
+        :param signature: for example ``sa{sv}(ii)``
 
-    __system_manager: Optional[ManagerProxy] = None
-    __user_manager: Optional[ManagerProxy] = None
+        :return: for example ``['s', 'a{sv}', '(ii)']``
+        """
+        types: list[str] = []
+        start = 0
+        while start < len(signature):
+            end = start
+            while signature[end] == "a":
+                end += 1
+            if signature[end] in "({":
+                depth = 0
+                for index in range(end, len(signature)):
+                    if signature[index] in "({":
+                        depth += 1
+                    elif signature[index] in ")}":
+                        depth -= 1
+                    if depth == 0:
+                        break
+                end = index
+            types.append(signature[start : end + 1])
+            start = end + 1
+        return types
+
+    __unit_tuples: list[DbusSource.UnitTuple] | None = None
+    """The result of ``ListUnits`` if all units were listed in this run."""
+
+    __connection: DbusSource.Connection | None = None
 
-    @classmethod
-    def get_manager(cls, user: bool = False) -> ManagerProxy:
-        if user:
-            if not cls.__user_manager:
-                cls.__user_manager = cls.ManagerProxy(user)
-            return cls.__user_manager
-        else:
-            if not cls.__system_manager:
-                cls.__system_manager = cls.ManagerProxy(user)
-            return cls.__system_manager
+    @property
+    def connection(self) -> DbusSource.Connection:
+        """The connection to the session bus (``--user``) or to the system
+        bus."""
+        if self.__connection is None:
+            self.__connection = self.Connection(self._user)  # type: ignore
+        return self.__connection
+
+    def set_connection(self, connection: DbusSource.Connection) -> None:
+        """Use an existing connection, for example the long-lived connection
+        of the :class:`Daemon`, instead of opening a new one."""
+        self.__connection = connection
 
     @property
     def manager(self) -> ManagerProxy:
-        return self.get_manager(self._user)
+        return DbusSource.ManagerProxy(self.connection)
 
-    @property
-    def _all_units(self) -> Generator[Source.Unit, None, None]:
+    def __convert_units(
+        self, unit_tuples: list[DbusSource.UnitTuple]
+    ) -> Generator[Source.Unit, None, None]:
         for (
             name,
             _,
@@ -1249,7 +2750,7 @@ class GiSource(CliSource):
             _,
             _,
             _,
-        ) in self.manager.units:
+        ) in unit_tuples:
             yield self.Unit(
                 name=name,
                 active_state=active_state,
@@ -1257,56 +2758,1775 @@ class GiSource(CliSource):
                 load_state=load_state,
             )
 
+    def _list_units(
+        self, selection: Source.Selection
+    ) -> Generator[Source.Unit, None, None]:
+        patterns = list(selection.patterns)
+        if not patterns and selection.types:
+            # ListUnitsByPatterns has no argument for the unit types.
+            patterns = [f"*.{unit_type}" for unit_type in selection.types]
+        if patterns or selection.states:
+            return self.__convert_units(
+                self.manager.list_units_by_patterns(list(selection.states), patterns)
+            )
+        self.__unit_tuples = self.manager.units
+        return self.__convert_units(self.__unit_tuples)
+
+    def _get_unit(self, name: str) -> Source.Unit:
+        try:
+            properties = DbusSource.UnitProxy(
+                self.connection, object_path=self.manager.load_unit(name)
+            ).get_all()
+        except Exception as e:
+            logger.info("Failed to load unit '%s': %s", name, e)
+            raise CheckSystemdError(f"The unit '{name}' couldn't be found.") from e
+
+        logger.debug("Properties of unit '%s': %s", name, properties)
+
+        return Source.Unit(
+            name=properties["Id"],
+            active_state=properties["ActiveState"],
+            sub_state=properties["SubState"],
+            load_state=properties["LoadState"],
+        )
+
+    def _get_units(self, names: Sequence[str]) -> list[Source.Unit]:
+        if len(names) == 1:
+            # LoadUnit validates the name of a single unit.
+            return [self._get_unit(names[0])]
+        try:
+            units = list(
+                self.__convert_units(self.manager.list_units_by_names(list(names)))
+            )
+        except Exception as e:  # noqa: BLE001
+            logger.info("Failed to list the units %s: %s", names, e)
+            units = []
+        if len(units) != len(names):
+            raise CheckSystemdError(
+                "The units '{}' couldn't be found.".format("', '".join(names))
+            )
+        for unit in units:
+            logger.debug("Properties of unit '%s': %s", unit.name, unit)
+        return units
+
+    @property
+    def _manager_counters(self) -> Source.ManagerCounters:
+        manager = self.manager
+        return Source.ManagerCounters(
+            system_state=manager.system_state,
+            n_failed_units=manager.n_failed_units,
+            n_names=manager.n_names,
+            n_jobs=manager.n_jobs,
+        )
+
+    @property
+    def _startup_time(self) -> float | None:
+        """`src/analyze/analyze-time-data.c <https://github.com/systemd/systemd/blob/1f901c24530fb9b111126381a6ea101af8040e65/src/analyze/analyze-time-data.c#L141-L197>`"""
+        unit = DbusSource.UnitProxy(self.connection, self.manager.default_target)
+        # ... ActiveEnterTimestamp,
+        # ActiveEnterTimestampMonotonic ... contain
+        # CLOCK_REALTIME and CLOCK_MONOTONIC 64-bit microsecond timestamps of
+        # the last time a unit left the inactive state, entered the active
+        # state, .... The fields are 0 in case
+        # such a transition has not yet been recorded on this boot.
+
+        enter_timestamp = unit.active_enter_timestamp_monotonic
+        if not enter_timestamp:
+            return None
+        return self._round_1(
+            (enter_timestamp - self.manager.userspace_timestamp_monotonic) / 1_000_000
+        )
+
+    @property
+    def _all_timers(self) -> list[Source.Timer]:
+        if self.__unit_tuples is not None:
+            # Reuse the units already listed in this run.
+            unit_tuples = [
+                unit for unit in self.__unit_tuples if unit[0].endswith(".timer")
+            ]
+        else:
+            unit_tuples = self.manager.list_units_by_patterns([], ["*.timer"])
+        timer_tuples = [DbusSource.UnitTuple(*unit) for unit in unit_tuples]
+        return self.get_timers(
+            [(unit.name, unit.unit_object_path) for unit in timer_tuples]
+        )
+
+    def get_timers(self, units: Sequence[tuple[str, str]]) -> list[Source.Timer]:
+        """Read the timestamps of the given timers.
+
+        :param units: The names and the object paths of the timers.
+
+        :raises CheckSystemdError: If the timestamps of a timer couldn’t be
+          read, so that the timer isn’t missing silently from the evaluation.
+        """
+        requests: list[tuple[str, str, str]] = []
+        for _, object_path in units:
+            for name in ("LastTriggerUSecMonotonic", "NextElapseUSecMonotonic"):
+                requests.append((object_path, "org.freedesktop.systemd1.Timer", name))
+        values = self.connection.get_many(requests)
+
+        timers: list[Source.Timer] = []
+        unreadable: list[str] = []
+        for index, (unit_name, _) in enumerate(units):
+            last_usec, next_usec = values[2 * index], values[2 * index + 1]
+            if last_usec is None or next_usec is None:
+                unreadable.append(unit_name)
+                continue
+            last: int | None = None
+            next: int | None = None
+            if last_usec > 0:
+                last = self._usec_to_sec(last_usec)
+                next = self._usec_to_sec(next_usec)
+            timers.append(Source.Timer(name=unit_name, next=next, last=last))
+        if unreadable:
+            raise CheckSystemdError(
+                "The timestamps of the timers '{}' couldn't be read.".format(
+                    "', '".join(unreadable)
+                )
+            )
+        return timers
+
+
+class GiSource(DbusSource):
+    """
+    Data source via D-Bus using the ``gi`` (GObject introspection) package.
+    """
+
+    data_source = "dbus"
+
+    def __init__(self) -> None:
+        super().__init__()
+        import_gi()
+
+    class Connection(DbusSource.Connection):
+        """A thin layer over the one shared ``Gio.DBusConnection`` of a bus.
+
+        Unlike a ``Gio.DBusProxy`` no properties are loaded in advance and no
+        ``PropertiesChanged`` signals are subscribed."""
+
+        __connection: Any = None
+
+        __proxies: dict[tuple[str, str], DBusProxy]
+
+        use_dbus_proxy: bool = False
+        """Use a ``Gio.DBusProxy`` per object as in former versions, for
+        example to compare the performance."""
+
+        def __init__(self, user: bool = False, timeout: int = 10_000) -> None:
+            super().__init__(user, timeout)
+            self.__proxies = {}
+
+        @property
+        def _bus_type(self) -> BusType:
+            if not import_gi():
+                raise Exception("The package PyGObject (gi) is not available.")
+            return BusType.SESSION if self._user else BusType.SYSTEM
+
+        @property
+        def _connection(self) -> Any:
+            if self.__connection is None:
+                self.__connection = bus_get_sync(self._bus_type, None)
+            return self.__connection
+
+        def _get_proxy(self, object_path: str, interface_name: str) -> DBusProxy:
+            key = (object_path, interface_name)
+            if key not in self.__proxies:
+                self.__proxies[key] = DBusProxy.new_for_bus_sync(
+                    self._bus_type,
+                    DBusProxyFlags.NONE,
+                    None,
+                    "org.freedesktop.systemd1",
+                    object_path,
+                    interface_name,
+                    None,
+                )
+            return self.__proxies[key]
+
+        def call(
+            self,
+            object_path: str,
+            interface_name: str,
+            method: str,
+            signature: str | None = None,
+            *args: Any,
+        ) -> tuple[Any, ...]:
+            logger.verbose(
+                "Call method '%s' of interface %s on object path %s: %s",
+                method,
+                interface_name,
+                object_path,
+                args,
+            )
+            parameters = Variant(signature, args) if signature is not None else None
+            if self.use_dbus_proxy:
+                reply = self._get_proxy(object_path, interface_name).call_sync(
+                    method, parameters, DBusCallFlags.NONE, self._timeout, None
+                )
+            else:
+                reply = self._connection.call_sync(
+                    "org.freedesktop.systemd1",
+                    object_path,
+                    interface_name,
+                    method,
+                    parameters,
+                    None,
+                    DBusCallFlags.NONE,
+                    self._timeout,
+                    None,
+                )
+            return reply.unpack()
+
+        def get(self, object_path: str, interface_name: str, name: str) -> Any:
+            if self.use_dbus_proxy:
+                variant = self._get_proxy(
+                    object_path, interface_name
+                ).get_cached_property(name)
+                return variant.unpack() if variant is not None else None
+            return super().get(object_path, interface_name, name)
+
+        def get_all(self, object_path: str, interface_name: str) -> dict[str, Any]:
+            if self.use_dbus_proxy:
+                proxy = self._get_proxy(object_path, interface_name)
+                return {
+                    name: proxy.get_cached_property(name).unpack()
+                    for name in proxy.get_cached_property_names()
+                }
+            return super().get_all(object_path, interface_name)
+
+        def get_many(
+            self, requests: Sequence[tuple[str, str, str]]
+        ) -> list[Any | None]:
+            """Send asynchronous ``Get`` calls and collect the replies in one
+            pass of a private main loop. Every reply sends the next call, so
+            that at most :attr:`MAX_PENDING` calls are pending."""
+            if self.use_dbus_proxy:
+                return super().get_many(requests)
+            values: list[Any | None] = [None] * len(requests)
+            if not requests:
+                return values
+            pending = 0
+            sent = 0
+            context = MainContext.new()
+            # The callbacks are dispatched in the thread-default main context
+            # of the calls.
+            context.push_thread_default()
+            try:
+
+                def send() -> None:
+                    nonlocal pending, sent
+                    object_path, interface_name, name = requests[sent]
+                    self._connection.call(
+                        "org.freedesktop.systemd1",
+                        object_path,
+                        "org.freedesktop.DBus.Properties",
+                        "Get",
+                        Variant("(ss)", (interface_name, name)),
+                        VariantType("(v)"),
+                        DBusCallFlags.NONE,
+                        self._timeout,
+                        None,
+                        on_reply,
+                        sent,
+                    )
+                    pending += 1
+                    sent += 1
+
+                def on_reply(connection: Any, result: Any, index: int) -> None:
+                    nonlocal pending
+                    pending -= 1
+                    try:
+                        values[index] = connection.call_finish(result).unpack()[0]
+                    except Exception as e:  # noqa: BLE001
+                        self._log_get_error(*requests[index], e)
+                    if sent < len(requests):
+                        send()
+
+                while sent < min(len(requests), self.MAX_PENDING):
+                    send()
+                while pending > 0:
+                    context.iteration(True)
+            finally:
+                context.pop_thread_default()
+            logger.verbose("Get %s properties: %s", len(requests), values)
+            return values
+
+
+class WireSource(DbusSource):
+    """
+    Data source via D-Bus without any native dependency. The D-Bus `wire
+    protocol
+    <https://dbus.freedesktop.org/doc/dbus-specification.html#message-protocol>`_
+    is spoken directly over the unix socket of the bus. Only the types and
+    calls the plugin needs are implemented.
+    """
+
+    data_source = "wire"
+
+    _ALIGNMENTS: ClassVar[dict[str, int]] = {
+        "y": 1,
+        "b": 4,
+        "n": 2,
+        "q": 2,
+        "i": 4,
+        "u": 4,
+        "x": 8,
+        "t": 8,
+        "d": 8,
+        "h": 4,
+        "s": 4,
+        "o": 4,
+        "g": 1,
+        "a": 4,
+        "(": 8,
+        "{": 8,
+        "v": 1,
+    }
+
+    _FORMATS: ClassVar[dict[str, str]] = {
+        "y": "B",
+        "b": "I",
+        "n": "h",
+        "q": "H",
+        "i": "i",
+        "u": "I",
+        "x": "q",
+        "t": "Q",
+        "d": "d",
+        "h": "I",
+    }
+    """The ``struct`` formats of the fixed size types."""
+
+    @staticmethod
+    def get_alignment(type: str) -> int:
+        return WireSource._ALIGNMENTS[type[0]]
+
+    class Marshaller:
+        """Marshal values into the little endian wire format."""
+
+        buffer: bytearray
+
+        __pack: Callable[..., bytes]
+
+        __pack_into: Callable[..., None]
+
+        def __init__(self) -> None:
+            import struct
+
+            self.buffer = bytearray()
+            self.__pack = struct.pack
+            self.__pack_into = struct.pack_into
+
+        def align(self, alignment: int) -> None:
+            self.buffer += b"\0" * (-len(self.buffer) % alignment)
+
+        def write(self, signature: str, *values: Any) -> WireSource.Marshaller:
+            """
+            :param signature: for example ``ss``
+            :param values: One value for each complete type of the signature.
+              Structures are tuples, dictionaries are dicts and variants
+              are tuples of a signature and a value.
+            """
+            for type, value in zip(WireSource.split_signature(signature), values):
+                self.__write(type, value)
+            return self
+
+        def __write(self, type: str, value: Any) -> None:
+            code = type[0]
+            self.align(WireSource.get_alignment(type))
+            if code in WireSource._FORMATS:
+                self.buffer += self.__pack("<" + WireSource._FORMATS[code], value)
+            elif code in "so":
+                encoded = value.encode()
+                self.buffer += self.__pack("<I", len(encoded)) + encoded + b"\0"
+            elif code == "g":
+                self.buffer += self.__pack("<B", len(value)) + value.encode() + b"\0"
+            elif code == "v":
+                signature, inner = value
+                self.__write("g", signature)
+                self.__write(signature, inner)
+            elif code == "a":
+                length_offset = len(self.buffer)
+                self.buffer += b"\0\0\0\0"
+                self.align(WireSource.get_alignment(type[1:]))
+                start = len(self.buffer)
+                for item in value.items() if type[1] == "{" else value:
+                    self.__write(type[1:], item)
+                self.__pack_into(
+                    "<I", self.buffer, length_offset, len(self.buffer) - start
+                )
+            elif code in "({":
+                for inner_type, inner in zip(
+                    WireSource.split_signature(type[1:-1]), value
+                ):
+                    self.__write(inner_type, inner)
+            else:
+                raise ValueError(f"Unsupported D-Bus type: {type}")
+
+    class Unmarshaller:
+        """Unmarshal values from the wire format. The offsets are relative to
+        the start of the message, because the alignment is."""
+
+        __data: bytes
+        offset: int
+        __byte_order: str
+        __unpack_from: Callable[..., tuple[Any, ...]]
+        __calcsize: Callable[[str], int]
+
+        def __init__(self, data: bytes, offset: int = 0, byte_order: str = "<") -> None:
+            import struct
+
+            self.__data = data
+            self.offset = offset
+            self.__byte_order = byte_order
+            self.__unpack_from = struct.unpack_from
+            self.__calcsize = struct.calcsize
+
+        def read(self, signature: str) -> tuple[Any, ...]:
+            """Read one value for each complete type of the signature."""
+            return tuple(
+                self.__read(type) for type in WireSource.split_signature(signature)
+            )
+
+        def __read(self, type: str) -> Any:
+            code = type[0]
+            self.offset += -self.offset % WireSource.get_alignment(type)
+            if code in WireSource._FORMATS:
+                format = self.__byte_order + WireSource._FORMATS[code]
+                (value,) = self.__unpack_from(format, self.__data, self.offset)
+                self.offset += self.__calcsize(format)
+                return bool(value) if code == "b" else value
+            if code in "sog":
+                length = self.__read("y" if code == "g" else "u")
+                value = self.__data[self.offset : self.offset + length].decode()
+                self.offset += length + 1
+                return value
+            if code == "v":
+                return self.__read(self.__read("g"))
+            if code == "a":
+                end = self.__read("u")
+                self.offset += -self.offset % WireSource.get_alignment(type[1:])
+                end += self.offset
+                items: list[Any] = []
+                while self.offset < end:
+                    items.append(self.__read(type[1:]))
+                return dict(items) if type[1] == "{" else items
+            if code in "({":
+                return tuple(
+                    self.__read(inner_type)
+                    for inner_type in WireSource.split_signature(type[1:-1])
+                )
+            raise ValueError(f"Unsupported D-Bus type: {type}")
+
+    class Message(NamedTuple):
+        type: int
+        """``1`` method call, ``2`` method return, ``3`` error, ``4`` signal"""
+
+        serial: int
+
+        fields: dict[int, Any]
+        """The header fields by their codes, for example ``5`` for
+        ``REPLY_SERIAL``."""
+
+        body: tuple[Any, ...]
+
+    class Connection(DbusSource.Connection):
+        """A connection to a bus over a unix socket, authenticated with the
+        ``EXTERNAL`` mechanism (the user ID of the process)."""
+
+        __socket: socket.socket | None = None
+
+        __buffer: bytearray
+
+        __serial: int = 0
+
+        __signals: list[WireSource.Message]
+        """The signals received while waiting for replies, for example
+        ``NameAcquired`` after ``Hello``. See :meth:`pop_signals`."""
+
+        __unpack_from: Callable[..., tuple[Any, ...]]
+
+        def __init__(self, user: bool = False, timeout: int = 10_000) -> None:
+            import struct
+
+            super().__init__(user, timeout)
+            self.__buffer = bytearray()
+            self.__signals = []
+            self.__unpack_from = struct.unpack_from
+
+        @staticmethod
+        def get_address(user: bool = False) -> str:
+            """
+            :return: for example ``unix:path=/run/dbus/system_bus_socket``
+            """
+            if user:
+                return os.environ.get(
+                    "DBUS_SESSION_BUS_ADDRESS",
+                    "unix:path={}/bus".format(
+                        os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+                    ),
+                )
+            return os.environ.get(
+                "DBUS_SYSTEM_BUS_ADDRESS", "unix:path=/run/dbus/system_bus_socket"
+            )
+
+        def __connect(self, address: str) -> socket.socket:
+            import socket
+            from urllib.parse import unquote
+
+            errors: list[str] = []
+            for entry in address.split(";"):
+                transport, _, parameters = entry.partition(":")
+                if transport != "unix":
+                    continue
+                keys = dict(
+                    parameter.split("=", 1)
+                    for parameter in parameters.split(",")
+                    if "=" in parameter
+                )
+                if "path" in keys:
+                    path = unquote(keys["path"])
+                elif "abstract" in keys:
+                    path = "\0" + unquote(keys["abstract"])
+                else:
+                    continue
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self._timeout / 1000)
+                try:
+                    sock.connect(path)
+                    return sock
+                except OSError as e:
+                    sock.close()
+                    errors.append(str(e))
+            raise CheckSystemdError(
+                "Couldn't connect to the D-Bus address '{}': {}".format(
+                    address, ", ".join(errors)
+                )
+            )
+
+        def __receive_exactly(self, size: int) -> bytes:
+            while len(self.__buffer) < size:
+                chunk = self._socket.recv(65536)
+                if not chunk:
+                    raise CheckSystemdError("The D-Bus connection was closed.")
+                self.__buffer += chunk
+            data = bytes(self.__buffer[:size])
+            del self.__buffer[:size]
+            return data
+
+        def __authenticate(self, sock: socket.socket) -> None:
+            uid = str(os.getuid()).encode().hex()
+            sock.sendall(b"\0AUTH EXTERNAL " + uid.encode() + b"\r\n")
+            line = b""
+            while not line.endswith(b"\r\n"):
+                chunk = sock.recv(1)
+                if not chunk:
+                    break
+                line += chunk
+            if not line.startswith(b"OK "):
+                raise CheckSystemdError(
+                    f"The D-Bus authentication failed: {line.decode().strip()}"
+                )
+            sock.sendall(b"BEGIN\r\n")
+
+        @property
+        def _socket(self) -> socket.socket:
+            if self.__socket is None:
+                sock = self.__connect(self.get_address(self._user))
+                self.__authenticate(sock)
+                self.__socket = sock
+                self.__call(
+                    "org.freedesktop.DBus",
+                    "/org/freedesktop/DBus",
+                    "org.freedesktop.DBus",
+                    "Hello",
+                )
+            return self.__socket
+
+        def __build_message(
+            self,
+            destination: str,
+            object_path: str,
+            interface_name: str,
+            method: str,
+            signature: str | None = None,
+            args: Sequence[Any] = (),
+        ) -> tuple[int, bytes]:
+            """
+            :return: The serial and the marshalled method call.
+            """
+            self.__serial += 1
+            body = WireSource.Marshaller()
+            fields: list[tuple[int, tuple[str, Any]]] = [
+                (1, ("o", object_path)),
+                (2, ("s", interface_name)),
+                (3, ("s", method)),
+                (6, ("s", destination)),
+            ]
+            if signature:
+                # The signature describes the arguments as a structure, but
+                # the body is a sequence of values.
+                signature = signature[1:-1]
+                body.write(signature, *args)
+                fields.append((8, ("g", signature)))
+            header = WireSource.Marshaller().write(
+                "yyyyuua(yv)",
+                ord("l"),
+                1,
+                0,
+                1,
+                len(body.buffer),
+                self.__serial,
+                fields,
+            )
+            header.align(8)
+            return self.__serial, bytes(header.buffer + body.buffer)
+
+        def __receive(self) -> WireSource.Message:
+            fixed = self.__receive_exactly(16)
+            byte_order = "<" if fixed[:1] == b"l" else ">"
+            body_length, serial, fields_length = self.__unpack_from(
+                byte_order + "III", fixed, 4
+            )
+            header_length = 16 + fields_length
+            header_length += -header_length % 8
+            data = fixed + self.__receive_exactly(header_length - 16 + body_length)
+            (fields,) = WireSource.Unmarshaller(data, 12, byte_order).read("a(yv)")
+            fields = dict(fields)
+            body: tuple[Any, ...] = ()
+            if 8 in fields:
+                body = WireSource.Unmarshaller(data, header_length, byte_order).read(
+                    fields[8]
+                )
+            return WireSource.Message(fixed[1], serial, fields, body)
+
+        def __is_complete(self) -> bool:
+            """:return: True if the buffer holds at least one complete
+            message."""
+            if len(self.__buffer) < 16:
+                return False
+            byte_order = "<" if self.__buffer[:1] == b"l" else ">"
+            body_length, _, fields_length = self.__unpack_from(
+                byte_order + "III", self.__buffer, 4
+            )
+            header_length = 16 + fields_length
+            header_length += -header_length % 8
+            return len(self.__buffer) >= header_length + body_length
+
+        def __wait(self, serials: Iterable[int]) -> dict[int, WireSource.Message]:
+            """Receive messages until the replies of all serials are there.
+            Signals are queued for :meth:`pop_signals`."""
+            pending = set(serials)
+            replies: dict[int, WireSource.Message] = {}
+            while pending:
+                message = self.__receive()
+                reply_serial = message.fields.get(5)
+                if message.type in (2, 3) and reply_serial in pending:
+                    pending.remove(reply_serial)
+                    replies[reply_serial] = message
+                elif message.type == 4:
+                    self.__signals.append(message)
+            return replies
+
+        @staticmethod
+        def __check_reply(message: WireSource.Message) -> tuple[Any, ...]:
+            if message.type == 3:
+                raise CheckSystemdError(
+                    "{}: {}".format(
+                        message.fields.get(4), message.body[0] if message.body else ""
+                    )
+                )
+            return message.body
+
+        def __call(
+            self,
+            destination: str,
+            object_path: str,
+            interface_name: str,
+            method: str,
+            signature: str | None = None,
+            args: Sequence[Any] = (),
+        ) -> tuple[Any, ...]:
+            serial, message = self.__build_message(
+                destination, object_path, interface_name, method, signature, args
+            )
+            self._socket.sendall(message)
+            return self.__check_reply(self.__wait((serial,))[serial])
+
+        def call(
+            self,
+            object_path: str,
+            interface_name: str,
+            method: str,
+            signature: str | None = None,
+            *args: Any,
+        ) -> tuple[Any, ...]:
+            logger.verbose(
+                "Call method '%s' of interface %s on object path %s: %s",
+                method,
+                interface_name,
+                object_path,
+                args,
+            )
+            return self.__call(
+                "org.freedesktop.systemd1",
+                object_path,
+                interface_name,
+                method,
+                signature,
+                args,
+            )
+
+        def add_match(self, rule: str) -> None:
+            """Ask the bus to route the signals matching the rule to this
+            connection.
+
+            :param rule: for example
+              ``type='signal',interface='org.freedesktop.systemd1.Manager'``
+            """
+            self.__call(
+                "org.freedesktop.DBus",
+                "/org/freedesktop/DBus",
+                "org.freedesktop.DBus",
+                "AddMatch",
+                "(s)",
+                (rule,),
+            )
+
+        def fileno(self) -> int:
+            """The file descriptor of the socket, so that the connection can
+            be watched with :mod:`selectors`."""
+            return self._socket.fileno()
+
+        def pop_signals(self) -> list[WireSource.Message]:
+            """Remove and return the queued signals and the signals that are
+            complete in the receive buffer. The socket is not read, so a
+            caller waiting with :mod:`selectors` must call this method before
+            it waits: the data of a signal may already be buffered."""
+            while self.__is_complete():
+                message = self.__receive()
+                if message.type == 4:
+                    self.__signals.append(message)
+            signals = self.__signals
+            self.__signals = []
+            return signals
+
+        def receive_signals(self) -> list[WireSource.Message]:
+            """Read once from the socket, which must be readable, and return
+            the signals received so far."""
+            chunk = self._socket.recv(65536)
+            if not chunk:
+                raise CheckSystemdError("The D-Bus connection was closed.")
+            self.__buffer += chunk
+            return self.pop_signals()
+
+        def get_many(
+            self, requests: Sequence[tuple[str, str, str]]
+        ) -> list[Any | None]:
+            """Send the ``Get`` calls in windows of :attr:`MAX_PENDING` calls,
+            each in one write, and collect the replies of a window before the
+            next one is sent."""
+            sock = self._socket
+            values: list[Any | None] = []
+            for start in range(0, len(requests), self.MAX_PENDING):
+                window = requests[start : start + self.MAX_PENDING]
+                serials: list[int] = []
+                messages: list[bytes] = []
+                for object_path, interface_name, name in window:
+                    serial, message = self.__build_message(
+                        "org.freedesktop.systemd1",
+                        object_path,
+                        "org.freedesktop.DBus.Properties",
+                        "Get",
+                        "(ss)",
+                        (interface_name, name),
+                    )
+                    serials.append(serial)
+                    messages.append(message)
+                sock.sendall(b"".join(messages))
+                replies = self.__wait(serials)
+                for request, serial in zip(window, serials):
+                    try:
+                        values.append(self.__check_reply(replies[serial])[0])
+                    except CheckSystemdError as e:
+                        self._log_get_error(*request, e)
+                        values.append(None)
+            logger.verbose("Get %s properties: %s", len(requests), values)
+            return values
+
+
+class BusctlSource(DbusSource):
+    """
+    Data source via D-Bus using the command line client ``busctl`` of systemd.
+    ``busctl --json=short`` prints the replies as JSON, so the data is
+    decoded exactly, independent of the locale and of the layout of the
+    tables ``systemctl`` prints. All units are listed with one subprocess.
+    """
+
+    data_source = "busctl"
+
+    class Connection(DbusSource.Connection):
+        """Each call of a method or each read of the properties of an object
+        spawns one ``busctl`` process."""
+
+        MAX_PROCESSES: int = 8
+        """The maximum number of ``busctl`` processes that
+        :meth:`get_many` runs concurrently."""
+
+        def __get_command(self, verb: str, *args: str) -> list[str]:
+            command = [
+                "busctl",
+                verb,
+                "--json=short",
+                f"--timeout={self._timeout / 1000}",
+            ]
+            if self._user:
+                command.append("--user")
+            return command + ["org.freedesktop.systemd1", *args]
+
+        @staticmethod
+        def format_arguments(signature: str, args: Sequence[Any]) -> list[str]:
+            """Format the arguments of a method call for the command line of
+            ``busctl``.
+
+            :param signature: for example ``asas``
+            :param args: for example ``(['failed'], [])``
+
+            :return: for example ``['1', 'failed', '0']``
+            """
+            arguments: list[str] = []
+            for type, value in zip(DbusSource.split_signature(signature), args):
+                if type == "b":
+                    arguments.append("true" if value else "false")
+                elif type[0] == "a" and type[1] not in "({":
+                    arguments.append(str(len(value)))
+                    arguments += BusctlSource.Connection.format_arguments(
+                        type[1:] * len(value), value
+                    )
+                elif type[0] in "a(v{":
+                    raise ValueError(f"Unsupported D-Bus type: {type}")
+                else:
+                    arguments.append(str(value))
+            return arguments
+
+        @staticmethod
+        def convert(type: str, data: Any) -> Any:
+            """Convert the JSON data of ``busctl`` into the Python types of
+            the other D-Bus sources: structures into tuples and variants into
+            their values.
+
+            :param type: for example ``a{sv}``
+            :param data: for example ``{'Id': {'type': 's', 'data': 'a.service'}}``
+            """
+            if type == "v":
+                return BusctlSource.Connection.convert(data["type"], data["data"])
+            if type.startswith("a{"):
+                value_type = DbusSource.split_signature(type[2:-1])[1]
+                return {
+                    key: BusctlSource.Connection.convert(value_type, value)
+                    for key, value in data.items()
+                }
+            if type[0] == "a":
+                return [
+                    BusctlSource.Connection.convert(type[1:], item) for item in data
+                ]
+            if type[0] == "(":
+                return tuple(
+                    BusctlSource.Connection.convert(inner_type, item)
+                    for inner_type, item in zip(
+                        DbusSource.split_signature(type[1:-1]), data
+                    )
+                )
+            return data
+
+        @staticmethod
+        def __decode_values(stdout: str | None) -> list[Any]:
+            """Decode the output of ``busctl get-property``: one JSON object
+            per property."""
+            values: list[Any] = []
+            if stdout:
+                for line in stdout.splitlines():
+                    if line:
+                        reply = json.loads(line)
+                        values.append(
+                            BusctlSource.Connection.convert(
+                                reply["type"], reply["data"]
+                            )
+                        )
+            return values
+
+        def call(
+            self,
+            object_path: str,
+            interface_name: str,
+            method: str,
+            signature: str | None = None,
+            *args: Any,
+        ) -> tuple[Any, ...]:
+            command = self.__get_command("call", object_path, interface_name, method)
+            if signature:
+                # busctl expects the signature without the enclosing
+                # parentheses of the argument list.
+                command += [signature[1:-1]]
+                command += BusctlSource.Connection.format_arguments(
+                    signature[1:-1], args
+                )
+            stdout = CliSource.execute_cli(command)
+            if not stdout:
+                return ()
+            reply = json.loads(stdout)
+            return tuple(
+                BusctlSource.Connection.convert(type, data)
+                for type, data in zip(
+                    DbusSource.split_signature(reply["type"]), reply["data"]
+                )
+            )
+
+        def get(self, object_path: str, interface_name: str, name: str) -> Any:
+            stdout = CliSource.execute_cli(
+                self.__get_command("get-property", object_path, interface_name, name)
+            )
+            return BusctlSource.Connection.__decode_values(stdout)[0]
+
+        def get_many(
+            self, requests: Sequence[tuple[str, str, str]]
+        ) -> list[Any | None]:
+            """Read all properties of an object with one ``busctl
+            get-property``. The processes of up to :attr:`MAX_PROCESSES`
+            objects run concurrently."""
+            objects: dict[tuple[str, str], list[str]] = {}
+            for object_path, interface_name, name in requests:
+                objects.setdefault((object_path, interface_name), []).append(name)
+            keys = list(objects)
+            properties: dict[tuple[str, str, str], Any] = {}
+            for start in range(0, len(keys), self.MAX_PROCESSES):
+                self.__get_properties(
+                    [
+                        (key, objects[key])
+                        for key in keys[start : start + self.MAX_PROCESSES]
+                    ],
+                    properties,
+                )
+            return [properties.get(request) for request in requests]
+
+        def __get_properties(
+            self,
+            objects: Sequence[tuple[tuple[str, str], list[str]]],
+            properties: dict[tuple[str, str, str], Any],
+        ) -> None:
+            """Run one ``busctl get-property`` per object concurrently.
+
+            :param objects: The object paths and interface names with the
+              names of their properties.
+            :param properties: The values are stored in this dictionary.
+            """
+            processes: list[Any] = []
+            for (object_path, interface_name), names in objects:
+                try:
+                    process = subprocess.Popen(
+                        self.__get_command(
+                            "get-property", object_path, interface_name, *names
+                        ),
+                        stderr=subprocess.PIPE,
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                    )
+                except OSError as e:
+                    raise CheckError(e) from e
+                processes.append(process)
+            for ((object_path, interface_name), names), process in zip(
+                objects, processes
+            ):
+                stdout, stderr = process.communicate()
+                if process.returncode != 0 or stderr:
+                    for name in names:
+                        self._log_get_error(
+                            object_path,
+                            interface_name,
+                            name,
+                            CheckError(stderr.decode("utf-8").strip()),
+                        )
+                    continue
+                values = BusctlSource.Connection.__decode_values(stdout.decode("utf-8"))
+                for name, value in zip(names, values):
+                    properties[(object_path, interface_name, name)] = value
+
+
+class Daemon:
+    """A long-running process (``--daemon``) that keeps the states of all
+    loaded units current and answers the checks over a unix socket. The
+    units are listed only once. Afterwards the signals of the systemd manager
+    (``UnitNew``, ``UnitRemoved``, ``JobRemoved`` and ``Reloading``) and the
+    ``PropertiesChanged`` signals of the units update the states, so a check
+    costs a lookup in memory instead of an enumeration of all units.
+
+    The daemon receives the signals over the D-Bus wire protocol
+    (:class:`WireSource`) and speaks newline-delimited JSON with its clients
+    (:class:`DaemonSource`).
+    """
+
+    TIMEOUT: float = 1.0
+    """The time in seconds the event loop waits before it checks whether it
+    has been stopped."""
+
+    MATCH_RULES: tuple[str, ...] = (
+        (
+            "type='signal',sender='org.freedesktop.systemd1',"
+            "interface='org.freedesktop.systemd1.Manager'"
+        ),
+        (
+            "type='signal',sender='org.freedesktop.systemd1',"
+            "interface='org.freedesktop.DBus.Properties',member='PropertiesChanged',"
+            "arg0='org.freedesktop.systemd1.Unit'"
+        ),
+    )
+
+    STATES: tuple[str, ...] = ("ActiveState", "SubState", "LoadState")
+    """The properties of the interface ``org.freedesktop.systemd1.Unit``
+    that are kept current."""
+
+    MAX_REQUEST: int = 65536
+    """The maximum length of a request line in bytes. A client that sends a
+    longer line is disconnected."""
+
+    class Client:
+        """A connected check. The daemon never blocks on a client: It reads
+        what has arrived and writes what the socket accepts. The next request
+        is only answered after the reply to the previous one has been sent,
+        so a client that doesn’t read its replies can’t grow the memory of
+        the daemon."""
+
+        sock: socket.socket
+
+        requests: bytearray
+        """The received bytes that haven’t been answered yet."""
+
+        replies: bytearray
+        """The bytes of the replies that haven’t been sent yet."""
+
+        def __init__(self, client: socket.socket) -> None:
+            client.setblocking(False)
+            self.sock = client
+            self.requests = bytearray()
+            self.replies = bytearray()
+
+        def pop_request(self) -> bytes | None:
+            """
+            :return: The next complete request line or ``None``.
+            """
+            index = self.requests.find(b"\n")
+            if index < 0:
+                return None
+            line = bytes(self.requests[:index])
+            del self.requests[: index + 1]
+            return line
+
+        @property
+        def exceeded(self) -> bool:
+            """Whether the pending request line is longer than
+            :attr:`Daemon.MAX_REQUEST`."""
+            index = self.requests.find(b"\n")
+            if index < 0:
+                index = len(self.requests)
+            return index > Daemon.MAX_REQUEST
+
+    units: Source.Cache[Source.Unit]
+
+    __path: str
+
+    __user: bool
+
+    __group: str | None
+
+    __connection: WireSource.Connection
+
+    __names: dict[str, str]
+    """The unit names by their object paths. ``PropertiesChanged`` and
+    ``UnitRemoved`` only name the object path."""
+
+    __object_paths: dict[str, str]
+    """The object paths by the unit names"""
+
+    __startup_time: float | None = None
+    """The startup time can’t change until the next reboot."""
+
+    __running: bool = False
+
+    __changed: bool = False
+    """True if a unit has been added, removed or has changed its states
+    since the :class:`Watcher` has been notified."""
+
+    __watcher: Watcher | None = None
+
+    def __init__(
+        self,
+        path: str,
+        user: bool = False,
+        connection: WireSource.Connection | None = None,
+        group: str | None = None,
+    ) -> None:
+        """
+        :param path: The path of the unix socket the checks connect to.
+        :param user: Watch the session bus (``--user``).
+        :param connection: A connection to the bus. By default a new one.
+        :param group: The group that may connect to the socket
+          (``--daemon-group``). By default the group of the daemon.
+        """
+        self.__path = path
+        self.__user = user
+        self.__group = group
+        if connection is None:
+            connection = WireSource.Connection(user)
+        self.__connection = connection
+        self.units = Source.Cache()
+        self.__names = {}
+        self.__object_paths = {}
+
+    @staticmethod
+    def get_socket_path(user: bool = False) -> str:
+        """
+        :return: ``/run/check_systemd/daemon.sock`` or
+          ``$XDG_RUNTIME_DIR/check_systemd/daemon.sock`` for ``--user``
+        """
+        if user:
+            return os.path.join(
+                os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}"),
+                "check_systemd",
+                "daemon.sock",
+            )
+        return "/run/check_systemd/daemon.sock"
+
+    def set_watcher(self, watcher: Watcher | None) -> None:
+        self.__watcher = watcher
+
+    def __new_source(self) -> WireSource:
+        """A source for one request. It shares the connection of the daemon,
+        but memoizes its data only for this request."""
+        source = WireSource()
+        source.set_user(self.__user)
+        source.set_connection(self.__connection)
+        return source
+
+    def __add(
+        self,
+        name: str,
+        object_path: str,
+        active_state: object,
+        sub_state: object,
+        load_state: object,
+    ) -> None:
+        unit = Source.Unit(name, active_state, sub_state, load_state)
+        previous = self.units.get(name) if name in self.units else None
+        if previous is None or (
+            previous.active_state,
+            previous.sub_state,
+            previous.load_state,
+        ) != (unit.active_state, unit.sub_state, unit.load_state):
+            self.__changed = True
+        self.units.add(name, unit)
+        self.__names[object_path] = name
+        self.__object_paths[name] = object_path
+
+    def __remove(self, object_path: str) -> None:
+        name = self.__names.pop(object_path, None)
+        if name is not None:
+            self.__object_paths.pop(name, None)
+            self.units.remove(name)
+            self.__changed = True
+
+    def __list_units(self) -> None:
+        self.units = Source.Cache()
+        self.__names = {}
+        self.__object_paths = {}
+        for row in DbusSource.ManagerProxy(self.__connection).units:
+            unit = DbusSource.UnitTuple(*row)
+            self.__add(
+                unit.name,
+                unit.unit_object_path,
+                unit.active_state,
+                unit.sub_state,
+                unit.load_state,
+            )
+        logger.info("List %s units", self.units.count)
+
+    def load(self) -> None:
+        """Subscribe to the signals and list all units. The units are listed
+        after the subscription, so that no change gets lost in between."""
+        for rule in self.MATCH_RULES:
+            self.__connection.add_match(rule)
+        self.__connection.call(
+            "/org/freedesktop/systemd1", "org.freedesktop.systemd1.Manager", "Subscribe"
+        )
+        self.__list_units()
+
+    def __refresh(self, object_path: str) -> None:
+        """Read the states of one unit again."""
+        try:
+            properties = self.__connection.get_all(
+                object_path, "org.freedesktop.systemd1.Unit"
+            )
+        except CheckSystemdError as e:
+            # The unit has been unloaded in the meantime.
+            logger.info("Failed to refresh the unit %s: %s", object_path, e)
+            self.__remove(object_path)
+            return
+        self.__add(
+            properties["Id"],
+            object_path,
+            properties["ActiveState"],
+            properties["SubState"],
+            properties["LoadState"],
+        )
+
+    def __update(
+        self, object_path: str, changed: dict[str, Any], invalidated: list[str]
+    ) -> None:
+        name = self.__names.get(object_path)
+        if name is None:
+            # Unknown units are announced by UnitNew.
+            return
+        if any(state in invalidated for state in self.STATES):
+            self.__refresh(object_path)
+            return
+        if not any(state in changed for state in self.STATES):
+            return
+        unit = self.units.get(name)
+        assert unit is not None
+        self.__add(
+            name,
+            object_path,
+            changed.get("ActiveState", unit.active_state),
+            changed.get("SubState", unit.sub_state),
+            changed.get("LoadState", unit.load_state),
+        )
+
+    def handle_signal(self, message: WireSource.Message) -> None:
+        """Update the units by one signal of systemd."""
+        member = message.fields.get(3)
+        logger.debug(
+            "Signal '%s' on object path %s: %s",
+            member,
+            message.fields.get(1),
+            message.body,
+        )
+        try:
+            if member == "UnitNew":
+                self.__refresh(message.body[1])
+            elif member == "UnitRemoved":
+                self.__remove(message.body[1])
+            elif member == "JobRemoved":
+                object_path = self.__object_paths.get(message.body[2])
+                if object_path is not None:
+                    self.__refresh(object_path)
+            elif member == "Reloading":
+                # The units are listed again after daemon-reload.
+                if not message.body[0]:
+                    self.__list_units()
+            elif (
+                member == "PropertiesChanged"
+                and message.body[0] == "org.freedesktop.systemd1.Unit"
+            ):
+                self.__update(message.fields[1], message.body[1], message.body[2])
+        except (CheckSystemdError, ValueError, IndexError) as e:
+            logger.info("Failed to handle the signal '%s': %s", member, e)
+
+    def answer(self, request: dict[str, Any]) -> Any:
+        """Answer one request of a :class:`DaemonSource`.
+
+        :param request: for example ``{"method": "get_unit", "name":
+          "nginx.service"}``
+        """
+        method = request.get("method")
+        if method == "hello":
+            return {"version": __version__, "user": self.__user}
+        if method == "list_units":
+            selection = Source.Selection(
+                *(tuple(values) for values in request["selection"])
+            )
+            return [
+                (unit.name, unit.active_state, unit.sub_state, unit.load_state)
+                for unit in self.units
+                if selection.match(unit)
+            ]
+        if method == "get_unit":
+            name = request["name"]
+            unit = self.units.get(name) if name in self.units else None
+            if unit is None:
+                unit = self.__new_source().get_unit(name)
+            return (unit.name, unit.active_state, unit.sub_state, unit.load_state)
+        if method == "get_units":
+            names = request["names"]
+            units = {name: self.units.get(name) for name in names if name in self.units}
+            missing = [name for name in names if units.get(name) is None]
+            if missing:
+                units.update(zip(missing, self.__new_source().get_units(missing)))
+            return [
+                (unit.name, unit.active_state, unit.sub_state, unit.load_state)
+                for unit in (cast(Source.Unit, units[name]) for name in names)
+            ]
+        if method == "manager_counters":
+            return self.__new_source().manager_counters
+        if method == "startup_time":
+            if self.__startup_time is None:
+                self.__startup_time = self.__new_source().startup_time
+            return self.__startup_time
+        if method == "timers":
+            timers = self.__new_source().get_timers(
+                [
+                    (unit.name, self.__object_paths[unit.name])
+                    for unit in self.units.with_type("timer")
+                ]
+            )
+            return [(timer.name, timer.next, timer.last) for timer in timers]
+        raise CheckSystemdError(f"Unknown method '{method}'")
+
+    def __respond(self, line: bytes) -> bytes:
+        try:
+            response = {"result": self.answer(json.loads(line))}
+        except Exception as e:  # noqa: BLE001
+            logger.info("Failed to answer the request %s: %s", line, e)
+            response = {"error": str(e)}
+        return json.dumps(response).encode() + b"\n"
+
+    def __serve(self, client: Daemon.Client) -> None:
+        """Answer the next complete request of a client if its previous
+        reply has been sent."""
+        if client.replies:
+            return
+        line = client.pop_request()
+        if line is not None:
+            client.replies += self.__respond(line)
+
+    def __receive(self, client: Daemon.Client) -> bool:
+        """Read the requests of a client.
+
+        :return: False if the client has closed the connection or has sent
+          a request line that is too long.
+        """
+        try:
+            chunk = client.sock.recv(65536)
+        except BlockingIOError:
+            return True
+        except OSError as e:
+            logger.info("Failed to read from a client: %s", e)
+            return False
+        if not chunk:
+            return False
+        client.requests += chunk
+        if client.exceeded:
+            logger.info(
+                "Disconnect a client: The request is longer than %s bytes.",
+                self.MAX_REQUEST,
+            )
+            return False
+        self.__serve(client)
+        return True
+
+    def __send(self, client: Daemon.Client) -> bool:
+        """Send as much of the replies as the socket of a client accepts.
+
+        :return: False if the client has closed the connection.
+        """
+        try:
+            sent = client.sock.send(client.replies)
+        except BlockingIOError:
+            return True
+        except OSError as e:
+            logger.info("Failed to answer a client: %s", e)
+            return False
+        del client.replies[:sent]
+        self.__serve(client)
+        return True
+
+    def __bind(self, server: socket.socket) -> None:
+        """Bind the server to its path. Only the owner and the group of the
+        socket may connect to it."""
+        import stat
+
+        directory = os.path.dirname(self.__path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o750)
+            self.__chown(directory)
+        elif (
+            self.__group is not None
+            and os.path.basename(directory) == "check_systemd"
+            and os.stat(directory).st_uid == os.getuid()
+        ):
+            # The snapshots (--cache-dir) create the directory for their owner
+            # only. Directories like /run or /tmp are never touched.
+            os.chmod(directory, 0o750)
+            self.__chown(directory)
+        try:
+            mode = os.lstat(self.__path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise CheckSystemdError(
+                    f"'{self.__path}' exists and isn't a socket. It isn't replaced."
+                )
+            # The socket of a previous run
+            os.unlink(self.__path)
+        # No other user may connect between bind() and chmod().
+        umask = os.umask(0o117)
+        try:
+            server.bind(self.__path)
+        finally:
+            os.umask(umask)
+        os.chmod(self.__path, 0o660)
+        self.__chown(self.__path)
+
+    def __chown(self, path: str) -> None:
+        if self.__group is not None:
+            import grp
+
+            os.chown(path, -1, grp.getgrnam(self.__group).gr_gid)
+
+    def run(self) -> None:
+        """Load the units and serve the checks until :meth:`stop` is
+        called."""
+        import selectors
+        import socket
+
+        self.load()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__bind(server)
+        server.listen()
+        server.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(server, selectors.EVENT_READ)
+        selector.register(self.__connection, selectors.EVENT_READ)
+        clients: list[Daemon.Client] = []
+        logger.info("Serve the checks on %s", self.__path)
+        self.__running = True
+        try:
+            while self.__running:
+                signals = self.__connection.pop_signals()
+                for message in signals:
+                    self.handle_signal(message)
+                if self.__watcher is not None:
+                    self.__watcher.update(self.__changed)
+                self.__changed = False
+                for key, events in selector.select(0 if signals else self.TIMEOUT):
+                    if key.fileobj is server:
+                        client = Daemon.Client(server.accept()[0])
+                        selector.register(client.sock, selectors.EVENT_READ, client)
+                        clients.append(client)
+                    elif key.fileobj is self.__connection:
+                        for message in self.__connection.receive_signals():
+                            self.handle_signal(message)
+                    else:
+                        client = cast(Daemon.Client, key.data)
+                        if events & selectors.EVENT_WRITE:
+                            connected = self.__send(client)
+                        else:
+                            connected = self.__receive(client)
+                        if not connected:
+                            selector.unregister(client.sock)
+                            clients.remove(client)
+                            client.sock.close()
+                        else:
+                            # Read the next requests only after the replies
+                            # have been sent.
+                            selector.modify(
+                                client.sock,
+                                selectors.EVENT_WRITE
+                                if client.replies
+                                else selectors.EVENT_READ,
+                                client,
+                            )
+        finally:
+            for client in clients:
+                client.sock.close()
+            selector.close()
+            server.close()
+            os.unlink(self.__path)
+
+    def stop(self) -> None:
+        """Stop :meth:`run` within :attr:`TIMEOUT` seconds."""
+        self.__running = False
+
+
+class DaemonSource(Source):
+    """Data source that asks a running :class:`Daemon` (``--daemon``) over
+    its unix socket. The daemon keeps the states of the units current, so
+    no unit has to be listed by the check itself."""
+
+    data_source = "daemon"
+
+    # The requests share one socket.
+    concurrent = False
+
+    __path: str
+
+    __file: TextIO | None = None
+
+    __daemon: Daemon | None = None
+
+    def __init__(self, path: str, daemon: Daemon | None = None) -> None:
+        """
+        :param path: The path of the unix socket of the daemon.
+        :param daemon: Ask this daemon directly instead of connecting to its
+          socket, for example in the :class:`Watcher` of the daemon itself.
+        """
+        super().__init__()
+        self.__path = path
+        self.__daemon = daemon
+
+    @property
+    def path(self) -> str:
+        """The path of the unix socket of the daemon."""
+        return self.__path
+
+    @staticmethod
+    def connect_to(path: str, user: bool = False) -> DaemonSource | None:
+        """
+        :return: A connected source or ``None`` if no daemon is running, so
+          that the plugin falls back to the other data sources.
+        """
+        if not os.path.exists(path):
+            return None
+        source = DaemonSource(path)
+        source.set_user(user)
+        try:
+            source.connect()
+        except (OSError, ValueError, CheckSystemdError) as e:
+            logger.info("Failed to connect to the daemon on '%s': %s", path, e)
+            return None
+        return source
+
+    def connect(self, timeout: float = 10) -> None:
+        """
+        :raises OSError: If no daemon listens on the socket.
+        :raises CheckSystemdError: If the daemon watches the other bus.
+        """
+        import socket
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.__path)
+        except OSError:
+            sock.close()
+            raise
+        self.__file = cast(TextIO, sock.makefile("rw", encoding="utf-8"))
+        hello = self.__request("hello")
+        if hello.get("user") != self._user:
+            raise CheckSystemdError(
+                f"The daemon on '{self.__path}' watches the other bus."
+            )
+        logger.verbose("Connected to the daemon on '%s': %s", self.__path, hello)
+
+    def __request(self, method: str, **args: Any) -> Any:
+        if self.__daemon is not None:
+            return self.__daemon.answer(dict(method=method, **args))
+        if self.__file is None:
+            raise CheckSystemdError("Not connected to a daemon.")
+        self.__file.write(json.dumps(dict(method=method, **args)) + "\n")
+        self.__file.flush()
+        line = self.__file.readline()
+        if not line:
+            raise CheckSystemdError("The daemon closed the connection.")
+        response = json.loads(line)
+        if "error" in response:
+            raise CheckSystemdError(response["error"])
+        return response["result"]
+
+    def _list_units(
+        self, selection: Source.Selection
+    ) -> Generator[Source.Unit, None, None]:
+        for row in self.__request("list_units", selection=selection):
+            yield Source.Unit(*row)
+
+    def _get_unit(self, name: str) -> Source.Unit:
+        return Source.Unit(*self.__request("get_unit", name=name))
+
+    def _get_units(self, names: Sequence[str]) -> list[Source.Unit]:
+        return [
+            Source.Unit(*row) for row in self.__request("get_units", names=list(names))
+        ]
+
+    @property
+    def _manager_counters(self) -> Source.ManagerCounters:
+        return Source.ManagerCounters(*self.__request("manager_counters"))
+
+    @property
+    def _startup_time(self) -> float | None:
+        return self.__request("startup_time")
+
+    @property
+    def _all_timers(self) -> list[Source.Timer]:
+        return [
+            Source.Timer(name=name, next=next, last=last)
+            for name, next, last in self.__request("timers")
+        ]
+
+
+class SharedSource(Source):
+    """Serves the checks of ``--batch`` from the data that another source
+    has acquired. The units, the timers and the startup time are acquired
+    only once, but every check gets its own instance with its own selection
+    and digest."""
+
+    data_source = "shared"
+
+    concurrent = False
+
+    __source: Source
+
+    def __init__(self, source: Source) -> None:
+        """
+        :param source: A source without selection and digest. Its data is
+          memoized, so it is acquired on the first access only.
+        """
+        super().__init__()
+        self.__source = source
+
+    def _list_units(
+        self, selection: Source.Selection
+    ) -> Generator[Source.Unit, None, None]:
+        for unit in self.__source.units:
+            if selection.match(unit):
+                yield unit
+
+    def _get_unit(self, name: str) -> Source.Unit:
+        return self._get_units((name,))[0]
+
+    def _get_units(self, names: Sequence[str]) -> list[Source.Unit]:
+        units = self.__source.units
+        found = {name: units.get(name) for name in names if name in units}
+        # For example units that aren’t loaded
+        missing = [name for name in names if found.get(name) is None]
+        if missing:
+            found.update(zip(missing, self.__source.get_units(missing)))
+        return [cast(Source.Unit, found[name]) for name in names]
+
     @property
-    def startup_time(self) -> float | None:
-        """`src/analyze/analyze-time-data.c <https://github.com/systemd/systemd/blob/1f901c24530fb9b111126381a6ea101af8040e65/src/analyze/analyze-time-data.c#L141-L197>`"""
-        unit = GiSource.UnitProxy(self.manager.default_target)
-        # ... ActiveEnterTimestamp,
-        # ActiveEnterTimestampMonotonic ... contain
-        # CLOCK_REALTIME and CLOCK_MONOTONIC 64-bit microsecond timestamps of
-        # the last time a unit left the inactive state, entered the active
-        # state, .... The fields are 0 in case
-        # such a transition has not yet been recorded on this boot.
+    def _manager_counters(self) -> Source.ManagerCounters:
+        return self.__source.manager_counters
 
-        enter_timestamp = unit.active_enter_timestamp_monotonic
-        if not enter_timestamp:
-            return None
-        return self._round_1(
-            (enter_timestamp - self.manager.userspace_timestamp_monotonic) / 1_000_000
-        )
+    @property
+    def _startup_time(self) -> float | None:
+        return self.__source.startup_time
 
     @property
     def _all_timers(self) -> list[Source.Timer]:
-        timers: list[Source.Timer] = []
-        for (
-            name,
-            _,
-            _,
-            _,
-            _,
-            _,
-            unit_object_path,
-            _,
-            _,
-            _,
-        ) in self.manager.units:
-            if name.endswith(".timer"):
-                timer = GiSource.TimerProxy(object_path=unit_object_path)
+        return list(self.__source.timers)
 
-                def _to_timestamp(usec: int) -> Optional[int]:
-                    result: Optional[int] = None
-                    if timer.last > 0:
-                        result = self._usec_to_sec(usec)
-                    return result
 
-                timers.append(
-                    Source.Timer(
-                        name=name,
-                        next=_to_timestamp(timer.next),
-                        last=_to_timestamp(timer.last),
-                    )
-                )
-        return timers
+class Watcher:
+    """Submits the result of the check as a passive check result to the
+    external command file of Icinga or Nagios (``--watch``) as soon as the
+    :class:`Daemon` has received a change of a unit. A failed unit is
+    reported within a fraction of a second instead of with the next active
+    check, and an idle system costs nothing.
+
+    The command file is usually a named pipe, for example
+    ``/var/run/icinga2/cmd/icinga2.cmd``.
+    """
+
+    __daemon: Daemon
+
+    __path: str
+
+    __host: str
+
+    __service: str
+
+    __interval: float
+    """The result is submitted again after this time in seconds, even if
+    nothing has changed, so that the result doesn’t become stale."""
+
+    __submitted: float | None = None
+    """The monotonic time of the last submission"""
+
+    def __init__(
+        self,
+        daemon: Daemon,
+        path: str,
+        host: str | None = None,
+        service: str = "systemd",
+        interval: float = 60,
+    ) -> None:
+        """
+        :param daemon: The daemon that keeps the units current.
+        :param path: The path of the external command file.
+        :param host: The host name of the passive check result. By default
+          the name of this host.
+        :param service: The service name of the passive check result.
+        :param interval: Submit the result again after this time in
+          seconds.
+        """
+        self.__daemon = daemon
+        self.__path = path
+        self.__host = host if host is not None else os.uname().nodename
+        self.__service = service
+        self.__interval = interval
+
+    def check(self) -> tuple[int, str]:
+        """Run the check on the units of the daemon.
+
+        :return: The exit code and the first line of the output of the
+          plugin, for example ``(2, 'SYSTEMD CRITICAL - nginx.service:
+          failed | count_units=3 ...')``
+        """
+        return run_check(DaemonSource("", daemon=self.__daemon))
+
+    def format_command(self, exitcode: int, output: str) -> str:
+        """
+        :return: for example ``[1700000000]
+          PROCESS_SERVICE_CHECK_RESULT;host;systemd;2;SYSTEMD CRITICAL -
+          …``
+        """
+        return format_passive_check_result(
+            self.__host, self.__service, exitcode, output
+        )
+
+    def submit(self) -> None:
+        """Run the check and write its result to the command file. The
+        command file is opened for every result, so that a restart of Icinga
+        is survived. If nobody reads the named pipe or if the pipe is full,
+        the result is dropped.
+
+        The command is written at once: A write of at most ``PIPE_BUF``
+        bytes to a pipe is atomic, so that Icinga never reads half a
+        command. Longer commands are dropped."""
+        import select
+
+        self.__submitted = time.monotonic()
+        command = self.format_command(*self.check())
+        logger.debug("Submit %s", command)
+        data = command.encode()
+        if len(data) > select.PIPE_BUF:
+            logger.info(
+                "Dropped a result of %s bytes, more than PIPE_BUF (%s bytes)",
+                len(data),
+                select.PIPE_BUF,
+            )
+            return
+        try:
+            fd = os.open(self.__path, os.O_WRONLY | os.O_APPEND | os.O_NONBLOCK)
+        except OSError as e:
+            logger.info("Failed to open the command file '%s': %s", self.__path, e)
+            return
+        try:
+            written = os.write(fd, data)
+        except OSError as e:
+            logger.info("Failed to write to the command file '%s': %s", self.__path, e)
+            return
+        finally:
+            os.close(fd)
+        if written < len(data):
+            logger.info("Dropped a result after %s of %s bytes", written, len(data))
+
+    def update(self, changed: bool) -> None:
+        """Submit the result if the units have changed or if the last
+        submission is older than the interval."""
+        if (
+            changed
+            or self.__submitted is None
+            or time.monotonic() - self.__submitted >= self.__interval
+        ):
+            self.submit()
 
 
 class OptionContainer:
@@ -1318,10 +4538,10 @@ class OptionContainer:
 
     # scope: units
     ignore_inactive_state: bool
-    include: list[str] = []
-    include_unit: Optional[str]
+    include: Source.NameMatcher
+    include_unit: list[str] | None
     include_type: list[str]
-    exclude: list[str] = []
+    exclude: Source.NameMatcher
     exclude_unit: list[str]
     exclude_type: list[str]
     expected_state: str | None
@@ -1341,17 +4561,53 @@ class OptionContainer:
     """``-c``, ``--critical``"""
 
     # backend
-    data_source: Optional[Literal["dbus", "cli"]]
+    data_source: Literal["dbus", "wire", "busctl", "cli"] | None
 
     user: bool = False
     """``--user``"""
 
+    fast: bool = False
+    """``--fast``"""
+
+    cache_dir: str | None = None
+    """``--cache-dir``"""
+
+    cache_ttl: float
+    """``--cache-ttl``"""
+
+    daemon: bool = False
+    """``--daemon``"""
+
+    daemon_socket: str | None
+    """``--daemon-socket``"""
+
+    daemon_group: str | None
+    """``--daemon-group``"""
+
+    watch: str | None = None
+    """``--watch``"""
+
+    watch_host: str | None = None
+    """``--watch-host``"""
+
+    watch_service: str
+    """``--watch-service``"""
+
+    watch_interval: float
+    """``--watch-interval``"""
+
+    batch: str | None = None
+    """``--batch``"""
+
+    batch_format: Literal["json", "passive"]
+    """``--batch-format``"""
+
     # performance_data
     performance_data: bool
 
     def __init__(self) -> None:
-        self.include = []
-        self.exclude = []
+        self.include = Source.NameMatcher()
+        self.exclude = Source.NameMatcher()
         self.unit = None
         self.data_source = None
 
@@ -1451,18 +4707,25 @@ Units = Source.Cache[Source.Unit]
 
 
 class UnitsResource(Resource):
-    units: Units
+    """Yields the units the digest has retained: the units that aren’t in the
+    OK state or all units if the verbose output lists them."""
 
-    def __init__(self, units: Units) -> None:
-        self.units = units
+    digest: Source.Digest
+
+    def __init__(self, digest: Source.Digest) -> None:
+        self.digest = digest
 
     def probe(self) -> Generator[Metric, None, None]:
         counter = 0
-        for unit in self.units.filter(include=opts.include, exclude=opts.exclude):
+        for unit in self.digest.units:
             yield Metric(name=unit.name, value=unit, context="units")
             counter += 1
 
-        if counter == 0:
+        if counter == 0 and self.digest.matched > 0:
+            # All units are in the OK state and none of them is retained.
+            yield Metric(name="all", value=None, context="units")
+
+        if self.digest.matched == 0:
             raise ValueError(
                 "Please verify your --include-* and --exclude-* "
                 "options. No units have been added for "
@@ -1470,6 +4733,47 @@ class UnitsResource(Resource):
             )
 
 
+class SystemStateResource(Resource):
+    """Resource that reads the counters of the systemd manager instead of
+    listing all units (``--fast``). The failed units are only listed if the
+    manager counts at least one of them."""
+
+    source: Source
+
+    include: Source.NameMatcher | None
+    """The include options that still have to be applied. By default all
+    include options of the command line are applied."""
+
+    def __init__(
+        self, source: Source, include: Source.NameMatcher | None = None
+    ) -> None:
+        self.source = source
+        self.include = include
+
+    def probe(self) -> Generator[Metric, None, None]:
+        counters = self.source.manager_counters
+        logger.debug("Manager counters: %s", counters)
+
+        include = opts.include if self.include is None else self.include
+        failed = 0
+        if counters.n_failed_units > 0:
+            for unit in self.source.failed_units.filter(
+                include=include, exclude=opts.exclude
+            ):
+                yield Metric(name=unit.name, value=unit, context="units")
+                failed += 1
+
+        yield Metric(
+            name="system_state", value=counters.system_state, context="system_state"
+        )
+
+        if opts.performance_data:
+            yield Metric(name="units_failed", value=failed, context="performance_data")
+            yield Metric(
+                name="count_units", value=counters.n_names, context="performance_data"
+            )
+
+
 class UnitsContext(Context):
     def __init__(self) -> None:
         super().__init__("units")
@@ -1606,29 +4910,30 @@ class StartupTimeContext(ScalarContext):
 
 
 class PerformanceDataResource(Resource):
-    units: Units
+    digest: Source.Digest
+
+    states = (
+        "active_state:failed",
+        "active_state:active",
+        "active_state:activating",
+        "active_state:inactive",
+    )
+    """The digest has to count these states."""
 
-    def __init__(self, units: Units) -> None:
-        self.units = units
+    def __init__(self, digest: Source.Digest) -> None:
+        self.digest = digest
 
     def probe(self) -> Generator[Metric, None, None]:
-        for state_spec, count in self.units.count_by_states(
-            (
-                "active_state:failed",
-                "active_state:active",
-                "active_state:activating",
-                "active_state:inactive",
-            ),
-            exclude=opts.exclude,
-        ).items():
+        counters = self.digest.counters
+        for state_spec in self.states:
             yield Metric(
                 name="units_{}".format(state_spec.split(":")[1]),
-                value=count,
+                value=counters[state_spec],
                 context="performance_data",
             )
 
         yield Metric(
-            name="count_units", value=self.units.count, context="performance_data"
+            name="count_units", value=self.digest.count, context="performance_data"
         )
 
 
@@ -1657,6 +4962,15 @@ class SystemdSummary(Summary):
     <https://github.com/mpounsett/nagiosplugin/blob/master/nagiosplugin/summary.py>`_.
     """
 
+    source: Source | None
+
+    def __init__(self, source: Source | None = None) -> None:
+        """
+        :param source: The source of the data, which is named in the verbose
+          output if it is a daemon.
+        """
+        self.source = source
+
     def ok(self, results: Results) -> str:
         """Formats status line when overall state is ok.
 
@@ -1664,9 +4978,21 @@ class SystemdSummary(Summary):
         :returns: status line
         """
         if opts.include_unit:
-            for result in results.most_significant:
-                if isinstance(result.context, UnitsContext):
-                    return "{0}".format(result)
+            units = [
+                result
+                for result in results.most_significant
+                if isinstance(result.context, UnitsContext)
+            ]
+            # The units of -u, unless their names are aliases
+            selected = [
+                f"{result}"
+                for result in units
+                if result.metric and result.metric.name in opts.include.names
+            ]
+            if selected:
+                return ", ".join(selected)
+            if units:
+                return f"{units[0]}"
         return "all"
 
     def problem(self, results: Results) -> str:
@@ -1701,33 +5027,113 @@ class SystemdSummary(Summary):
                 "timers",
             ]:
                 summary.append("{0}: {1}".format(result.state, result))
+        if isinstance(self.source, DaemonSource):
+            summary.append(
+                f"The data was answered by the daemon on '{self.source.path}'."
+            )
         return summary
 
 
 # Command line interface (argparse) ###########################################
 
 
-def convert_to_regexp_list(
-    regexp: Optional[Sequence[str]] = None,
-    unit_names: Optional[Union[str, Sequence[str]]] = None,
-    unit_types: Optional[Sequence[str]] = None,
-) -> set[str]:
-    result: set[str] = set()
-    if regexp:
-        for regexp in regexp:
-            result.add(regexp)
+def convert_regexp_to_globs(regexp: str) -> list[str] | None:
+    """Convert a regular expression into shell-style glob patterns that select
+    exactly the same unit names as ``re.match(regexp, unit_name)``. Only a
+    small subset of the regular expression syntax can be converted: literal
+    and escaped characters, ``.``, ``.*``, a final ``$`` and alternatives of
+    such expressions, for example ``.*\\.(service|timer)$``.
 
-    if unit_names:
-        if isinstance(unit_names, str):
-            unit_names = [unit_names]
-        for unit_name in unit_names:
-            result.add(unit_name.replace(".", "\\."))
+    :param regexp: for example ``nginx\\.service``
 
-    if unit_types:
-        types = SystemdUnitTypesList(*unit_types)
-        result.add(types.convert_to_regexp())
+    :return: for example ``['nginx.service*']`` or ``None`` if the regular
+      expression can’t be converted.
+    """
+
+    def convert_alternatives(regexp: str, group: bool) -> list[str] | None:
+        alternatives: list[str] = []
+        depth = 0
+        start = 0
+        index = 0
+        while index < len(regexp):
+            char = regexp[index]
+            if char == "\\":
+                index += 1
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == "|" and depth == 0:
+                alternatives.append(regexp[start:index])
+                start = index + 1
+            index += 1
+        alternatives.append(regexp[start:])
+
+        globs: list[str] = []
+        for alternative in alternatives:
+            converted = convert_sequence(alternative, group)
+            if converted is None:
+                return None
+            globs += converted
+        return globs
+
+    def convert_sequence(regexp: str, group: bool) -> list[str] | None:
+        globs: list[str] = [""]
+        anchored = False
+        index = 1 if regexp.startswith("^") else 0
+        while index < len(regexp):
+            char = regexp[index]
+            if anchored:
+                return None
+            fragments: list[str] | None
+            if char == "\\":
+                escaped = regexp[index + 1 : index + 2]
+                # \d, \w, … or special characters of the glob patterns
+                if escaped == "" or escaped.isalnum() or escaped in "*?[]":
+                    return None
+                fragments = [escaped]
+                index += 2
+            elif regexp.startswith(".*", index):
+                fragments = ["*"]
+                index += 2
+            elif char == ".":
+                fragments = ["?"]
+                index += 1
+            elif char == "$":
+                anchored = True
+                index += 1
+                continue
+            elif char == "(":
+                end = regexp.find(")", index)
+                if end == -1:
+                    return None
+                inner = regexp[index + 1 : end]
+                inner = inner.removeprefix("?:")
+                if re.search(r"[()^$?]", inner):
+                    return None
+                fragments = convert_alternatives(inner, True)
+                if fragments is None:
+                    return None
+                index = end + 1
+            elif char in "*+?{}[]|)^":
+                return None
+            else:
+                fragments = [char]
+                index += 1
+
+            # Quantifiers other than .* are not supported
+            if regexp[index : index + 1] in ("*", "+", "?", "{"):
+                return None
+            globs = [glob + fragment for glob in globs for fragment in fragments]
+            if len(globs) > 64:
+                return None
+
+        if not anchored and not group:
+            # re.match() matches only at the beginning of the unit name.
+            globs = [glob if glob.endswith("*") else glob + "*" for glob in globs]
+        return globs
 
-    return result
+    return convert_alternatives(regexp, False)
 
 
 def get_argparser() -> argparse.ArgumentParser:
@@ -1812,10 +5218,13 @@ def get_argparser() -> argparse.ArgumentParser:
         "-u",
         "--unit",
         "--include-unit",
-        type=str,
         metavar="UNIT_NAME",
         dest="include_unit",
-        help="Name of the systemd unit that is being tested.",
+        action="extend",
+        nargs="+",
+        help="Name of the systemd unit that is being tested. This option can "
+        "be applied multiple times or take several names, for example: "
+        "-u nginx.service ssh.service. All units are fetched at once.",
     )
 
     units.add_argument(
@@ -1963,6 +5372,26 @@ def get_argparser() -> argparse.ArgumentParser:
         "only partially implemented.",
     )
 
+    acquisition_exclusive_group.add_argument(
+        "--wire",
+        dest="data_source",
+        action="store_const",
+        const="wire",
+        help="Use the systemd’s D-Bus API like --dbus, but speak the D-Bus "
+        "wire protocol directly over the socket of the bus. This data "
+        "source doesn’t need the PyGObject (gi) package and starts faster.",
+    )
+
+    acquisition_exclusive_group.add_argument(
+        "--busctl",
+        dest="data_source",
+        action="store_const",
+        const="busctl",
+        help="Use the systemd’s D-Bus API over the command line client "
+        "'busctl' and decode its JSON output. Unlike --cli this data source "
+        "doesn’t depend on the layout of text tables.",
+    )
+
     acquisition_exclusive_group.add_argument(
         "--cli",
         dest="data_source",
@@ -1973,6 +5402,19 @@ def get_argparser() -> argparse.ArgumentParser:
         "process.",
     )
 
+    acquisition.add_argument(
+        "--fast",
+        dest="fast",
+        action="store_true",
+        default=False,
+        help="Read the counters of the systemd manager (SystemState, "
+        "NFailedUnits, NNames) instead of listing all units. Only the failed "
+        "units are listed. The performance data is restricted to "
+        "'count_units' (number of loaded unit names including aliases) and "
+        "'units_failed'. This option has no effect if it is used with the "
+        "option -u.",
+    )
+
     acquisition.add_argument(
         "--user",
         dest="user",
@@ -1981,6 +5423,119 @@ def get_argparser() -> argparse.ArgumentParser:
         help="Also show user (systemctl --user) units.",
     )
 
+    acquisition.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        metavar="DIRECTORY",
+        nargs="?",
+        const="/run/check_systemd",
+        help="Store the listed units and timers as a snapshot in this "
+        "directory (by default /run/check_systemd), so that several checks "
+        "on the same host can share one enumeration. The startup time is "
+        "stored there until the next reboot. The directory must be "
+        "writable by the user running the checks.",
+    )
+
+    acquisition.add_argument(
+        "--cache-ttl",
+        dest="cache_ttl",
+        metavar="SECONDS",
+        type=float,
+        default=30,
+        help="Time in seconds a snapshot stored with '--cache-dir' is "
+        "reused (by default 30 seconds).",
+    )
+
+    acquisition.add_argument(
+        "--daemon",
+        dest="daemon",
+        action="store_true",
+        default=False,
+        help="Run as a long-running daemon instead of checking once. The "
+        "daemon lists the units once, keeps their states current by the "
+        "D-Bus signals of systemd and answers the checks over a unix socket "
+        "(see --daemon-socket).",
+    )
+
+    acquisition.add_argument(
+        "--daemon-socket",
+        dest="daemon_socket",
+        metavar="PATH",
+        help="The unix socket of the daemon (by default "
+        "/run/check_systemd/daemon.sock or with --user "
+        "$XDG_RUNTIME_DIR/check_systemd/daemon.sock). A check asks the "
+        "daemon only if this option is given and falls back to the other "
+        "data sources if no daemon is running.",
+    )
+
+    acquisition.add_argument(
+        "--daemon-group",
+        dest="daemon_group",
+        metavar="GROUP",
+        help="The group that may connect to the unix socket of the daemon, "
+        "for example the group of the user running the checks. Only the "
+        "owner and this group may read and write the socket (by default the "
+        "group of the daemon).",
+    )
+
+    acquisition.add_argument(
+        "--watch",
+        dest="watch",
+        metavar="COMMAND_FILE",
+        help="Run as a daemon (see --daemon) and write the result of the check "
+        "as a passive check result to the external command file of Icinga "
+        "or Nagios (for example /var/run/icinga2/cmd/icinga2.cmd) as soon as "
+        "a unit changes its state.",
+    )
+
+    acquisition.add_argument(
+        "--watch-host",
+        dest="watch_host",
+        metavar="HOST",
+        help="The host name of the passive check results of --watch and "
+        "--batch (by default the name of this host).",
+    )
+
+    acquisition.add_argument(
+        "--watch-service",
+        dest="watch_service",
+        metavar="SERVICE",
+        default="systemd",
+        help="The service name of the passive check results (by default 'systemd').",
+    )
+
+    acquisition.add_argument(
+        "--watch-interval",
+        dest="watch_interval",
+        metavar="SECONDS",
+        type=float,
+        default=60,
+        help="Submit the passive check result again after this time in "
+        "seconds if no unit has changed (by default 60 seconds).",
+    )
+
+    acquisition.add_argument(
+        "--batch",
+        dest="batch",
+        metavar="SPECS",
+        help="Evaluate many checks in one process. Each line of the file "
+        "SPECS names a check and its command line arguments, for example "
+        "'nginx -u nginx.service'. The units, the timers and the startup "
+        "time are acquired only once for all checks. One result per check "
+        "is printed (see --batch-format).",
+    )
+
+    acquisition.add_argument(
+        "--batch-format",
+        dest="batch_format",
+        choices=("json", "passive"),
+        default="json",
+        help="Print the results of --batch as JSON lines (by default) or as "
+        "passive check results for the external command file of Icinga or "
+        "Nagios. The name of the check is the service name, the host name "
+        "is set by --watch-host.",
+    )
+
     # Performance data ########################################################
 
     perf_data = parser.add_argument_group(
@@ -2009,27 +5564,337 @@ def get_argparser() -> argparse.ArgumentParser:
 
 
 def normalize_argparser(opts: argparse.Namespace) -> OptionContainer:
-    if opts.data_source == "dbus" and not is_dbus:
+    if opts.data_source == "dbus" and not import_gi():
         opts.data_source = "cli"
 
-    opts.include = convert_to_regexp_list(
-        regexp=opts.include, unit_names=opts.include_unit, unit_types=opts.include_type
+    opts.include = Source.NameMatcher(
+        regexes=opts.include, unit_names=opts.include_unit, unit_types=opts.include_type
     )
 
-    opts.exclude = convert_to_regexp_list(
-        regexp=opts.exclude, unit_names=opts.exclude_unit, unit_types=opts.exclude_type
+    opts.exclude = Source.NameMatcher(
+        regexes=opts.exclude, unit_names=opts.exclude_unit, unit_types=opts.exclude_type
     )
 
     o = cast(OptionContainer, opts)
 
     # del opts.include_unit
     del o.include_type
-    del o.exclude_type
     del o.exclude_unit
 
     return o
 
 
+# Acquisition plan ############################################################
+
+
+@dataclass
+class AcquisitionPlan:
+    """Describes which data has to be acquired from systemd for one run of the
+    plugin.
+
+    Listing all units (``systemctl list-units --all`` or ``ListUnits``) and
+    measuring the startup time (``systemd-analyze``) are the most expensive
+    calls. The plan is derived from the normalized command line options and
+    contains only the calls the enabled monitoring scopes really need, for
+    example a single ``systemctl show`` for ``-u`` without performance data.
+    """
+
+    units: bool
+    """List all units. The performance data counts all units and include
+    options other than ``-u`` can only be resolved by listing all units."""
+
+    manager_counters: bool
+    """Read the counters of the manager and list only the failed units
+    (``--fast``)."""
+
+    unit_names: tuple[str, ...]
+    """The names of the units to fetch at once (``-u``)."""
+
+    startup_time: bool
+    """Measure the startup time. The startup time is needed by its own scope
+    and by the performance data."""
+
+    timers: bool
+    """List all timers."""
+
+    selection: Source.Selection = field(default_factory=Source.Selection)
+    """The part of the unit selection that is pushed down to systemd."""
+
+    include: Source.NameMatcher | None = None
+    """The include options that still have to be applied in Python after the
+    pushdown. ``None`` means all of them."""
+
+    @staticmethod
+    def __convert_to_globs(matcher: Source.NameMatcher) -> list[str] | None:
+        """Translate the include options into shell-style glob patterns.
+
+        :return: The glob patterns or ``None`` if at least one option can’t be
+          translated. The options are combined by a logical OR, so all of them
+          have to be translated.
+        """
+        globs: list[str] = []
+        for unit_name in sorted(matcher.names):
+            if any(char in unit_name for char in "*?[\\"):
+                return None
+            globs.append(unit_name)
+        for regexp in sorted(matcher.regexes):
+            converted = convert_regexp_to_globs(regexp)
+            if converted is None:
+                return None
+            globs += converted
+        return globs + ["*." + unit_type for unit_type in matcher.types]
+
+    @staticmethod
+    def __push_down(
+        opts: OptionContainer,
+    ) -> tuple[Source.Selection, Source.NameMatcher]:
+        """Translate the include and exclude options into a selection that
+        systemd applies itself.
+
+        :return: The selection and the include options that couldn’t be
+          translated.
+        """
+        include = opts.include
+        patterns: tuple[str, ...] = ()
+        globs = AcquisitionPlan.__convert_to_globs(include)
+        if globs is not None:
+            patterns = tuple(globs)
+            include = Source.NameMatcher()
+
+        types: tuple[str, ...] = ()
+        if opts.exclude_type:
+            types = tuple(
+                unit_type
+                for unit_type in dict.fromkeys(get_args(UnitType))
+                if unit_type not in opts.exclude_type
+            )
+        return Source.Selection(patterns=patterns, types=types), include
+
+    @classmethod
+    def from_options(cls, opts: OptionContainer) -> AcquisitionPlan:
+        manager_counters = opts.fast and opts.include_unit is None
+        selection = Source.Selection()
+        include: Source.NameMatcher | None = None
+        # The performance data counts all units, the manager counters
+        # excepted.
+        if manager_counters or not opts.performance_data:
+            selection, include = AcquisitionPlan.__push_down(opts)
+            if opts.include_unit is not None:
+                # The units of -u are fetched separately and don’t pass the
+                # selection of systemd.
+                include = None
+        return cls(
+            units=not manager_counters
+            and (
+                opts.include_unit is None
+                or opts.performance_data
+                # -u adds only unit names to the include list.
+                or len(opts.include) > len(opts.include.names)
+            ),
+            manager_counters=manager_counters,
+            unit_names=tuple(
+                dict.fromkeys(
+                    Source.NameMatcher.complete_name(name)
+                    for name in opts.include_unit or ()
+                )
+            ),
+            startup_time=opts.scope_startup_time or opts.performance_data,
+            timers=opts.scope_timers,
+            selection=selection,
+            include=include,
+        )
+
+
+def create_check(source: Source) -> Check:
+    """Acquire the data the options ``opts`` need from the source and
+    assemble the resources, contexts and the summary in a check.
+
+    :return: A check that is ready to be run, for example by
+      ``check.main()``.
+    """
+    plan = AcquisitionPlan.from_options(opts)
+    logger.debug("Acquisition plan: %s", plan)
+    source.set_selection(plan.selection)
+    digest = Source.Digest(
+        include=opts.include if plan.include is None else plan.include,
+        exclude=opts.exclude,
+        states=PerformanceDataResource.states if opts.performance_data else (),
+        retain_all=opts.verbose > 0,
+        unit_names=plan.unit_names,
+    )
+    source.set_digest(digest)
+    source.prefetch(plan)
+
+    if plan.units:
+        digest = source.digest
+
+    if plan.unit_names:
+        for unit in source.get_units(plan.unit_names):
+            digest.add(unit, retain=True)
+
+    tasks: list[Union[Resource, Context, Summary]] = [
+        UnitsContext(),
+        SystemdSummary(source),
+    ]
+
+    if plan.manager_counters:
+        tasks += [
+            SystemStateResource(source, plan.include),
+            Context("system_state"),
+        ]
+    else:
+        tasks.append(UnitsResource(digest))
+
+    if plan.startup_time:
+        tasks += [
+            StartupTimeResource(source),
+            StartupTimeContext(),
+        ]
+
+    if plan.timers:
+        tasks += [
+            TimersResource(source),
+            TimersContext(),
+        ]
+
+    if opts.performance_data:
+        if not plan.manager_counters:
+            tasks.append(PerformanceDataResource(digest))
+        tasks.append(PerformanceDataContext())
+
+    check = Check(*tasks)
+    check.name = "systemd"
+    return check
+
+
+def run_check(source: Source) -> tuple[int, str]:
+    """Run the check of the options ``opts`` without printing its output
+    and without exiting.
+
+    :return: The exit code and the first line of the output of the plugin,
+      for example ``(2, 'SYSTEMD CRITICAL - nginx.service: failed |
+      count_units=3 ...')``
+    """
+    try:
+        plugin = create_check(source)
+        plugin()
+    except Exception as e:  # noqa: BLE001
+        logger.info("Failed to run the check: %s", e)
+        return 3, f"SYSTEMD UNKNOWN - {e}"
+    output = Output(logging.StreamHandler(io.StringIO()))
+    output.add(plugin)
+    return plugin.exitcode, output.status
+
+
+def format_passive_check_result(
+    host: str, service: str, exitcode: int, output: str
+) -> str:
+    """
+    :return: An external command of Icinga or Nagios, for example
+      ``[1700000000] PROCESS_SERVICE_CHECK_RESULT;host;systemd;2;SYSTEMD
+      CRITICAL - …``
+    """
+    return "[{}] PROCESS_SERVICE_CHECK_RESULT;{};{};{};{}\n".format(
+        int(time.time()), host, service, exitcode, output.replace("\n", "\\n")
+    )
+
+
+def read_batch_specs(path: str) -> list[tuple[str, list[str], str]]:
+    """Read the check specs of ``--batch``. Each line names a check and its
+    command line arguments, for example ``nginx -u nginx.service``. Empty
+    lines and lines starting with ``#`` are skipped.
+
+    :return: The names, the arguments and the errors of the checks. A line
+      that can’t be split, for example because of an unbalanced quote, or
+      that has an empty name gets an error and the name ``line-<number>``, so
+      that only this check fails.
+    """
+    import shlex
+
+    specs: list[tuple[str, list[str], str]] = []
+    with open(path, encoding="utf-8") as specs_file:
+        for number, line in enumerate(specs_file, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                name, *argv = shlex.split(line)
+            except ValueError as e:
+                error = f"Invalid check spec on line {number}: {e}"
+                specs.append((f"line-{number}", [], error))
+                continue
+            if not name:
+                error = f"Empty check name on line {number}"
+                specs.append((f"line-{number}", argv, error))
+                continue
+            specs.append((name, argv, ""))
+    return specs
+
+
+def run_batch(path: str, source: Source) -> None:
+    """Evaluate the check specs of ``--batch`` on the data that the source
+    acquires only once and print one result per spec, either as a JSON
+    line or as a passive check result (``--batch-format``).
+
+    :param path: The path of the file with the check specs.
+    :param source: The source of the data of all checks.
+
+    The data source options of the specs (``--user``, ``--dbus``, …) are
+    ignored: All checks share the source of the batch.
+    """
+    global opts
+    batch_opts = opts
+    parser = get_argparser()
+    checks: list[tuple[str, OptionContainer | None, str]] = []
+    for name, argv, error in read_batch_specs(path):
+        if error:
+            checks.append((name, None, error))
+            continue
+        # The help, the version and the usage errors would be printed
+        # between the results.
+        try:
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                options = parser.parse_args(argv)
+        except SystemExit:
+            checks.append((name, None, f"Invalid arguments: {argv}"))
+            continue
+        checks.append((name, normalize_argparser(options), ""))
+
+    plans = [AcquisitionPlan.from_options(o) for _, o, _ in checks if o is not None]
+    source.prefetch(
+        AcquisitionPlan(
+            units=any(
+                plan.units or plan.unit_names or plan.manager_counters for plan in plans
+            ),
+            manager_counters=any(plan.manager_counters for plan in plans),
+            unit_names=(),
+            startup_time=any(plan.startup_time for plan in plans),
+            timers=any(plan.timers for plan in plans),
+        )
+    )
+
+    host = batch_opts.watch_host
+    if host is None:
+        host = os.uname().nodename
+    try:
+        for name, check_opts, error in checks:
+            if check_opts is None:
+                exitcode, output = 3, f"SYSTEMD UNKNOWN - {error}"
+            else:
+                opts = check_opts
+                exitcode, output = run_check(SharedSource(source))
+            if batch_opts.batch_format == "passive":
+                print(
+                    format_passive_check_result(host, name, exitcode, output),
+                    end="",
+                )
+            else:
+                print(
+                    json.dumps({"name": name, "exitcode": exitcode, "output": output})
+                )
+    finally:
+        opts = batch_opts
+
+
 @nagiosplugin.guarded(verbose=0)  # type: ignore
 def main() -> None:
     """The main entry point of the monitoring plugin. First the command line
@@ -2053,41 +5918,51 @@ def main() -> None:
     logger.verbose("Normalized argparse options: %s", opts)
     logger.verbose("is_dbus: %s", is_dbus)
 
-    source: Source
-    if opts.data_source == "dbus":
-        source = GiSource()
-    else:
-        source = CliSource()
-    source.set_user(opts.user)
-    units = source.units
-
-    if opts.include_unit is not None:
-        unit = source.get_unit(opts.include_unit)
-        units.add(unit.name, unit)
-
-    tasks: list[Union[Resource, Context, Summary]] = [
-        UnitsResource(units),
-        UnitsContext(),
-        SystemdSummary(),
-        StartupTimeResource(source),
-        StartupTimeContext(),
-    ]
+    if opts.daemon or opts.watch is not None:
+        import signal
 
-    if opts.scope_timers:
-        tasks += [
-            TimersResource(source),
-            TimersContext(),
-        ]
+        daemon = Daemon(
+            opts.daemon_socket or Daemon.get_socket_path(opts.user),
+            opts.user,
+            group=opts.daemon_group,
+        )
+        if opts.watch is not None:
+            daemon.set_watcher(
+                Watcher(
+                    daemon,
+                    opts.watch,
+                    opts.watch_host,
+                    opts.watch_service,
+                    opts.watch_interval,
+                )
+            )
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        daemon.run()
+        return
+
+    source: Source | None = None
+    if opts.daemon_socket is not None:
+        # Only on request, so that a daemon doesn’t bypass the data source
+        # chosen by the other options.
+        source = DaemonSource.connect_to(opts.daemon_socket, opts.user)
+    if source is None:
+        if opts.data_source == "dbus":
+            source = GiSource()
+        elif opts.data_source == "wire":
+            source = WireSource()
+        elif opts.data_source == "busctl":
+            source = BusctlSource()
+        else:
+            source = CliSource()
+        source.set_user(opts.user)
+        if opts.cache_dir is not None:
+            source.set_snapshot(Source.Snapshot(opts.cache_dir, opts.cache_ttl))
 
-    if opts.performance_data:
-        tasks += [
-            PerformanceDataResource(units),
-            PerformanceDataContext(),
-        ]
+    if opts.batch is not None:
+        run_batch(opts.batch, source)
+        return
 
-    check = Check(*tasks)
-    check.name = "systemd"
-    check.main(opts.verbose)
+    create_check(source).main(opts.verbose)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+"""Measure the import time of the plugin. Timings depend on the load of the
+machine, so run this test explicitly:
+``pytest tests/_test_import_time.py``."""
+
+from __future__ import annotations
+
+from tests.test_startup import run
+
+BUDGET = 0.5
+"""The cumulative import time of the module ``check_systemd`` in seconds.
+Generous, so that slow test machines don’t fail."""
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """Parse the output of ``python -X importtime``.
+
+    :return: The cumulative import time in seconds per module.
+    """
+    times: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_budget() -> None:
+    times = parse_importtime(
+        run("-X", "importtime", "-c", "import check_systemd").stderr
+    )
+    assert times["check_systemd"] < BUDGET
+
+
+def test_parse_importtime() -> None:
+    assert parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       352 |        352 |             _random\n"
+        "import time:     12500 |     118559 | check_systemd\n"
+    ) == {"_random": 0.000352, "check_systemd": 0.118559}
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import pytest
 
-from check_systemd import CliSource, GiSource, Source
+from check_systemd import CliSource, GiSource, Source, WireSource
 
 
 @pytest.fixture
@@ -17,6 +17,11 @@ def gi() -> GiSource:
     return GiSource()
 
 
+@pytest.fixture
+def wire() -> WireSource:
+    return WireSource()
+
+
 class TestPropertyAllUnits:
     def test_cli(self, cli: Source) -> None:
         assert cli.units.count > 0
@@ -33,6 +38,9 @@ class TestPropertyAllUnits:
         gi.set_user(True)
         assert cli.units.count == gi.units.count
 
+    def test_compare_wire(self, cli: Source, wire: Source) -> None:
+        assert cli.units.count == wire.units.count
+
 
 class TestGetUnit:
     def test_cli(self, cli: Source) -> None:
@@ -79,7 +87,7 @@ class TestPropertyTimers:
 
 class TestClassGiSource:
     class TestClassUnitProxy:
-        unit = GiSource.UnitProxy(name="ssh.service")
+        unit = GiSource.UnitProxy(GiSource.Connection(), name="ssh.service")
 
         def test_property_object_path(self) -> None:
             assert (
@@ -102,7 +110,7 @@ class TestClassGiSource:
             assert self.unit.active_enter_timestamp_monotonic > 0
 
     class TestClassManagerProxy:
-        manager = GiSource.ManagerProxy()
+        manager = GiSource.ManagerProxy(GiSource.Connection())
 
         def test_property_object_path(self) -> None:
             assert self.manager.object_path == "/org/freedesktop/systemd1"
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import io
 import os
+import threading
 import typing
 from contextlib import redirect_stderr, redirect_stdout
 from os import path
@@ -71,6 +72,11 @@ def MPopen(
     if stderr:
         stderr_bytes = convert_to_bytes(stderr)
     mock.communicate.return_value = (stdout_bytes, stderr_bytes)
+    # The pipes are read directly if the output is streamed.
+    mock.stdout = io.BytesIO(stdout_bytes or b"")
+    mock.stderr = io.BytesIO(stderr_bytes or b"")
+    mock.wait.return_value = returncode
+    mock.fixture = stdout or stderr
     return mock
 
 
@@ -93,19 +99,83 @@ def get_mocks_for_popen(*stdout: str) -> list[Mock]:
     return mocks
 
 
+class PopenDispatcher:
+    """Hand out mocked ``subprocess.Popen`` objects by the executed command.
+
+    The commands are executed concurrently and therefore in an unpredictable
+    order. A mock is handed out to a command if the file name of its output
+    starts with the command, for example ``systemctl-list-units_ok.txt`` to
+    ``systemctl list-units --all``. Otherwise the mocks are handed out in the
+    given order.
+
+    Assign an instance of this class to the attribute ``side_effect``.
+    """
+
+    __mocks: list[Mock]
+
+    __lock: threading.Lock
+
+    def __init__(self, mocks: typing.Iterable[Mock]) -> None:
+        self.__mocks = list(mocks)
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def get_command_name(args: typing.Sequence[str]) -> str:
+        """
+        :param args: for example ``['systemctl', 'list-units', '--all']``
+
+        :return: for example ``systemctl-list-units``
+        """
+        words: list[str] = []
+        for arg in args[:2]:
+            if arg.startswith("-"):
+                break
+            words.append(arg)
+        return "-".join(words)
+
+    def __call__(self, args: typing.Sequence[str], *_: object, **__: object) -> Mock:
+        name = PopenDispatcher.get_command_name(args)
+        with self.__lock:
+            if not self.__mocks:
+                raise StopIteration
+            for mock in self.__mocks:
+                fixture = getattr(mock, "fixture", None)
+                if isinstance(fixture, str) and fixture.startswith(name):
+                    break
+            else:
+                mock = self.__mocks[0]
+            self.__mocks.remove(mock)
+            return mock
+
+
 class MockResult:
     """A class to collect all results of a mocked execution of the main
     function."""
 
     __sys_exit: Mock
+    __popen: Mock | None
     __stdout: str | None
     __stderr: str | None
 
-    def __init__(self, sys_exit_mock: Mock, stdout: str, stderr: str) -> None:
+    def __init__(
+        self,
+        sys_exit_mock: Mock,
+        stdout: str,
+        stderr: str,
+        popen_mock: Mock | None = None,
+    ) -> None:
         self.__sys_exit = sys_exit_mock
+        self.__popen = popen_mock
         self.__stdout = stdout
         self.__stderr = stderr
 
+    @property
+    def commands(self) -> list[list[str]]:
+        """The arguments of all calls of the mocked ``subprocess.Popen``."""
+        if self.__popen is None:
+            return []
+        return [list(call[0][0]) for call in self.__popen.call_args_list]
+
     @property
     def stdout(self) -> str | None:
         """The function ``redirect_stdout()`` is used to capture the ``stdout``
@@ -186,7 +256,8 @@ def execute_main(
 
     :param stdout: A list of file names of files in the directory
         ``test/cli_output``. You have to specify as many text files as there
-        are calls of the function ``subprocess.Popen``:
+        are calls of the function ``subprocess.Popen``. The files are
+        assigned to the commands by :class:`PopenDispatcher`:
 
         * Line 334
           ``p = subprocess.Popen(['systemctl', 'list-units', '--all']``,
@@ -214,11 +285,13 @@ def execute_main(
         mock.patch("sys.exit") as sys_exit,
         mock.patch("check_systemd.subprocess.Popen") as Popen,
         mock.patch("sys.argv", argv),
+        # The fixtures are text tables.
+        mock.patch("check_systemd.CliSource.json_output", False),
     ):
         if popen:
-            Popen.side_effect = popen
+            Popen.side_effect = PopenDispatcher(popen)
         else:
-            Popen.side_effect = get_mocks_for_popen(*stdout)
+            Popen.side_effect = PopenDispatcher(get_mocks_for_popen(*stdout))
 
         file_stdout: io.StringIO = io.StringIO()
         file_stderr: io.StringIO = io.StringIO()
@@ -227,6 +300,7 @@ def execute_main(
 
     return MockResult(
         sys_exit_mock=sys_exit,
+        popen_mock=Popen,
         stdout=file_stdout.getvalue(),
         stderr=file_stderr.getvalue(),
     )
@@ -0,0 +1,109 @@
+"""Test the acquisition plan that decides which data is fetched from systemd."""
+
+from __future__ import annotations
+
+from check_systemd import AcquisitionPlan, get_argparser, normalize_argparser
+from tests.helper import execute_main
+
+
+def get_plan(*argv: str) -> AcquisitionPlan:
+    return AcquisitionPlan.from_options(
+        normalize_argparser(get_argparser().parse_args(argv))
+    )
+
+
+class TestFromOptions:
+    def test_default(self) -> None:
+        plan = get_plan()
+        assert plan.units
+        assert plan.unit_names == ()
+        assert plan.startup_time
+        assert not plan.timers
+
+    def test_unit_without_performance_data(self) -> None:
+        plan = get_plan("-u", "nginx.service", "-p")
+        assert not plan.units
+        assert plan.unit_names == ("nginx.service",)
+
+    def test_unit_with_performance_data(self) -> None:
+        plan = get_plan("-u", "nginx.service")
+        assert plan.units
+        assert plan.unit_names == ("nginx.service",)
+
+    def test_units(self) -> None:
+        plan = get_plan("-u", "nginx.service", "ssh", "-u", "nginx", "-p")
+        assert not plan.units
+        assert plan.unit_names == ("nginx.service", "ssh.service")
+
+    def test_unit_with_include(self) -> None:
+        plan = get_plan("-u", "nginx.service", "-I", "ssh.*", "-p")
+        assert plan.units
+
+    def test_no_startup_time_with_performance_data(self) -> None:
+        assert get_plan("-n").startup_time
+
+    def test_no_startup_time_without_performance_data(self) -> None:
+        assert not get_plan("-n", "-p").startup_time
+
+    def test_timers(self) -> None:
+        assert get_plan("-t").timers
+
+    def test_fast(self) -> None:
+        plan = get_plan("--fast")
+        assert plan.manager_counters
+        assert not plan.units
+
+    def test_fast_unit(self) -> None:
+        plan = get_plan("--fast", "-u", "nginx.service")
+        assert not plan.manager_counters
+
+
+class TestCommands:
+    def test_single_show(self) -> None:
+        result = execute_main(
+            argv=["-u", "nginx.service", "-n", "-p"],
+            stdout=["systemctl-show-nginx_active.txt"],
+        )
+        result.assert_ok()
+        result.assert_first_line("SYSTEMD OK - nginx.service: active")
+        assert len(result.commands) == 1
+        assert result.commands[0][:2] == ["systemctl", "show"]
+
+    def test_single_show_for_several_units(self) -> None:
+        result = execute_main(
+            argv=["-u", "nginx.service", "-u", "smartd.service", "-n", "-p"],
+            stdout=["systemctl-show-nginx-smartd.txt"],
+        )
+        result.assert_critical()
+        result.assert_first_line("SYSTEMD CRITICAL - smartd.service: failed")
+        assert result.commands == [
+            [
+                "systemctl",
+                "show",
+                "--property",
+                "Id",
+                "--property",
+                "ActiveState",
+                "--property",
+                "SubState",
+                "--property",
+                "LoadState",
+                "nginx.service",
+                "smartd.service",
+            ]
+        ]
+
+    def test_several_units_ok(self) -> None:
+        result = execute_main(
+            argv=["-u", "nginx.service", "ssh.service", "-n", "-p"],
+            stdout=["systemctl-show-nginx-ssh_active.txt"],
+        )
+        result.assert_ok()
+        result.assert_first_line(
+            "SYSTEMD OK - nginx.service: active, ssh.service: active"
+        )
+
+    def test_no_systemd_analyze(self) -> None:
+        result = execute_main(argv=["-n", "-p"], stdout=["systemctl-list-units_ok.txt"])
+        result.assert_ok()
+        assert result.commands == [["systemctl", "list-units", "--all"]]
@@ -0,0 +1,148 @@
+"""Test the batch mode (--batch): many checks are evaluated on one
+acquisition of the units, the timers and the startup time."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from check_systemd import read_batch_specs
+from tests.helper import MockResult, execute_main
+
+SPECS = """
+# Checks of the host
+all
+smartd -u smartd.service
+setvtrgb -u setvtrgb.service -p
+timers --timers -n -p
+startup -w 10 -e smartd.service
+"""
+
+
+def execute_batch(tmp_path: Path, specs: str, *argv: str) -> MockResult:
+    path = tmp_path / "specs"
+    path.write_text(specs)
+    return execute_main(
+        argv=["--batch", str(path), *argv],
+        stdout=[
+            "systemctl-list-units_failed.txt",
+            "systemd-analyze_12.345.txt",
+            "systemctl-list-timers_1.txt",
+        ],
+    )
+
+
+def read_results(result: MockResult) -> dict[str, dict[str, Any]]:
+    assert result.stdout is not None
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    return {result["name"]: result for result in results}
+
+
+class TestReadBatchSpecs:
+    def test_specs(self, tmp_path: Path) -> None:
+        path = tmp_path / "specs"
+        path.write_text(SPECS + "quoted -I 'nginx\\.service' \n")
+        assert read_batch_specs(str(path)) == [
+            ("all", [], ""),
+            ("smartd", ["-u", "smartd.service"], ""),
+            ("setvtrgb", ["-u", "setvtrgb.service", "-p"], ""),
+            ("timers", ["--timers", "-n", "-p"], ""),
+            ("startup", ["-w", "10", "-e", "smartd.service"], ""),
+            ("quoted", ["-I", "nginx\\.service"], ""),
+        ]
+
+    def test_invalid_lines(self, tmp_path: Path) -> None:
+        path = tmp_path / "specs"
+        path.write_text("all\nbad -I 'nginx\n'' -u nginx\n")
+        assert read_batch_specs(str(path)) == [
+            ("all", [], ""),
+            ("line-2", [], "Invalid check spec on line 2: No closing quotation"),
+            ("line-3", ["-u", "nginx"], "Empty check name on line 3"),
+        ]
+
+
+class TestBatch:
+    def test_one_acquisition(self, tmp_path: Path) -> None:
+        result = execute_batch(tmp_path, SPECS)
+        assert sorted(command[:2] for command in result.commands) == [
+            ["systemctl", "list-timers"],
+            ["systemctl", "list-units"],
+            ["systemd-analyze"],
+        ]
+
+    def test_results(self, tmp_path: Path) -> None:
+        results = read_results(execute_batch(tmp_path, SPECS))
+        assert list(results) == ["all", "smartd", "setvtrgb", "timers", "startup"]
+        assert results["all"]["exitcode"] == 2
+        assert results["all"]["output"].startswith(
+            "SYSTEMD CRITICAL - smartd.service: failed | "
+        )
+        assert results["smartd"]["exitcode"] == 2
+        assert results["setvtrgb"] == {
+            "name": "setvtrgb",
+            "exitcode": 0,
+            "output": "SYSTEMD OK - setvtrgb.service: active",
+        }
+        assert "phpsessionclean.timer" in results["timers"]["output"]
+        assert results["startup"]["exitcode"] == 1
+        assert "startup_time" in results["startup"]["output"]
+
+    def test_several_units(self, tmp_path: Path) -> None:
+        results = read_results(
+            execute_batch(tmp_path, "units -u setvtrgb rtkit-daemon.service -p -n\n")
+        )
+        assert results["units"] == {
+            "name": "units",
+            "exitcode": 0,
+            "output": "SYSTEMD OK - rtkit-daemon.service: inactive, "
+            "setvtrgb.service: active",
+        }
+
+    def test_invalid_spec(self, tmp_path: Path) -> None:
+        # sys.exit() is patched by execute_main().
+        with patch("argparse.ArgumentParser.error", side_effect=SystemExit(2)):
+            result = execute_batch(tmp_path, "bad --no-such-option\nall\n")
+        results = read_results(result)
+        assert results["bad"]["exitcode"] == 3
+        assert "Invalid arguments" in results["bad"]["output"]
+        assert results["all"]["exitcode"] == 2
+
+    @pytest.mark.parametrize("option", ["--help", "--version", "-h", "-V"])
+    def test_help_version(self, tmp_path: Path, option: str) -> None:
+        # sys.exit() is patched by execute_main().
+        with patch("argparse.ArgumentParser.exit", side_effect=SystemExit(0)):
+            result = execute_batch(tmp_path, f"bad {option}\nall\n")
+        results = read_results(result)
+        assert list(results) == ["bad", "all"]
+        assert results["bad"]["exitcode"] == 3
+        assert "Invalid arguments" in results["bad"]["output"]
+        assert results["all"]["exitcode"] == 2
+
+    def test_unbalanced_quote(self, tmp_path: Path) -> None:
+        results = read_results(execute_batch(tmp_path, "bad -I 'nginx\nall\n"))
+        assert results["line-1"] == {
+            "name": "line-1",
+            "exitcode": 3,
+            "output": "SYSTEMD UNKNOWN - Invalid check spec on line 1: "
+            "No closing quotation",
+        }
+        assert results["all"]["exitcode"] == 2
+
+    def test_passive(self, tmp_path: Path) -> None:
+        with patch("check_systemd.time.time", return_value=1_700_000_000):
+            result = execute_batch(
+                tmp_path,
+                "setvtrgb -u setvtrgb.service -p\n",
+                "--batch-format",
+                "passive",
+                "--watch-host",
+                "example.com",
+            )
+        assert result.stdout == (
+            "[1700000000] PROCESS_SERVICE_CHECK_RESULT;example.com;setvtrgb;0;"
+            "SYSTEMD OK - setvtrgb.service: active\n"
+        )
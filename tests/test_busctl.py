@@ -0,0 +1,241 @@
+"""Test the data source that uses the command line client ``busctl``."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from check_systemd import BusctlSource, CheckSystemdError
+from tests.helper import MPopen, execute_main
+
+Connection = BusctlSource.Connection
+
+UNIT_PATH = "/org/freedesktop/systemd1/unit/nginx_2eservice"
+
+
+def variant(type: str, data: Any) -> dict[str, Any]:
+    return {"type": type, "data": data}
+
+
+class TestFormatArguments:
+    def test_string(self) -> None:
+        assert Connection.format_arguments("s", ("nginx.service",)) == ["nginx.service"]
+
+    def test_arrays(self) -> None:
+        assert Connection.format_arguments("asas", ([], ["*.timer", "*.service"])) == [
+            "0",
+            "2",
+            "*.timer",
+            "*.service",
+        ]
+
+    def test_boolean(self) -> None:
+        assert Connection.format_arguments("bu", (True, 3)) == ["true", "3"]
+
+    def test_unsupported(self) -> None:
+        with pytest.raises(ValueError, match="a{sv}"):
+            Connection.format_arguments("a{sv}", ({},))
+
+
+class TestConvert:
+    def test_variant(self) -> None:
+        assert Connection.convert("v", variant("t", 123)) == 123
+
+    def test_dict_of_variants(self) -> None:
+        assert Connection.convert(
+            "a{sv}", {"Id": variant("s", "a.service"), "Names": variant("as", ["a"])}
+        ) == {"Id": "a.service", "Names": ["a"]}
+
+    def test_array_of_structures(self) -> None:
+        assert Connection.convert(
+            "a(sso)", [["a.service", "loaded", "/a"], ["b.service", "masked", "/b"]]
+        ) == [("a.service", "loaded", "/a"), ("b.service", "masked", "/b")]
+
+
+def execute_cli(args: Sequence[str]) -> str | None:
+    """Answer the ``busctl`` commands that are needed for ``-u nginx.service``."""
+    args = list(args)
+    assert args[:2] in (["busctl", "call"], ["busctl", "get-property"])
+    assert "--json=short" in args
+    verb = args[1]
+    _, _, *rest = args[args.index("org.freedesktop.systemd1") + 1 :]
+    if verb == "call":
+        method = rest[0]
+        if method == "LoadUnit":
+            return json.dumps(variant("o", [UNIT_PATH]))
+        if method == "GetDefaultTarget":
+            return json.dumps(variant("s", ["graphical.target"]))
+        if method == "GetUnit":
+            return json.dumps(
+                variant("o", ["/org/freedesktop/systemd1/unit/graphical_2etarget"])
+            )
+        if method == "GetAll":
+            return json.dumps(
+                variant(
+                    "a{sv}",
+                    [
+                        {
+                            "Id": variant("s", "nginx.service"),
+                            "ActiveState": variant("s", "failed"),
+                            "SubState": variant("s", "failed"),
+                            "LoadState": variant("s", "loaded"),
+                        }
+                    ],
+                )
+            )
+        if method == "ListUnits":
+            return json.dumps(
+                variant(
+                    "a(ssssssouso)",
+                    [
+                        [
+                            [
+                                "ssh.service",
+                                "OpenBSD Secure Shell server",
+                                "loaded",
+                                "active",
+                                "running",
+                                "",
+                                "/org/freedesktop/systemd1/unit/ssh_2eservice",
+                                0,
+                                "",
+                                "/",
+                            ]
+                        ]
+                    ],
+                )
+            )
+    else:
+        properties = {
+            "DefaultTarget": variant("s", "graphical.target"),
+            "UserspaceTimestampMonotonic": variant("t", 2_000_000),
+            "ActiveEnterTimestampMonotonic": variant("t", 14_345_000),
+        }
+        return "\n".join(json.dumps(properties[name]) for name in rest)
+    raise AssertionError(args)
+
+
+class TestCall:
+    def test_no_output(self) -> None:
+        with patch("check_systemd.CliSource.execute_cli", return_value=None):
+            assert Connection().call("/", "org.a", "Reload") == ()
+
+    def test_command(self) -> None:
+        with patch(
+            "check_systemd.CliSource.execute_cli",
+            return_value='{"type":"a(ssssssouso)","data":[[]]}',
+        ) as execute:
+            assert Connection(user=True).call(
+                "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager",
+                "ListUnitsByPatterns",
+                "(asas)",
+                [],
+                ["*.timer"],
+            ) == ([],)
+        execute.assert_called_once_with(
+            [
+                "busctl",
+                "call",
+                "--json=short",
+                "--timeout=10.0",
+                "--user",
+                "org.freedesktop.systemd1",
+                "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager",
+                "ListUnitsByPatterns",
+                "asas",
+                "0",
+                "1",
+                "*.timer",
+            ]
+        )
+
+
+class TestGetMany:
+    def test_one_process_per_object(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [
+                MPopen(stdout='{"type":"t","data":1}\n{"type":"t","data":2}\n'),
+                MPopen(returncode=1, stderr="Failed to get property"),
+            ]
+            values = Connection().get_many(
+                [
+                    ("/a", "org.a", "Last"),
+                    ("/b", "org.a", "Last"),
+                    ("/a", "org.a", "Next"),
+                ]
+            )
+        assert values == [1, None, 2]
+        assert Popen.call_count == 2
+        assert Popen.call_args_list[0][0][0][-3:] == ["org.a", "Last", "Next"]
+
+    def test_limited_processes(self) -> None:
+        # The number of running processes and their maximum
+        running: list[int] = [0, 0]
+
+        def communicate() -> tuple[bytes, None]:
+            running[0] -= 1
+            return (b'{"type":"t","data":1}\n', None)
+
+        def popen(*args: object, **kwargs: object) -> Any:
+            running[0] += 1
+            running[1] = max(running)
+            process = MPopen()
+            process.communicate.side_effect = communicate
+            return process
+
+        with patch("check_systemd.subprocess.Popen", side_effect=popen) as Popen:
+            values = Connection().get_many(
+                [(f"/{index}", "org.a", "Last") for index in range(20)]
+            )
+        assert values == [1] * 20
+        assert Popen.call_count == 20
+        assert running == [0, Connection.MAX_PROCESSES]
+
+
+class TestGetUnits:
+    def test_one_process(self) -> None:
+        names = [f"unit-{index}.service" for index in range(40)]
+        reply = variant(
+            "a(ssssssouso)",
+            [
+                [
+                    [name, "", "loaded", "active", "running", "", "/", 0, "", "/"]
+                    for name in names
+                ]
+            ],
+        )
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [MPopen(stdout=json.dumps(reply))]
+            units = BusctlSource().get_units(names)
+        assert [unit.name for unit in units] == names
+        assert Popen.call_count == 1
+        assert Popen.call_args[0][0][-43:-40] == [
+            "ListUnitsByNames",
+            "as",
+            "40",
+        ]
+
+
+class TestEndToEnd:
+    def test_unit(self) -> None:
+        with patch("check_systemd.CliSource.execute_cli", side_effect=execute_cli):
+            result = execute_main(argv=["--busctl", "-u", "nginx.service"], stdout=[])
+        result.assert_critical()
+        assert result.output.startswith("SYSTEMD CRITICAL - nginx.service: failed")
+        assert "startup_time=12.3" in result.output
+
+    def test_not_found(self) -> None:
+        with (
+            patch(
+                "check_systemd.CliSource.execute_cli",
+                side_effect=CheckSystemdError("Call failed: Unit x.service not found."),
+            ),
+            pytest.raises(CheckSystemdError, match="couldn't be found"),
+        ):
+            BusctlSource().get_unit("x.service")
@@ -0,0 +1,115 @@
+"""Test the concurrent acquisition of units, timers and the startup time."""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Sequence
+from unittest.mock import Mock, patch
+
+import pytest
+
+from check_systemd import AcquisitionPlan, CliSource, GiSource
+from tests.helper import MPopen, PopenDispatcher, execute_main
+
+
+def get_plan(**kwargs: object) -> AcquisitionPlan:
+    options: dict[str, object] = {
+        "units": True,
+        "manager_counters": False,
+        "unit_names": (),
+        "startup_time": True,
+        "timers": True,
+    }
+    options.update(kwargs)
+    return AcquisitionPlan(**options)  # type: ignore
+
+
+class BarrierPopenDispatcher(PopenDispatcher):
+    """Only hand out the mocked ``subprocess.Popen`` objects if all
+    commands are started at the same time."""
+
+    def __init__(self, barrier: threading.Barrier, *stdout: str) -> None:
+        super().__init__(MPopen(stdout=out) for out in stdout)
+        self.barrier = barrier
+
+    def __call__(self, args: Sequence[str], *_: object, **__: object) -> Mock:
+        self.barrier.wait(timeout=5)
+        return super().__call__(args)
+
+
+class TestPrefetch:
+    def test_concurrent(self) -> None:
+        barrier = threading.Barrier(3)
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = BarrierPopenDispatcher(
+                barrier,
+                "systemctl-list-units_ok.txt",
+                "systemd-analyze_12.345.txt",
+                "systemctl-list-timers_ok.txt",
+            )
+            source = CliSource()
+            source.prefetch(get_plan())
+            assert Popen.call_count == 3
+            assert source.units.count == 386
+            assert source.startup_time == 12.3
+            assert len(list(source.timers)) == 4
+            assert Popen.call_count == 3
+
+    def test_sequential(self) -> None:
+        source = CliSource()
+        source.concurrent = False
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            source.prefetch(get_plan())
+            Popen.assert_not_called()
+
+    def test_not_concurrent_dbus(self) -> None:
+        assert not GiSource.concurrent
+
+    def test_exception_on_access(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = PopenDispatcher(
+                (
+                    MPopen(returncode=1, stdout="systemctl-list-units_ok.txt"),
+                    MPopen(stdout="systemd-analyze_12.345.txt"),
+                    MPopen(stdout="systemctl-list-timers_ok.txt"),
+                )
+            )
+            source = CliSource()
+            # Don’t retry the failing command without --output=json
+            source.json_output = False
+            # No exception
+            source.prefetch(get_plan())
+            assert source.startup_time == 12.3
+            with pytest.raises(Exception, match="none-zero return code"):
+                list(source.units)
+            assert Popen.call_count == 3
+
+
+class TestMemoize:
+    def test_get_unit(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [MPopen(stdout="systemctl-show-nginx_active.txt")]
+            source = CliSource()
+            assert source.get_unit("nginx.service") is source.get_unit("nginx.service")
+            assert Popen.call_count == 1
+
+
+class TestTimingBreakdown:
+    def test_debug(self, caplog: pytest.LogCaptureFixture) -> None:
+        result = execute_main(
+            argv=["--timers", "-dd"],
+            stdout=[
+                "systemctl-list-units_ok.txt",
+                "systemd-analyze_12.345.txt",
+                "systemctl-list-timers_ok.txt",
+            ],
+        )
+        result.assert_ok()
+        # Remove the colors
+        output = re.sub("\x1b\\[[0-9;]*m", "", caplog.text)
+        # The units are evaluated by the digest while they are listed.
+        assert "Acquire 'digest' in" in output
+        assert "Acquire 'startup_time' in" in output
+        assert "Acquire 'timers' in" in output
+        assert "Acquire units, startup_time, timers concurrently in" in output
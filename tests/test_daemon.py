@@ -0,0 +1,592 @@
+"""Test the daemon mode (--daemon): the units are kept current by the D-Bus
+signals of systemd and the checks ask the daemon over a unix socket."""
+
+from __future__ import annotations
+
+import os
+import socket
+import stat
+import threading
+import time
+from collections.abc import Generator, Sequence
+from contextlib import suppress
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+from check_systemd import (
+    CheckSystemdError,
+    Daemon,
+    DaemonSource,
+    Source,
+    Watcher,
+    WireSource,
+    get_argparser,
+    normalize_argparser,
+)
+from tests.helper import execute_main
+from tests.test_wire import FakeBus, connect
+
+NGINX = "/org/freedesktop/systemd1/unit/nginx_2eservice"
+
+SSH = "/org/freedesktop/systemd1/unit/ssh_2eservice"
+
+METHODS: dict[tuple[str, tuple[Any, ...]], tuple[str, tuple[Any, ...]]] = {
+    ("Subscribe", ()): ("", ()),
+    **{("AddMatch", (rule,)): ("", ()) for rule in Daemon.MATCH_RULES},
+}
+"""The calls of the daemon in addition to the calls of the data source
+``--wire``."""
+
+
+def signal(member: str, object_path: str, *body: Any) -> WireSource.Message:
+    return WireSource.Message(4, 1000, {1: object_path, 3: member}, body)
+
+
+def properties_changed(
+    object_path: str, changed: dict[str, Any], invalidated: Sequence[str] = ()
+) -> WireSource.Message:
+    return signal(
+        "PropertiesChanged",
+        object_path,
+        "org.freedesktop.systemd1.Unit",
+        changed,
+        invalidated,
+    )
+
+
+def get_states(daemon: Daemon) -> dict[str, tuple[str, str, str]]:
+    return {
+        unit.name: (unit.active_state, unit.sub_state, unit.load_state)
+        for unit in daemon.units
+    }
+
+
+@pytest.fixture
+def bus(tmp_path: Path) -> Generator[FakeBus, None, None]:
+    with patch.dict("tests.test_wire.METHODS", METHODS):
+        yield FakeBus(tmp_path / "bus")
+
+
+@pytest.fixture
+def daemon(bus: FakeBus, tmp_path: Path) -> Daemon:
+    daemon = Daemon(str(tmp_path / "daemon.sock"), connection=connect(bus))
+    daemon.load()
+    return daemon
+
+
+@pytest.fixture
+def running(daemon: Daemon, tmp_path: Path) -> Generator[Path, None, None]:
+    """A daemon serving the checks in a thread.
+
+    :return: The path of its socket.
+    """
+    path = tmp_path / "daemon.sock"
+    with patch.object(Daemon, "TIMEOUT", 0.01):
+        thread = threading.Thread(target=daemon.run, daemon=True)
+        thread.start()
+        for _ in range(500):
+            if path.exists():
+                break
+            time.sleep(0.01)
+        yield path
+        daemon.stop()
+        thread.join()
+    assert not path.exists()
+
+
+class TestConnectionSignals:
+    def test_queued_while_waiting(self, bus: FakeBus) -> None:
+        connection = connect(bus)
+        signals = connection.pop_signals()
+        assert [message.fields[3] for message in signals] == ["NameAcquired"]
+        assert connection.pop_signals() == []
+
+    def test_receive_signals(self) -> None:
+        ours, theirs = socket.socketpair()
+        connection = WireSource.Connection()
+        connection._Connection__socket = ours  # type: ignore
+        message = FakeBus.build_message(
+            4,
+            [(1, ("o", SSH)), (3, ("s", "UnitRemoved"))],
+            ("so", ("ssh.service", SSH)),
+        )
+        theirs.sendall(message[:20])
+        assert connection.receive_signals() == []
+        theirs.sendall(message[20:] + message)
+        signals = connection.receive_signals()
+        assert [message.body for message in signals] == [("ssh.service", SSH)] * 2
+
+    def test_closed(self) -> None:
+        ours, theirs = socket.socketpair()
+        connection = WireSource.Connection()
+        connection._Connection__socket = ours  # type: ignore
+        theirs.close()
+        with pytest.raises(CheckSystemdError, match="closed"):
+            connection.receive_signals()
+
+
+class TestDaemon:
+    def test_load(self, daemon: Daemon, bus: FakeBus) -> None:
+        assert [call[0] for call in bus.calls] == [
+            "Hello",
+            "AddMatch",
+            "AddMatch",
+            "Subscribe",
+            "ListUnits",
+        ]
+        assert get_states(daemon) == {
+            "fstrim.timer": ("active", "waiting", "loaded"),
+            "nginx.service": ("failed", "failed", "loaded"),
+            "ssh.service": ("active", "running", "loaded"),
+        }
+
+    def test_properties_changed(self, daemon: Daemon, bus: FakeBus) -> None:
+        daemon.handle_signal(
+            properties_changed(SSH, {"ActiveState": "failed", "SubState": "failed"})
+        )
+        assert get_states(daemon)["ssh.service"] == ("failed", "failed", "loaded")
+        # No call: the values are part of the signal.
+        assert bus.calls[-1][0] == "ListUnits"
+
+    def test_properties_invalidated(self, daemon: Daemon, bus: FakeBus) -> None:
+        with patch.dict(
+            "tests.test_wire.SERVICE_PROPERTIES",
+            {"ActiveState": ("s", "active"), "SubState": ("s", "running")},
+        ):
+            daemon.handle_signal(properties_changed(NGINX, {}, ["ActiveState"]))
+        assert bus.calls[-1] == ("GetAll", ("org.freedesktop.systemd1.Unit",))
+        assert get_states(daemon)["nginx.service"] == ("active", "running", "loaded")
+
+    def test_other_properties(self, daemon: Daemon, bus: FakeBus) -> None:
+        daemon.handle_signal(properties_changed(SSH, {"NRestarts": 1}, ["Result"]))
+        assert bus.calls[-1][0] == "ListUnits"
+
+    def test_unknown_object_path(self, daemon: Daemon) -> None:
+        daemon.handle_signal(
+            properties_changed(
+                "/org/freedesktop/systemd1/unit/cron_2eservice",
+                {"ActiveState": "active"},
+            )
+        )
+        assert daemon.units.count == 3
+
+    def test_invalid_state(self, daemon: Daemon) -> None:
+        daemon.handle_signal(properties_changed(SSH, {"ActiveState": "unknown"}))
+        assert get_states(daemon)["ssh.service"] == ("active", "running", "loaded")
+
+    def test_unit_removed_and_new(self, daemon: Daemon) -> None:
+        daemon.handle_signal(signal("UnitRemoved", "/", "nginx.service", NGINX))
+        assert "nginx.service" not in daemon.units
+        assert daemon.units.count == 2
+        daemon.handle_signal(signal("UnitNew", "/", "nginx.service", NGINX))
+        assert get_states(daemon)["nginx.service"] == ("failed", "failed", "loaded")
+
+    def test_job_removed(self, daemon: Daemon, bus: FakeBus) -> None:
+        daemon.handle_signal(
+            signal("JobRemoved", "/", 7, "/job/7", "nginx.service", "done")
+        )
+        assert bus.calls[-1][0] == "GetAll"
+
+    def test_reloading(self, daemon: Daemon, bus: FakeBus) -> None:
+        daemon.handle_signal(signal("Reloading", "/", True))
+        assert bus.calls[-1][0] == "ListUnits"
+        assert len(bus.calls) == 5
+        daemon.handle_signal(signal("Reloading", "/", False))
+        assert len(bus.calls) == 6
+
+
+class TestAnswer:
+    def list_units(self, daemon: Daemon, *selection: list[str]) -> list[str]:
+        rows = daemon.answer({"method": "list_units", "selection": selection})
+        return [row[0] for row in rows]
+
+    def test_all(self, daemon: Daemon) -> None:
+        assert self.list_units(daemon, [], [], []) == [
+            "fstrim.timer",
+            "nginx.service",
+            "ssh.service",
+        ]
+
+    def test_selection(self, daemon: Daemon) -> None:
+        assert self.list_units(daemon, ["ssh*"], [], []) == ["ssh.service"]
+        assert self.list_units(daemon, [], ["timer"], []) == ["fstrim.timer"]
+        assert self.list_units(daemon, [], [], ["failed"]) == ["nginx.service"]
+        assert self.list_units(daemon, ["*.service"], [], ["running"]) == [
+            "ssh.service"
+        ]
+
+    def test_get_unit_from_memory(self, daemon: Daemon, bus: FakeBus) -> None:
+        assert daemon.answer({"method": "get_unit", "name": "ssh.service"}) == (
+            "ssh.service",
+            "active",
+            "running",
+            "loaded",
+        )
+        assert bus.calls[-1][0] == "ListUnits"
+
+    def test_get_unit_not_loaded(self, daemon: Daemon, bus: FakeBus) -> None:
+        daemon.handle_signal(signal("UnitRemoved", "/", "nginx.service", NGINX))
+        assert daemon.answer({"method": "get_unit", "name": "nginx.service"})[1] == (
+            "failed"
+        )
+        assert bus.calls[-2] == ("LoadUnit", ("nginx.service",))
+
+    def test_get_units_from_memory(self, daemon: Daemon, bus: FakeBus) -> None:
+        assert daemon.answer(
+            {"method": "get_units", "names": ["ssh.service", "nginx.service"]}
+        ) == [
+            ("ssh.service", "active", "running", "loaded"),
+            ("nginx.service", "failed", "failed", "loaded"),
+        ]
+        assert bus.calls[-1][0] == "ListUnits"
+
+    def test_startup_time_once(self, daemon: Daemon, bus: FakeBus) -> None:
+        assert daemon.answer({"method": "startup_time"}) == 12.3
+        calls = len(bus.calls)
+        assert daemon.answer({"method": "startup_time"}) == 12.3
+        assert len(bus.calls) == calls
+
+    def test_unknown_method(self, daemon: Daemon) -> None:
+        with pytest.raises(CheckSystemdError, match="Unknown method 'reboot'"):
+            daemon.answer({"method": "reboot"})
+
+
+class TestDaemonSource:
+    def test_check(self, running: Path) -> None:
+        result = execute_main(argv=["--daemon-socket", str(running)], stdout=[])
+        result.assert_critical()
+        assert result.first_line is not None
+        assert result.first_line.startswith("SYSTEMD CRITICAL - nginx.service: failed")
+        assert "startup_time=12.3;60;120" in result.output
+        assert result.commands == []
+
+    def test_verbose(self, running: Path) -> None:
+        result = execute_main(argv=["--daemon-socket", str(running), "-v"], stdout=[])
+        assert f"answered by the daemon on '{running}'" in result.output
+
+    def test_timers(self, running: Path) -> None:
+        result = execute_main(
+            argv=["--daemon-socket", str(running), "--timers", "-n"], stdout=[]
+        )
+        result.assert_critical()
+        assert result.commands == []
+
+    def test_unit(self, running: Path) -> None:
+        result = execute_main(
+            argv=["--daemon-socket", str(running), "-u", "ssh.service"], stdout=[]
+        )
+        result.assert_ok()
+
+    def test_error(self, running: Path) -> None:
+        source = DaemonSource.connect_to(str(running))
+        assert source is not None
+        with pytest.raises(CheckSystemdError, match="Unknown method"):
+            source._DaemonSource__request("reboot")  # type: ignore
+
+    def test_other_bus(self, running: Path) -> None:
+        assert DaemonSource.connect_to(str(running), user=True) is None
+
+    def test_units(self, running: Path) -> None:
+        source = DaemonSource.connect_to(str(running))
+        assert source is not None
+        source.set_selection(Source.Selection(types=("timer",)))
+        assert [unit.name for unit in source.units] == ["fstrim.timer"]
+
+
+class TestClients:
+    def test_mode(self, running: Path) -> None:
+        assert stat.S_IMODE(os.stat(running).st_mode) == 0o660
+
+    def test_group(self, tmp_path: Path) -> None:
+        path = tmp_path / "check_systemd" / "daemon.sock"
+        daemon = Daemon(str(path), connection=Mock(), group="nagios")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with (
+            patch("grp.getgrnam", return_value=Mock(gr_gid=1234)) as getgrnam,
+            patch("os.chown") as chown,
+        ):
+            daemon._Daemon__bind(server)  # type: ignore
+        server.close()
+        getgrnam.assert_called_with("nagios")
+        assert [call.args for call in chown.call_args_list] == [
+            (str(path.parent), -1, 1234),
+            (str(path), -1, 1234),
+        ]
+        assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o750
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+
+    def test_group_existing_directory(self, tmp_path: Path) -> None:
+        path = tmp_path / "check_systemd" / "daemon.sock"
+        path.parent.mkdir(mode=0o700)
+        daemon = Daemon(str(path), connection=Mock(), group="nagios")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with (
+            patch("grp.getgrnam", return_value=Mock(gr_gid=1234)),
+            patch("os.chown") as chown,
+        ):
+            daemon._Daemon__bind(server)  # type: ignore
+        server.close()
+        chown.assert_any_call(str(path.parent), -1, 1234)
+        assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o750
+
+    def test_group_foreign_directory(self, tmp_path: Path) -> None:
+        path = tmp_path / "daemon.sock"
+        tmp_path.chmod(0o1777)
+        daemon = Daemon(str(path), connection=Mock(), group="nagios")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with (
+            patch("grp.getgrnam", return_value=Mock(gr_gid=1234)),
+            patch("os.chown") as chown,
+        ):
+            daemon._Daemon__bind(server)  # type: ignore
+        server.close()
+        assert [call.args for call in chown.call_args_list] == [(str(path), -1, 1234)]
+        assert stat.S_IMODE(os.stat(tmp_path).st_mode) == 0o1777
+
+    def test_stale_socket(self, tmp_path: Path) -> None:
+        path = tmp_path / "daemon.sock"
+        for _ in range(2):
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            Daemon(str(path), connection=Mock())._Daemon__bind(server)  # type: ignore
+            server.close()
+        assert stat.S_ISSOCK(os.lstat(path).st_mode)
+
+    def test_no_socket(self, tmp_path: Path) -> None:
+        path = tmp_path / "daemon.sock"
+        path.write_text("data")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with pytest.raises(CheckSystemdError, match="isn't a socket"):
+            Daemon(str(path), connection=Mock())._Daemon__bind(server)  # type: ignore
+        server.close()
+        assert path.read_text() == "data"
+
+    def test_pipelined_requests(self, running: Path) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(5)
+            client.connect(str(running))
+            client.sendall(b'{"method": "hello"}\n' * 3)
+            replies = b""
+            while replies.count(b"\n") < 3:
+                replies += client.recv(65536)
+        assert replies.count(b'"result"') == 3
+
+    def test_request_too_long(self, running: Path) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(5)
+            client.connect(str(running))
+            client.sendall(b"x" * (Daemon.MAX_REQUEST + 1))
+            assert client.recv(65536) == b""
+        assert DaemonSource.connect_to(str(running)) is not None
+
+    def test_client_not_reading(self, running: Path) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(running))
+            client.setblocking(False)
+            try:
+                for _ in range(10_000):
+                    client.send(b'{"method": "list_units", "selection": []}\n' * 100)
+            except (BlockingIOError, ConnectionError):
+                # The daemon disconnects the client once its pending requests
+                # exceed MAX_REQUEST.
+                pass
+            # The other checks are still answered.
+            source = DaemonSource.connect_to(str(running))
+            assert source is not None
+            assert source.startup_time == 12.3
+
+
+class TestFallback:
+    def test_only_on_request(self, running: Path) -> None:
+        # A daemon on the default path doesn’t bypass the chosen data source.
+        with patch("check_systemd.Daemon.get_socket_path", return_value=str(running)):
+            result = execute_main(argv=[])
+        result.assert_ok()
+        assert result.commands[0][:2] == ["systemctl", "list-units"]
+
+    def test_no_daemon(self, tmp_path: Path) -> None:
+        result = execute_main(argv=["--daemon-socket", str(tmp_path / "missing")])
+        result.assert_ok()
+        assert result.commands[0][:2] == ["systemctl", "list-units"]
+
+    def test_stale_socket(self, tmp_path: Path) -> None:
+        path = tmp_path / "daemon.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(path))
+        server.close()
+        assert DaemonSource.connect_to(str(path)) is None
+        result = execute_main(argv=["--daemon-socket", str(path)])
+        result.assert_ok()
+
+
+def read_until(fd: int, text: str) -> str:
+    """Read from a named pipe until a line contains the text.
+
+    :return: The line
+    """
+    data = b""
+    for _ in range(500):
+        try:
+            data += os.read(fd, 4096)
+        except BlockingIOError:
+            pass
+        for line in data.decode().splitlines():
+            if text in line:
+                return line
+        time.sleep(0.01)
+    raise AssertionError(f"No line with '{text}' in {data!r}")
+
+
+@pytest.fixture
+def default_opts() -> Generator[None, None, None]:
+    with patch(
+        "check_systemd.opts", normalize_argparser(get_argparser().parse_args([]))
+    ):
+        yield
+
+
+class TestWatcher:
+    def test_format_command(self, daemon: Daemon) -> None:
+        watcher = Watcher(daemon, "/dev/null", host="example.com")
+        with patch("check_systemd.time.time", return_value=1_700_000_000.5):
+            assert watcher.format_command(2, "SYSTEMD CRITICAL - a\nb") == (
+                "[1700000000] PROCESS_SERVICE_CHECK_RESULT;example.com;systemd;2;"
+                "SYSTEMD CRITICAL - a\\nb\n"
+            )
+
+    def test_default_host(self, daemon: Daemon) -> None:
+        watcher = Watcher(daemon, "/dev/null")
+        assert f";{os.uname().nodename};" in watcher.format_command(0, "")
+
+    def test_check(self, daemon: Daemon, default_opts: None) -> None:
+        exitcode, output = Watcher(daemon, "/dev/null").check()
+        assert exitcode == 2
+        assert output.startswith("SYSTEMD CRITICAL - nginx.service: failed | ")
+        assert "count_units=3" in output
+        assert "\n" not in output
+
+    def test_check_error(self, daemon: Daemon, default_opts: None) -> None:
+        with patch("check_systemd.create_check", side_effect=CheckSystemdError("x")):
+            assert Watcher(daemon, "/dev/null").check() == (3, "SYSTEMD UNKNOWN - x")
+
+    def test_update(self, daemon: Daemon) -> None:
+        watcher = Watcher(daemon, "/dev/null", interval=60)
+        with (
+            patch.object(watcher, "submit", wraps=watcher.submit) as submit,
+            patch.object(watcher, "check", return_value=(0, "OK")),
+        ):
+            watcher.update(False)
+            watcher.update(False)
+            assert submit.call_count == 1
+            watcher.update(True)
+            assert submit.call_count == 2
+
+    def test_regular_file(
+        self, daemon: Daemon, default_opts: None, tmp_path: Path
+    ) -> None:
+        path = tmp_path / "icinga2.cmd"
+        path.touch()
+        watcher = Watcher(daemon, str(path), host="host")
+        watcher.submit()
+        watcher.submit()
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        assert ";host;systemd;2;SYSTEMD CRITICAL" in lines[0]
+
+    def test_no_command_file(self, daemon: Daemon, tmp_path: Path) -> None:
+        path = tmp_path / "icinga2.cmd"
+        with patch.object(Watcher, "check", return_value=(0, "OK")):
+            Watcher(daemon, str(path)).submit()
+        assert not path.exists()
+
+    def test_no_reader(self, daemon: Daemon, tmp_path: Path) -> None:
+        path = tmp_path / "icinga2.cmd"
+        os.mkfifo(path)
+        with patch.object(Watcher, "check", return_value=(0, "OK")):
+            # Dropped without blocking
+            Watcher(daemon, str(path)).submit()
+
+    def test_full_pipe(self, daemon: Daemon, tmp_path: Path) -> None:
+        path = tmp_path / "icinga2.cmd"
+        os.mkfifo(path)
+        reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        writer = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            # Leave less space in the pipe than one command needs.
+            with pytest.raises(BlockingIOError):
+                while True:
+                    os.write(writer, b"x")
+            os.read(reader, 10)
+            with patch.object(Watcher, "check", return_value=(0, "OK")):
+                Watcher(daemon, str(path)).submit()
+            data = b""
+            with suppress(BlockingIOError):
+                while chunk := os.read(reader, 65536):
+                    data += chunk
+            assert b"PROCESS_SERVICE_CHECK_RESULT" not in data
+        finally:
+            os.close(writer)
+            os.close(reader)
+
+    def test_too_long(self, daemon: Daemon, tmp_path: Path) -> None:
+        path = tmp_path / "icinga2.cmd"
+        path.touch()
+        with patch.object(Watcher, "check", return_value=(0, "x" * 10_000)):
+            Watcher(daemon, str(path)).submit()
+        assert path.read_text() == ""
+
+    def test_state_change(
+        self,
+        daemon: Daemon,
+        bus: FakeBus,
+        running: Path,
+        default_opts: None,
+        tmp_path: Path,
+    ) -> None:
+        path = tmp_path / "icinga2.cmd"
+        os.mkfifo(path)
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            daemon.set_watcher(Watcher(daemon, str(path), host="host"))
+            read_until(fd, ";host;systemd;2;SYSTEMD CRITICAL - nginx.service: failed")
+            bus.send_signal(
+                NGINX,
+                "org.freedesktop.DBus.Properties",
+                "PropertiesChanged",
+                (
+                    "sa{sv}as",
+                    (
+                        "org.freedesktop.systemd1.Unit",
+                        {"ActiveState": ("s", "active"), "SubState": ("s", "running")},
+                        [],
+                    ),
+                ),
+            )
+            read_until(fd, ";host;systemd;0;SYSTEMD OK - all")
+        finally:
+            daemon.set_watcher(None)
+            os.close(fd)
+
+
+class TestSocketPath:
+    def test_system(self) -> None:
+        assert Daemon.get_socket_path(False) == "/run/check_systemd/daemon.sock"
+
+    def test_user(self) -> None:
+        with patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"}):
+            assert (
+                Daemon.get_socket_path(True)
+                == "/run/user/1000/check_systemd/daemon.sock"
+            )
+
+    def test_no_option(self) -> None:
+        opts = normalize_argparser(get_argparser().parse_args([]))
+        assert opts.daemon_socket is None
+
+    def test_option(self) -> None:
+        opts = normalize_argparser(
+            get_argparser().parse_args(["--daemon-socket", "/tmp/daemon.sock"])
+        )
+        assert opts.daemon_socket == "/tmp/daemon.sock"
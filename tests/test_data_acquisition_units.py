@@ -2,13 +2,30 @@
 
 from __future__ import annotations
 
-from typing import Sequence
-
-from check_systemd import Source
+import logging
+import re
+import sys
+from collections.abc import Sequence
+from typing import Any, ClassVar, get_args
+from unittest.mock import patch
+
+import pytest
+
+from check_systemd import (
+    ActiveState,
+    CheckSystemdRegexpError,
+    LoadState,
+    Source,
+    SubState,
+    get_argparser,
+    logger,
+    normalize_argparser,
+)
 
 Unit = Source.Unit
 Cache = Source.Cache
 NameFilter = Source.NameFilter
+NameMatcher = Source.NameMatcher
 
 unit_modem_manager = Unit(
     name="ModemManager.service",
@@ -71,6 +88,96 @@ class TestClassUnit:
         assert "loaded" == unit.load_state
         assert "active" == unit.active_state
 
+    def test_no_dict(self) -> None:
+        assert not hasattr(unit_nginx, "__dict__")
+
+    def test_invalid_state(self) -> None:
+        with pytest.raises(ValueError, match="Invalid sub state: invalid"):
+            Unit("a.service", "active", "invalid", "loaded")
+
+    def test_unhashable_state(self) -> None:
+        with pytest.raises(ValueError, match="Invalid load state"):
+            Unit("a.service", "active", "running", ["loaded"])
+
+    def test_interned_name(self) -> None:
+        # A new string object and not the constant of the code object
+        name = b"interned.service".decode()
+        assert (
+            Unit(name, "active", "running", "loaded").name
+            is Unit("interned.service", "active", "running", "loaded").name
+        )
+
+    def test_type(self) -> None:
+        assert unit_nginx.type == "service"
+        assert unit_nmdb.type == "timer"
+        assert Unit("php7.4-fpm.service", "active", "running", "loaded").type == (
+            "service"
+        )
+
+
+class DictUnit:
+    """The former representation of a unit: a ``__dict__`` with the state
+    strings, validated with ``typing.get_args``."""
+
+    def __init__(
+        self, name: str, active_state: Any, sub_state: Any, load_state: Any
+    ) -> None:
+        self.name = name
+        if active_state not in get_args(ActiveState):
+            raise ValueError(active_state)
+        self.active_state = active_state
+        if sub_state not in get_args(SubState):
+            raise ValueError(sub_state)
+        self.sub_state = sub_state
+        if load_state not in get_args(LoadState):
+            raise ValueError(load_state)
+        self.load_state = load_state
+        logger.debug(
+            "Create unit object: name: %s, active_state: %s, sub_state: %s, "
+            "load_state: %s",
+            self.name,
+            self.active_state,
+            self.sub_state,
+            self.load_state,
+        )
+
+
+class TestUnitFootprint:
+    rows: ClassVar[list[tuple[str, str, str, str]]] = [
+        (f"unit-{i:05d}.service", "active", "running", "loaded") for i in range(1_000)
+    ]
+
+    def setup_method(self) -> None:
+        # Other tests may have enabled the debug output with -dd.
+        self.logger = logging.getLogger("check_systemd")
+        self.level = self.logger.level
+        self.logger.setLevel(logging.WARNING)
+
+    def teardown_method(self) -> None:
+        self.logger.setLevel(self.level)
+
+    def test_memory(self) -> None:
+        dict_unit = DictUnit(*self.rows[0])
+        unit = Unit(*self.rows[0])
+        assert sys.getsizeof(unit) < sys.getsizeof(dict_unit) + sys.getsizeof(
+            dict_unit.__dict__
+        )
+
+    def test_slots_only(self) -> None:
+        assert all("__dict__" not in vars(cls) for cls in Unit.__mro__[:-1])
+
+    def test_no_debug_message(self) -> None:
+        with patch("check_systemd.logger.debug") as debug:
+            units = [Unit(*row) for row in self.rows]
+        assert len(units) == 1_000
+        debug.assert_not_called()
+
+    def test_same_strings(self) -> None:
+        unit = Unit(*self.rows[0])
+        assert (unit.name, unit.active_state, unit.sub_state, unit.load_state) == (
+            self.rows[0]
+        )
+
 
 class TestClassCache:
     unit_cache: Source.Cache[Unit]
@@ -142,6 +249,220 @@ class TestClassCache:
         assert counter["active_state:active"] == 7
         assert counter["active_state:failed"] == 1
 
+    def test_method_count_by_states_filtered(self) -> None:
+        assert self.unit_cache.count_by_states(
+            ("active_state:active", "active_state:failed", "sub_state:mounting-done"),
+            include=".*service",
+            exclude="mongod.service",
+        ) == {
+            "active_state:active": 5,
+            "active_state:failed": 0,
+            "sub_state:mounting-done": 0,
+        }
+
+    def test_method_count_by_states_after_add(self) -> None:
+        assert self.unit_cache.count_by_states(("active_state:failed",)) == {
+            "active_state:failed": 1
+        }
+        self.unit_cache.add(
+            "nginx.service", Unit("nginx.service", "failed", "failed", "loaded")
+        )
+        assert self.unit_cache.count_by_states(("active_state:failed",)) == {
+            "active_state:failed": 2
+        }
+
+    def test_method_count_by(self) -> None:
+        assert self.unit_cache.count_by("type", "active_state") == {
+            ("service", "active"): 5,
+            ("service", "failed"): 1,
+            ("mount", "active"): 1,
+            ("timer", "active"): 1,
+        }
+
+    def test_method_count_by_filtered(self) -> None:
+        assert self.unit_cache.count_by("sub_state", include="n.*") == {
+            ("running",): 3,
+            ("mounting-done",): 1,
+        }
+
+
+class TestClassColumn:
+    def test_codes(self) -> None:
+        column = Source.Column()
+        for value in ("active", "failed", "active", "inactive"):
+            column.append(value)
+        assert column.values == ["active", "failed", "inactive"]
+        assert list(column.codes) == [0, 1, 0, 2]
+
+    def test_count(self) -> None:
+        column = Source.Column()
+        for value in ("active", "failed", "active"):
+            column.append(value)
+        assert column.count() == {"active": 2, "failed": 1}
+        assert column.count([False, True, True]) == {"active": 1, "failed": 1}
+        assert column.count()["inactive"] == 0
+
+    def test_count_by(self) -> None:
+        types = Source.Column()
+        states = Source.Column()
+        for type, state in (
+            ("service", "active"),
+            ("timer", "active"),
+            ("service", "active"),
+        ):
+            types.append(type)
+            states.append(state)
+        assert Source.Column.count_by(types, states) == {
+            ("service", "active"): 2,
+            ("timer", "active"): 1,
+        }
+
+
+class TestColumnarCountByStates:
+    states = (
+        "active_state:failed",
+        "active_state:active",
+        "active_state:activating",
+        "active_state:inactive",
+    )
+
+    def setup_method(self) -> None:
+        self.logger = logging.getLogger("check_systemd")
+        self.level = self.logger.level
+        self.logger.setLevel(logging.WARNING)
+        self.cache = Source.Cache[Unit]()
+        for i in range(1_000):
+            name = f"unit-{i:05d}.service"
+            self.cache.add(
+                name, Unit(name, ("active", "failed")[i % 2], "running", "loaded")
+            )
+
+    def teardown_method(self) -> None:
+        self.logger.setLevel(self.level)
+
+    def count_per_unit(self) -> dict[str, int]:
+        """The former implementation: a getattr per unit and per spec."""
+        counter = {state_spec: 0 for state_spec in self.states}
+        for unit in self.cache.filter():
+            for state_spec in self.states:
+                state_property, state_value = state_spec.split(":")
+                if getattr(unit, state_property) == state_value:
+                    counter[state_spec] += 1
+        return counter
+
+    def test_same_result(self) -> None:
+        assert self.cache.count_by_states(self.states) == self.count_per_unit()
+
+    def test_one_count_per_property(self) -> None:
+        with patch.object(
+            Source.Column, "count", autospec=True, side_effect=Source.Column.count
+        ) as count:
+            self.cache.count_by_states(self.states)
+        assert count.call_count == 1
+
+    def test_units_read_once(self) -> None:
+        self.cache.count_by_states(self.states)  # build the columns
+        with patch.object(
+            Unit, "active_state", property(lambda unit: pytest.fail("unit read"))
+        ):
+            assert self.cache.count_by_states(self.states)["active_state:failed"] == (
+                500
+            )
+
+
+all_units = (
+    unit_modem_manager,
+    unit_mongod,
+    unit_mysql,
+    unit_named,
+    unit_networking,
+    unit_nginx,
+    unit_nmdb,
+    unit_php,
+)
+
+
+class TestClassDigest:
+    def setup_method(self) -> None:
+        # The exit code of a unit depends on the option --state.
+        self.opts = patch(
+            "check_systemd.opts", normalize_argparser(get_argparser().parse_args([]))
+        )
+        self.opts.start()
+
+    def teardown_method(self) -> None:
+        self.opts.stop()
+
+    def get_digest(self, **kwargs: object) -> Source.Digest:
+        digest = Source.Digest(
+            states=("active_state:active", "active_state:failed"),
+            **kwargs,  # type: ignore
+        )
+        for unit in all_units:
+            digest.add(unit)
+        return digest
+
+    def test_counters(self) -> None:
+        digest = self.get_digest()
+        assert digest.count == 8
+        assert digest.matched == 8
+        assert digest.counters == {"active_state:active": 7, "active_state:failed": 1}
+
+    def test_retain_problems_only(self) -> None:
+        assert list(self.get_digest().units) == [unit_mongod]
+
+    def test_retain_all(self) -> None:
+        units = list(self.get_digest(retain_all=True).units)
+        assert len(units) == 8
+        assert units[0].name == "ModemManager.service"
+
+    def test_exclude(self) -> None:
+        digest = self.get_digest(exclude=("mongod.service",))
+        assert digest.count == 8
+        assert digest.matched == 7
+        assert digest.counters["active_state:failed"] == 0
+        assert list(digest.units) == []
+
+    def test_include(self) -> None:
+        digest = self.get_digest(include=("n.*",))
+        assert digest.matched == 4
+        assert digest.counters["active_state:active"] == 7
+
+    def test_unit_not_counted_twice(self) -> None:
+        digest = self.get_digest(unit_names=("nginx.service",))
+        failed_nginx = Unit(
+            name="nginx.service",
+            active_state="failed",
+            sub_state="failed",
+            load_state="loaded",
+        )
+        digest.add(failed_nginx, retain=True)
+        assert digest.count == 8
+        assert digest.counters == {"active_state:active": 6, "active_state:failed": 2}
+        assert list(digest.units) == [unit_mongod, failed_nginx]
+
+    def test_count_by(self) -> None:
+        digest = self.get_digest(exclude=("mongod.service",))
+        assert digest.count_by("type", "active_state") == {
+            ("service", "active"): 5,
+            ("mount", "active"): 1,
+            ("timer", "active"): 1,
+        }
+        assert digest.count_by("sub_state") == {
+            ("running",): 6,
+            ("mounting-done",): 1,
+        }
+
+    def test_count_by_replaced_unit(self) -> None:
+        digest = self.get_digest(unit_names=("nginx.service",))
+        digest.add(Unit("nginx.service", "failed", "failed", "loaded"), retain=True)
+        assert digest.count_by("active_state", "sub_state") == {
+            ("active", "running"): 5,
+            ("active", "mounting-done"): 1,
+            ("failed", "running"): 1,
+            ("failed", "failed"): 1,
+        }
+
 
 class TestClassNameFilter:
     __filter: NameFilter
@@ -218,3 +539,182 @@ class TestClassNameFilter:
     def test_method_list_include_exclude_empty_list(self) -> None:
         units = self.filter(include=[], exclude=[])
         assert 8 == len(units)
+
+    def test_sorted_once(self) -> None:
+        with patch("check_systemd.sorted", create=True, wraps=sorted) as sort:
+            list(self.__filter)
+            self.filter(exclude="named.service")
+            assert sort.call_count == 1
+            self.__filter.add("nginx.service")
+            list(self.__filter)
+            assert sort.call_count == 1
+            self.__filter.add("apt.timer")
+            assert next(iter(self.__filter)) == "ModemManager.service"
+            assert sort.call_count == 2
+
+    def test_method_with_prefix(self) -> None:
+        assert self.__filter.with_prefix("n") == [
+            "named.service",
+            "networking.mount",
+            "nginx.service",
+            "nmbd.timer",
+        ]
+        assert self.__filter.with_prefix("ng") == ["nginx.service"]
+        assert self.__filter.with_prefix("x") == []
+
+    def test_method_with_type(self) -> None:
+        assert self.__filter.with_type("timer") == ["nmbd.timer"]
+        assert self.__filter.with_type("swap") == []
+        self.__filter.add("apt.timer")
+        assert self.__filter.with_type("timer") == ["apt.timer", "nmbd.timer"]
+
+    @pytest.mark.parametrize(
+        "include",
+        [
+            "n.*",
+            "ne",
+            "^m[oy]",
+            "n?ginx",
+            "(?i)NGINX",
+            "mongod|nginx",
+            "php7\\.4",
+            "nm+bd",
+            "",
+            NameMatcher(unit_names="named.service", unit_types=["mount"]),
+            NameMatcher(regexes="m.*", unit_types=["timer"]),
+        ],
+    )
+    def test_candidates_same_selection(self, include: object) -> None:
+        matcher = NameMatcher.of(include)  # type: ignore
+        assert self.filter(include=matcher) == [  # type: ignore
+            name for name in self.__filter if matcher.match(name)
+        ]
+
+
+class TestClassNameMatcher:
+    def test_names(self) -> None:
+        matcher = NameMatcher(unit_names=["nginx.service", "nginx"])
+        assert matcher.names == {"nginx.service"}
+        assert matcher.match("nginx.service")
+        assert not matcher.match("nginx.service-debug.service")
+
+    def test_escaped_name(self) -> None:
+        matcher = NameMatcher(unit_names="dev-disk-by\\x2duuid.device")
+        assert matcher.match("dev-disk-by\\x2duuid.device")
+
+    def test_types(self) -> None:
+        matcher = NameMatcher(unit_types=["timer", "mount"])
+        assert matcher.match("apt.timer")
+        assert matcher.match("-.mount")
+        assert not matcher.match("timer.service")
+
+    def test_invalid_type(self) -> None:
+        with pytest.raises(ValueError, match="not a valid systemd unit type"):
+            NameMatcher(unit_types=["services"])
+
+    def test_regexes(self) -> None:
+        matcher = NameMatcher(regexes=["n.*", "p.*"])
+        assert matcher.match("named.service")
+        assert matcher.match("php7.4-fpm.service")
+        assert not matcher.match("mysql.service")
+
+    def test_invalid_regexp(self) -> None:
+        with pytest.raises(
+            CheckSystemdRegexpError, match="Invalid regular expression: '\\*service'"
+        ):
+            NameMatcher(regexes=["n.*", "*service"])
+
+    def test_alternation_keeps_inline_flags(self) -> None:
+        matcher = NameMatcher(regexes=["(?i)NGINX", "ssh"])
+        assert matcher.match("nginx.service")
+        assert not matcher.match("SSH.service")
+
+    def test_alternation_keeps_backreferences(self) -> None:
+        matcher = NameMatcher(regexes=["(a)\\1", "(b)\\1"])
+        assert matcher.match("bb.service")
+        assert not matcher.match("ba.service")
+
+    def test_alternation_keeps_conditionals(self) -> None:
+        matcher = NameMatcher(regexes=["(b)", "(a)?(?(1)x|c)"])
+        assert len(matcher._NameMatcher__patterns) == 2  # type: ignore
+        assert matcher.match("ax.service")
+        assert matcher.match("c.service")
+        assert not matcher.match("ac.service")
+
+    def test_alternation_with_same_group_name(self) -> None:
+        matcher = NameMatcher(regexes=["(?P<a>x).*", "(?P<a>y).*"])
+        assert matcher.match("x.service")
+        assert matcher.match("y.service")
+        assert not matcher.match("z.service")
+
+    @pytest.mark.parametrize(
+        "regex,prefix",
+        [
+            ("nginx.*", "nginx"),
+            ("^nginx\\.service$", "nginx.service"),
+            ("user@\\d+\\.service", "user@"),
+            ("nm?bd", "n"),
+            ("nm+bd", "nm"),
+            ("dev-disk-by\\x2d", "dev-disk-by"),
+            (".*\\.timer", ""),
+            ("ssh|nginx", ""),
+            ("(?i)nginx", ""),
+        ],
+    )
+    def test_prefix(self, regex: str, prefix: str) -> None:
+        prefixes = NameMatcher(regexes=regex).prefixes
+        assert prefixes == ((prefix,) if prefix else None)
+
+    def test_empty(self) -> None:
+        assert not NameMatcher()
+        assert len(NameMatcher(regexes="a", unit_names="b", unit_types=["mount"])) == 3
+
+
+class TestNameMatcherAlternation:
+    names: ClassVar[list[str]] = [f"unit-{i:05d}.service" for i in range(20_000)]
+
+    excluded: ClassVar[list[str]] = [
+        f"unit-{i:05d}.service" for i in range(0, 20_000, 40)
+    ]
+
+    def test_same_selection(self) -> None:
+        regexes = [name.replace(".", "\\.") for name in self.excluded]
+        matcher = NameMatcher(unit_names=self.excluded)
+        names = self.names[:2000]
+        assert [name for name in names if matcher.match(name)] == [
+            name for name in names if any(re.match(r, name) for r in regexes)
+        ]
+
+    def test_unit_names_without_pattern(self) -> None:
+        """500 excluded units (``--exclude-unit``) are looked up in a set."""
+        matcher = NameMatcher(unit_names=self.excluded)
+        assert matcher.names == frozenset(self.excluded)
+        assert matcher._NameMatcher__patterns == ()  # type: ignore
+
+    def test_one_pattern(self) -> None:
+        regexes = [name.replace(".", "\\.") for name in self.excluded]
+        matcher = NameMatcher(regexes=regexes)
+        assert len(matcher._NameMatcher__patterns) == 1  # type: ignore
+
+    def test_separate_patterns(self) -> None:
+        matcher = NameMatcher(regexes=["(?P<a>x).*", "(?P<a>y).*"])
+        assert len(matcher._NameMatcher__patterns) == 2  # type: ignore
+
+
+class TestIndexedNameFilter:
+    def setup_method(self) -> None:
+        self.filter = NameFilter(
+            [f"unit-{i:05d}.service" for i in range(20_000)]
+            + [f"user@{i}.service" for i in range(100)]
+        )
+
+    def test_candidates_only(self) -> None:
+        """Filter 20000 unit names by a regular expression with a literal
+        prefix: only the names with the prefix are matched."""
+        include = NameMatcher(regexes="user@\\d+\\.service")
+        with patch.object(
+            NameMatcher, "match", autospec=True, side_effect=NameMatcher.match
+        ) as match:
+            names = list(self.filter.filter(include=include))
+        assert names == [name for name in self.filter if include.match(name)]
+        assert match.call_count == 100
@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
-from unittest.mock import patch
+from typing import Any, ClassVar
+from unittest.mock import Mock, patch
+
+import pytest
 
 import check_systemd
+from check_systemd import CheckSystemdError, GiSource
+from tests.helper import execute_main
 
 
 class TestDbus:
@@ -15,3 +20,142 @@ class TestDbus:
             patch("sys.argv", ["check_systemd.py", "--dbus"]),
         ):
             check_systemd.main()  # type: ignore
+
+
+class FakeConnection:
+    """Answers the D-Bus calls that are needed for ``-u nginx.service``."""
+
+    methods: ClassVar[dict[tuple[str, Any], Any]] = {
+        ("LoadUnit", "nginx.service"): "/org/freedesktop/systemd1/unit/nginx_2eservice",
+        ("ListUnitsByNames", ("nginx.service", "ssh.service")): [
+            (
+                "nginx.service",
+                "A high performance web server",
+                "loaded",
+                "failed",
+                "failed",
+                "",
+                "/org/freedesktop/systemd1/unit/nginx_2eservice",
+                0,
+                "",
+                "/",
+            ),
+            (
+                "ssh.service",
+                "OpenBSD Secure Shell server",
+                "loaded",
+                "active",
+                "running",
+                "",
+                "/org/freedesktop/systemd1/unit/ssh_2eservice",
+                0,
+                "",
+                "/",
+            ),
+        ],
+        ("GetDefaultTarget", None): "graphical.target",
+        ("ListUnits", None): [
+            (
+                "ssh.service",
+                "OpenBSD Secure Shell server",
+                "loaded",
+                "active",
+                "running",
+                "",
+                "/org/freedesktop/systemd1/unit/ssh_2eservice",
+                0,
+                "",
+                "/",
+            )
+        ],
+        (
+            "GetUnit",
+            "graphical.target",
+        ): "/org/freedesktop/systemd1/unit/graphical_2etarget",
+    }
+
+    properties: ClassVar[dict[str, dict[str, Any]]] = {
+        "/org/freedesktop/systemd1": {"UserspaceTimestampMonotonic": 2_000_000},
+        "/org/freedesktop/systemd1/unit/graphical_2etarget": {
+            "ActiveEnterTimestampMonotonic": 14_345_000
+        },
+        "/org/freedesktop/systemd1/unit/nginx_2eservice": {
+            "Id": "nginx.service",
+            "ActiveState": "failed",
+            "SubState": "failed",
+            "LoadState": "loaded",
+            "Description": "A high performance web server",
+        },
+    }
+
+    calls: list[str]
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def call(
+        self,
+        object_path: str,
+        interface_name: str,
+        method: str,
+        signature: str | None = None,
+        *args: Any,
+    ) -> tuple[Any, ...]:
+        assert object_path == "/org/freedesktop/systemd1"
+        argument = args[0] if args else None
+        if isinstance(argument, list):
+            argument = tuple(argument)
+        self.calls.append(method)
+        return (self.methods[(method, argument)],)
+
+    def get(self, object_path: str, interface_name: str, name: str) -> Any:
+        return self.properties[object_path][name]
+
+    def get_all(self, object_path: str, interface_name: str) -> dict[str, Any]:
+        assert interface_name == "org.freedesktop.systemd1.Unit"
+        return self.properties[object_path]
+
+
+class TestGetUnit:
+    def test_no_subprocess(self) -> None:
+        with (
+            patch("check_systemd.is_dbus", True),
+            patch("check_systemd.GiSource.Connection", return_value=FakeConnection()),
+        ):
+            result = execute_main(
+                argv=["--dbus", "-u", "nginx.service"],
+                stdout=[],
+            )
+        result.assert_critical()
+        assert result.output.startswith("SYSTEMD CRITICAL - nginx.service: failed")
+        assert "startup_time=12.3" in result.output
+        assert "count_units=2" in result.output
+        assert result.commands == []
+
+    def test_not_found(self) -> None:
+        connection = Mock()
+        connection.call.side_effect = Exception("NoSuchUnit")
+        with (
+            patch("check_systemd.GiSource.Connection", return_value=connection),
+            pytest.raises(CheckSystemdError, match="couldn't be found"),
+        ):
+            GiSource().get_unit("nginx.service")
+
+
+class TestGetUnits:
+    def test_one_call(self) -> None:
+        connection = FakeConnection()
+        with patch("check_systemd.GiSource.Connection", return_value=connection):
+            units = GiSource().get_units(("nginx.service", "ssh.service"))
+        assert [(unit.name, unit.active_state) for unit in units] == [
+            ("nginx.service", "failed"),
+            ("ssh.service", "active"),
+        ]
+        assert connection.calls == ["ListUnitsByNames"]
+
+    def test_not_found(self) -> None:
+        with (
+            patch("check_systemd.GiSource.Connection", return_value=FakeConnection()),
+            pytest.raises(CheckSystemdError, match="'smartd.service'"),
+        ):
+            GiSource().get_units(("nginx.service", "smartd.service"))
@@ -0,0 +1,156 @@
+"""Test the connection layer of the D-Bus source with a mocked bus."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import Mock, patch
+
+from check_systemd import GiSource
+
+
+def create_connection(*replies: Any) -> tuple[GiSource.Connection, Mock]:
+    """
+    :param replies: The unpacked replies of the calls of ``call_sync``.
+
+    :return: The connection and the mocked ``Gio.DBusConnection``.
+    """
+    bus = Mock()
+    bus.call_sync.side_effect = [Mock(**{"unpack.return_value": r}) for r in replies]
+    connection = GiSource.Connection(timeout=1000)
+    with (
+        patch("check_systemd.is_dbus", True),
+        patch("check_systemd.BusType", create=True),
+        patch("check_systemd.bus_get_sync", create=True, return_value=bus),
+    ):
+        assert connection._connection is bus
+    return connection, bus
+
+
+def Variant(signature: str, value: Any) -> tuple[str, Any]:
+    return (signature, value)
+
+
+class TestConnection:
+    def test_get(self) -> None:
+        connection, bus = create_connection(("running",))
+        with (
+            patch("check_systemd.Variant", Variant, create=True),
+            patch("check_systemd.DBusCallFlags", create=True),
+        ):
+            value = connection.get(
+                "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager",
+                "SystemState",
+            )
+        assert value == "running"
+        args = bus.call_sync.call_args[0]
+        assert args[:5] == (
+            "org.freedesktop.systemd1",
+            "/org/freedesktop/systemd1",
+            "org.freedesktop.DBus.Properties",
+            "Get",
+            ("(ss)", ("org.freedesktop.systemd1.Manager", "SystemState")),
+        )
+        # timeout
+        assert args[7] == 1000
+
+    def test_get_all(self) -> None:
+        connection, bus = create_connection(({"NJobs": 0, "NNames": 3},))
+        with (
+            patch("check_systemd.Variant", Variant, create=True),
+            patch("check_systemd.DBusCallFlags", create=True),
+        ):
+            assert connection.get_all(
+                "/org/freedesktop/systemd1", "org.freedesktop.systemd1.Manager"
+            ) == {"NJobs": 0, "NNames": 3}
+        assert bus.call_sync.call_args[0][3] == "GetAll"
+
+    def test_call_without_arguments(self) -> None:
+        connection, bus = create_connection(([],))
+        with patch("check_systemd.DBusCallFlags", create=True):
+            connection.call(
+                "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager",
+                "ListUnits",
+            )
+        assert bus.call_sync.call_args[0][4] is None
+
+    def test_get_many_empty(self) -> None:
+        connection, bus = create_connection()
+        assert connection.get_many([]) == []
+        bus.call.assert_not_called()
+
+    def test_get_many_limited_pending(self) -> None:
+        connection, bus = create_connection()
+        callbacks: list[tuple[Any, int]] = []
+        most_pending = 0
+
+        def call(*args: Any) -> None:
+            nonlocal most_pending
+            callbacks.append((args[9], args[10]))
+            most_pending = max(most_pending, len(callbacks))
+
+        def iteration(may_block: bool) -> None:
+            on_reply, index = callbacks.pop(0)
+            result = Mock(**{"unpack.return_value": (index,)})
+            on_reply(Mock(**{"call_finish.return_value": result}), None, index)
+
+        bus.call.side_effect = call
+        context = Mock(**{"iteration.side_effect": iteration})
+        requests = [(f"/{index}", "org.a", "Last") for index in range(200)]
+        with (
+            patch("check_systemd.MainContext", create=True) as MainContext,
+            patch("check_systemd.Variant", Variant, create=True),
+            patch("check_systemd.VariantType", create=True),
+            patch("check_systemd.DBusCallFlags", create=True),
+        ):
+            MainContext.new.return_value = context
+            assert connection.get_many(requests) == list(range(200))
+        assert bus.call.call_count == 200
+        assert most_pending == GiSource.Connection.MAX_PENDING
+
+
+class TestManagerProxy:
+    def test_get_object_path(self) -> None:
+        connection = Mock()
+        connection.call.return_value = ("/org/freedesktop/systemd1/unit/a_2eservice",)
+        manager = GiSource.ManagerProxy(connection)
+        assert (
+            manager.get_object_path("a.service")
+            == "/org/freedesktop/systemd1/unit/a_2eservice"
+        )
+        connection.call.assert_called_once_with(
+            "/org/freedesktop/systemd1",
+            "org.freedesktop.systemd1.Manager",
+            "GetUnit",
+            "(s)",
+            "a.service",
+        )
+
+    def test_property(self) -> None:
+        connection = Mock()
+        connection.get.return_value = 2
+        assert GiSource.ManagerProxy(connection).n_failed_units == 2
+        connection.get.assert_called_once_with(
+            "/org/freedesktop/systemd1",
+            "org.freedesktop.systemd1.Manager",
+            "NFailedUnits",
+        )
+
+
+class TestUseDbusProxy:
+    def test_call_and_get(self) -> None:
+        connection, bus = create_connection()
+        proxy = Mock()
+        proxy.call_sync.return_value.unpack.return_value = ([],)
+        proxy.get_cached_property.return_value.unpack.return_value = "degraded"
+        with (
+            patch.object(GiSource.Connection, "use_dbus_proxy", True),
+            patch.object(GiSource.Connection, "_get_proxy", return_value=proxy),
+            patch("check_systemd.DBusCallFlags", create=True),
+        ):
+            manager = GiSource.ManagerProxy(connection)
+            assert manager.units == []
+            assert manager.system_state == "degraded"
+        proxy.get_cached_property.assert_called_once_with("SystemState")
+        bus.call_sync.assert_not_called()
@@ -0,0 +1,105 @@
+"""Test the acquisition of the timers over D-Bus with a mocked bus."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+
+from check_systemd import CheckSystemdError, GiSource
+
+
+def get_unit_tuple(name: str, active_state: str = "active") -> tuple[Any, ...]:
+    object_path = "/org/freedesktop/systemd1/unit/" + name.replace(".", "_2e").replace(
+        "-", "_2d"
+    )
+    return (name, "", "loaded", active_state, "waiting", "", object_path, 0, "", "/")
+
+
+UNITS = [
+    get_unit_tuple("nginx.service"),
+    get_unit_tuple("apt-daily.timer"),
+    get_unit_tuple("fstrim.timer"),
+]
+
+PROPERTIES = {
+    "/org/freedesktop/systemd1/unit/apt_2ddaily_2etimer": (
+        3_600_000_000,
+        7_200_000_000,
+    ),
+    "/org/freedesktop/systemd1/unit/fstrim_2etimer": (0, 60_000_000),
+}
+
+
+def get_many(connection: object, requests: Sequence[tuple[str, str, str]]) -> list[Any]:
+    values: list[Any] = []
+    for object_path, interface_name, name in requests:
+        assert interface_name == "org.freedesktop.systemd1.Timer"
+        last, next = PROPERTIES[object_path]
+        values.append(last if name == "LastTriggerUSecMonotonic" else next)
+    return values
+
+
+def create_connection(
+    units: list[tuple[Any, ...]], timers: list[tuple[Any, ...]]
+) -> Mock:
+    def call(
+        object_path: str, interface_name: str, method: str, *args: Any
+    ) -> tuple[Any, ...]:
+        if method == "ListUnits":
+            return (units,)
+        assert method == "ListUnitsByPatterns"
+        assert args == ("(asas)", [], ["*.timer"])
+        return (timers,)
+
+    connection = Mock()
+    connection.call.side_effect = call
+    connection.get_many.side_effect = lambda requests: get_many(connection, requests)
+    return connection
+
+
+def acquire_timers(connection: Mock, list_units_first: bool = False) -> None:
+    with patch("check_systemd.GiSource.Connection", return_value=connection):
+        source = GiSource()
+        if list_units_first:
+            assert source.units.count == 3
+        timers = source.timers
+    assert connection.get_many.call_count == 1
+    # Two properties of two timers in one batch
+    assert len(connection.get_many.call_args[0][0]) == 4
+    apt_daily = timers.get("apt-daily.timer")
+    assert apt_daily is not None
+    assert apt_daily.last == 3600
+    assert apt_daily.next == 7200
+    fstrim = timers.get("fstrim.timer")
+    assert fstrim is not None
+    assert fstrim.last is None
+    assert fstrim.next is None
+
+
+def get_methods(connection: Mock) -> list[str]:
+    return [call[0][2] for call in connection.call.call_args_list]
+
+
+class TestTimers:
+    def test_reuse_unit_list(self) -> None:
+        connection = create_connection(UNITS, [])
+        acquire_timers(connection, list_units_first=True)
+        assert get_methods(connection) == ["ListUnits"]
+
+    def test_list_timers_only(self) -> None:
+        connection = create_connection([], UNITS[1:])
+        acquire_timers(connection)
+        assert get_methods(connection) == ["ListUnitsByPatterns"]
+
+    def test_unloaded_timer(self) -> None:
+        connection = create_connection([], UNITS[1:])
+        connection.get_many.side_effect = None
+        connection.get_many.return_value = [None, None, 0, 60_000_000]
+        with (
+            patch("check_systemd.GiSource.Connection", return_value=connection),
+            pytest.raises(CheckSystemdError, match="'apt-daily.timer'"),
+        ):
+            list(GiSource().timers)
@@ -0,0 +1,155 @@
+"""Test the JSON output of ``systemctl list-units`` and ``systemctl
+list-timers`` (``--output=json``) and the probe of this capability."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from check_systemd import CliSource, Source
+from tests.helper import MPopen
+
+
+class TestUnits:
+    def test_json(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [MPopen(stdout="systemctl-list-units_json.txt")]
+            source = CliSource()
+            units = source.units
+        assert Popen.call_args[0][0] == [
+            "systemctl",
+            "list-units",
+            "--all",
+            "--output=json",
+        ]
+        assert source.json_output is True
+        assert units.count == 4
+        assert units.count_by_states(
+            ("active_state:active", "active_state:failed", "load_state:not-found")
+        ) == {
+            "active_state:active": 2,
+            "active_state:failed": 1,
+            "load_state:not-found": 1,
+        }
+        # Longer than the column of the text table
+        unit = units.get(
+            "a-very-long-unit-name-that-exceeds-the-width-of-the-unit-column-"
+            "of-the-text-table@instance.service"
+        )
+        assert unit is not None
+        assert unit.sub_state == "running"
+
+    def test_ignored_by_old_systemctl(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [MPopen(stdout="systemctl-list-units_v246.txt")]
+            source = CliSource()
+            units = source.units
+        assert Popen.call_count == 1
+        assert source.json_output is False
+        assert units.count > 0
+
+    def test_refused_by_old_systemctl(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [
+                MPopen(returncode=1, stderr="Unknown output 'json'"),
+                MPopen(stdout="systemctl-list-units_v246.txt"),
+            ]
+            source = CliSource()
+            units = source.units
+        assert Popen.call_args_list[1][0][0] == ["systemctl", "list-units", "--all"]
+        assert source.json_output is False
+        assert units.count > 0
+
+    def test_error_with_json_output(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [MPopen(returncode=1)]
+            source = CliSource()
+            source.json_output = True
+            with pytest.raises(Exception, match="none-zero return code"):
+                list(source.units)
+        assert Popen.call_count == 1
+
+
+class TestTimers:
+    def test_json(self) -> None:
+        with (
+            patch("check_systemd.subprocess.Popen") as Popen,
+            patch("check_systemd.time.time", return_value=1_700_000_060),
+        ):
+            Popen.side_effect = [MPopen(stdout="systemctl-list-timers_json.txt")]
+            source = CliSource()
+            source.json_output = True
+            timers = source.timers
+        assert Popen.call_args[0][0] == [
+            "systemctl",
+            "list-timers",
+            "--all",
+            "--output=json",
+        ]
+        assert timers.get("apt-daily.timer") == Source.Timer(
+            name="apt-daily.timer", next=3540, last=60
+        )
+        assert timers.get("systemd-tmpfiles-clean.timer") == Source.Timer(
+            name="systemd-tmpfiles-clean.timer", next=240, last=None
+        )
+        assert timers.get("dpkg-db-backup.timer") == Source.Timer(
+            name="dpkg-db-backup.timer", next=None, last=None
+        )
+
+
+class TestProbeCache:
+    def test_stored_in_snapshot_directory(self, tmp_path: Path) -> None:
+        with (
+            patch("shutil.which", return_value=__file__),
+            patch("check_systemd.subprocess.Popen") as Popen,
+        ):
+            Popen.side_effect = [
+                MPopen(stdout="systemctl-list-units_v246.txt"),
+                MPopen(stdout="systemctl-list-timers_ok.txt"),
+            ]
+            source = CliSource()
+            source.set_snapshot(Source.Snapshot(str(tmp_path), ttl=0))
+            list(source.units)
+
+            source = CliSource()
+            source.set_snapshot(Source.Snapshot(str(tmp_path), ttl=0))
+            list(source.timers)
+        assert (tmp_path / "systemctl-json-output.jsonl").exists()
+        assert source.json_output is False
+        assert Popen.call_args[0][0] == ["systemctl", "list-timers", "--all"]
+
+    def test_transient_error_not_stored(self, tmp_path: Path) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [
+                MPopen(returncode=1, stderr="Failed to connect to bus: Timeout"),
+                MPopen(stdout="systemctl-list-units_v246.txt"),
+            ]
+            source = CliSource()
+            source.set_snapshot(Source.Snapshot(str(tmp_path), ttl=0))
+            units = source.units
+        assert units.count > 0
+        assert source.json_output is False
+        assert not (tmp_path / "systemctl-json-output.jsonl").exists()
+
+    def test_refusal_stored(self, tmp_path: Path) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [
+                MPopen(returncode=1, stderr="Unknown output 'json'."),
+                MPopen(stdout="systemctl-list-units_v246.txt"),
+            ]
+            source = CliSource()
+            source.set_snapshot(Source.Snapshot(str(tmp_path), ttl=0))
+            list(source.units)
+        assert (tmp_path / "systemctl-json-output.jsonl").exists()
+
+    def test_systemd_update(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), ttl=0)
+        snapshot.store("systemctl-json-output", [("/usr/bin/systemctl:1:2", False)])
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.side_effect = [MPopen(stdout="systemctl-list-units_json.txt")]
+            source = CliSource()
+            source.set_snapshot(snapshot)
+            list(source.units)
+        assert source.json_output is True
@@ -0,0 +1,98 @@
+"""Test the logging wrapper and the cost of logging when the debug output is
+disabled."""
+
+from __future__ import annotations
+
+import logging
+from typing import ClassVar
+from unittest.mock import patch
+
+import pytest
+
+from check_systemd import Logger, Source, logger
+
+
+class Counted:
+    """Counts how often it is converted into a string."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __str__(self) -> str:
+        self.count += 1
+        return "counted"
+
+
+class TestLogger:
+    def setup_method(self) -> None:
+        self.logger = logging.getLogger("check_systemd")
+        self.level = self.logger.level
+
+    def teardown_method(self) -> None:
+        self.logger.setLevel(self.level)
+
+    def test_disabled_level_not_formatted(self) -> None:
+        self.logger.setLevel(logging.WARNING)
+        arg = Counted()
+        logger.debug("%s", arg)
+        logger.verbose("%s", arg)
+        assert arg.count == 0
+
+    def test_enabled_level_formatted_once(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        logger.set_level(2)
+        arg = Counted()
+        with caplog.at_level(logging.DEBUG, logger="check_systemd"):
+            logger.debug("value: %s", arg)
+        assert caplog.records[0].getMessage() == "value: counted"
+
+    def test_is_enabled(self) -> None:
+        logger.set_level(1)
+        assert logger.is_enabled(1)
+        assert not logger.is_enabled(2)
+        logger.set_level(3)
+        assert logger.is_enabled(3)
+
+
+class TestFormatter:
+    def format(self, level: int, msg: str, *args: object) -> str:
+        record = logging.LogRecord("check_systemd", level, "", 0, msg, args, None)
+        return Logger.Formatter("%(message)s").format(record)
+
+    def test_colors(self) -> None:
+        assert self.format(logging.INFO, "%s", 1) == "\x1b[0;34m1\x1b[0m"
+        assert self.format(logging.DEBUG, "%s", 1) == "\x1b[0;35m1\x1b[0m"
+        assert self.format(5, "%s", 1) == "\x1b[0;36m1\x1b[0m"
+
+    def test_no_color(self) -> None:
+        assert self.format(logging.WARNING, "%s", 1) == "1"
+
+    def test_no_args(self) -> None:
+        assert self.format(logging.DEBUG, "100%") == "100%"
+
+
+class TestHotPath:
+    rows: ClassVar[list[tuple[str, str, str, str]]] = [
+        (f"unit-{i:05d}.service", "active", "running", "loaded") for i in range(1_000)
+    ]
+
+    def setup_method(self) -> None:
+        self.logger = logging.getLogger("check_systemd")
+        self.level = self.logger.level
+        self.logger.setLevel(logging.WARNING)
+
+    def teardown_method(self) -> None:
+        self.logger.setLevel(self.level)
+
+    def test_per_unit_cost(self) -> None:
+        """1000 units without debug output (``-d`` not given): only the level
+        is checked, no message is formatted."""
+        with (
+            patch.object(logger, "debug") as debug,
+            patch.object(self.logger, "_log") as log,
+        ):
+            for row in self.rows:
+                Source.Unit(*row)
+        debug.assert_not_called()
+        log.assert_not_called()
@@ -0,0 +1,89 @@
+"""Test the option --fast, which reads the counters of the systemd manager
+instead of listing all units."""
+
+from __future__ import annotations
+
+from tests.helper import MockResult, execute_main
+
+
+def execute_fast(argv: list[str], stdout: list[str]) -> MockResult:
+    return execute_main(argv=["--fast", "-n", *argv], stdout=stdout)
+
+
+class TestOptionFast:
+    def test_running(self) -> None:
+        result = execute_fast(
+            ["--no-performance-data"], ["systemctl-show-manager_running.txt"]
+        )
+        result.assert_ok()
+        result.assert_first_line("SYSTEMD OK - all")
+        assert result.commands == [
+            [
+                "systemctl",
+                "show",
+                "--property",
+                "SystemState",
+                "--property",
+                "NFailedUnits",
+                "--property",
+                "NNames",
+                "--property",
+                "NJobs",
+            ]
+        ]
+
+    def test_degraded(self) -> None:
+        result = execute_fast(
+            ["--no-performance-data"],
+            [
+                "systemctl-show-manager_degraded.txt",
+                "systemctl-list-units_state-failed.txt",
+            ],
+        )
+        result.assert_critical()
+        result.assert_first_line(
+            "SYSTEMD CRITICAL - rtkit-daemon.service: failed, smartd.service: failed"
+        )
+        assert result.commands[1] == [
+            "systemctl",
+            "list-units",
+            "--all",
+            "--state=failed",
+        ]
+
+    def test_degraded_exclude(self) -> None:
+        result = execute_fast(
+            ["-e", "rtkit-daemon.service", "-e", "smartd.service"],
+            [
+                "systemctl-show-manager_degraded.txt",
+                "systemctl-list-units_state-failed.txt",
+                "systemd-analyze_12.345.txt",
+            ],
+        )
+        result.assert_ok()
+        result.assert_first_line(
+            "SYSTEMD OK - all | count_units=422 startup_time=12.3 units_failed=0"
+        )
+
+    def test_performance_data(self) -> None:
+        result = execute_fast(
+            [],
+            [
+                "systemctl-show-manager_degraded.txt",
+                "systemctl-list-units_state-failed.txt",
+                "systemd-analyze_12.345.txt",
+            ],
+        )
+        result.assert_critical()
+        assert result.first_line
+        assert result.first_line.endswith(
+            "| count_units=422 startup_time=12.3 units_failed=2"
+        )
+
+    def test_unit(self) -> None:
+        result = execute_fast(
+            ["-u", "nginx.service", "--no-performance-data"],
+            ["systemctl-show-nginx_active.txt"],
+        )
+        result.assert_ok()
+        result.assert_first_line("SYSTEMD OK - nginx.service: active")
@@ -3,14 +3,13 @@ from __future__ import annotations
 from tests.helper import execute_main
 
 
-def execute_with_opt_u(argv: list[str], list_units: str = "ok"):
+def execute_with_opt_u(argv: list[str], show: str = "nginx_active"):
     if "--no-performance-data" not in argv:
         argv.append("--no-performance-data")
     return execute_main(
         argv=argv,
         stdout=[
-            "systemctl-list-units_{}.txt".format(list_units),
-            "systemctl-show-nginx_active.txt",
+            f"systemctl-show-{show}.txt",
             "systemd-analyze_12.345.txt",
         ],
     )
@@ -18,21 +17,26 @@ def execute_with_opt_u(argv: list[str], list_units: str = "ok"):
 
 class TestOptionUnit:
     def test_ok(self) -> None:
-        result = execute_with_opt_u(argv=["--unit", "nginx.service"], list_units="ok")
+        result = execute_with_opt_u(argv=["--unit", "nginx.service"])
         result.assert_ok()
         result.assert_first_line("SYSTEMD OK - nginx.service: active")
 
     def test_failed(self) -> None:
         result = execute_with_opt_u(
-            argv=["--unit", "smartd.service"], list_units="failed"
+            argv=["--unit", "smartd.service"], show="smartd_failed"
         )
         result.assert_critical()
         result.assert_first_line("SYSTEMD CRITICAL - smartd.service: failed")
 
     def test_different_unit_name(self) -> None:
-        result = execute_with_opt_u(argv=["--unit", "XXXXX.service"], list_units="ok")
+        result = execute_with_opt_u(argv=["--unit", "XXXXX.service"])
         result.assert_unknown()
         result.assert_first_line(
             "SYSTEMD UNKNOWN: ValueError: Please verify your --include-* and "
             "--exclude-* options. No units have been added for testing."
         )
+
+    def test_no_list_units(self) -> None:
+        result = execute_with_opt_u(argv=["--unit", "nginx.service"])
+        assert result.commands[0][:2] == ["systemctl", "show"]
+        assert ["systemctl", "list-units", "--all"] not in result.commands
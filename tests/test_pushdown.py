@@ -0,0 +1,175 @@
+"""Test the pushdown of the unit selection to systemd."""
+
+from __future__ import annotations
+
+import re
+from fnmatch import fnmatchcase
+
+import pytest
+
+from check_systemd import (
+    AcquisitionPlan,
+    Source,
+    convert_regexp_to_globs,
+    get_argparser,
+    normalize_argparser,
+)
+from tests.helper import execute_main
+
+
+def get_plan(*argv: str) -> AcquisitionPlan:
+    return AcquisitionPlan.from_options(
+        normalize_argparser(get_argparser().parse_args(argv))
+    )
+
+
+class TestFunctionConvertRegexpToGlobs:
+    @pytest.mark.parametrize(
+        "regexp,globs",
+        [
+            ("nginx\\.service", ["nginx.service*"]),
+            ("nginx\\.service$", ["nginx.service"]),
+            ("^nginx\\.service$", ["nginx.service"]),
+            ("n.*", ["n*"]),
+            (".*", ["*"]),
+            ("", ["*"]),
+            ("ss.\\.service$", ["ss?.service"]),
+            (".*\\.(service|timer)$", ["*.service", "*.timer"]),
+            ("(?:ssh|nginx)\\.service$", ["ssh.service", "nginx.service"]),
+            ("ssh|nginx", ["ssh*", "nginx*"]),
+        ],
+    )
+    def test_convertible(self, regexp: str, globs: list[str]) -> None:
+        assert convert_regexp_to_globs(regexp) == globs
+
+    @pytest.mark.parametrize(
+        "regexp",
+        [
+            "user@\\d+\\.service",
+            "*service",
+            "nginx\\.service?",
+            "[ab]\\.service",
+            "a+",
+            "(a|(b|c))",
+            "a$b",
+            "a\\*",
+        ],
+    )
+    def test_not_convertible(self, regexp: str) -> None:
+        assert convert_regexp_to_globs(regexp) is None
+
+    def test_same_selection(self) -> None:
+        names = [
+            "nginx.service",
+            "nginx.service.d",
+            "ssh.service",
+            "ssh.socket",
+            "sshd.service",
+            "apt-daily.timer",
+            "-.mount",
+            "user@1000.service",
+        ]
+        for regexp in (
+            "nginx\\.service",
+            "ss.\\.service$",
+            ".*\\.(service|timer)$",
+            "ssh|apt",
+            "user@.*",
+        ):
+            globs: list[str] | None = convert_regexp_to_globs(regexp)
+            assert globs is not None
+            for name in names:
+                assert bool(re.match(regexp, name)) == any(
+                    fnmatchcase(name, glob) for glob in globs
+                ), (regexp, name)
+
+
+class TestPlan:
+    def test_performance_data(self) -> None:
+        plan = get_plan("-I", "nginx.*")
+        assert plan.selection == Source.Selection()
+        assert plan.include is None
+
+    def test_include(self) -> None:
+        plan = get_plan("-I", "nginx.*", "-p")
+        assert plan.selection.patterns == ("nginx*",)
+        assert plan.include is not None
+        assert len(plan.include) == 0
+
+    def test_include_type(self) -> None:
+        plan = get_plan("--include-type", "service", "timer", "-p")
+        assert plan.selection.patterns == ("*.service", "*.timer")
+
+    def test_include_not_convertible(self) -> None:
+        plan = get_plan("-I", "nginx.*", "-I", "user@\\d+\\.service", "-p")
+        assert plan.selection.patterns == ()
+        assert plan.include is not None
+        assert plan.include.regexes == ("nginx.*", "user@\\d+\\.service")
+
+    def test_exclude_type(self) -> None:
+        plan = get_plan("--exclude-type", "device", "--exclude-type", "mount", "-p")
+        assert "device" not in plan.selection.types
+        assert "mount" not in plan.selection.types
+        assert "service" in plan.selection.types
+
+    def test_unit(self) -> None:
+        plan = get_plan("-u", "nginx.service", "-I", "ssh.*", "-p")
+        assert plan.selection.patterns == ("nginx.service", "ssh*")
+        assert plan.include is None
+
+    def test_escaped_unit_name(self) -> None:
+        plan = get_plan("-u", "dev-disk-by\\x2duuid.device", "-I", "ssh.*", "-p")
+        assert plan.selection.patterns == ()
+        assert plan.include is None
+
+    def test_fast(self) -> None:
+        plan = get_plan("--fast", "-I", "nginx.*")
+        assert plan.selection.patterns == ("nginx*",)
+
+
+class TestCommands:
+    def test_patterns(self) -> None:
+        result = execute_main(
+            argv=["-I", "smartd.*", "-n", "-p"],
+            stdout=["systemctl-list-units_failed.txt"],
+        )
+        result.assert_critical()
+        result.assert_first_line("SYSTEMD CRITICAL - smartd.service: failed")
+        assert result.commands == [["systemctl", "list-units", "--all", "smartd*"]]
+
+    def test_types(self) -> None:
+        result = execute_main(
+            argv=["--exclude-type", "device", "-n", "-p"],
+            stdout=["systemctl-list-units_ok.txt"],
+        )
+        result.assert_ok()
+        assert result.commands[0][3].startswith("--type=service,socket,")
+        assert "device" not in result.commands[0][3]
+
+    def test_failed_units(self) -> None:
+        result = execute_main(
+            argv=["--fast", "--include-type", "service", "-n", "-p"],
+            stdout=[
+                "systemctl-show-manager_degraded.txt",
+                "systemctl-list-units_state-failed.txt",
+            ],
+        )
+        result.assert_critical()
+        assert result.commands[1] == [
+            "systemctl",
+            "list-units",
+            "--all",
+            "--state=failed",
+            "*.service",
+        ]
+
+    def test_no_units(self) -> None:
+        result = execute_main(
+            argv=["-I", "XXX.*", "-n", "-p"],
+            stdout=["  UNIT LOAD ACTIVE SUB DESCRIPTION\n0 loaded units listed.\n"],
+        )
+        result.assert_unknown()
+        result.assert_first_line(
+            "SYSTEMD UNKNOWN: ValueError: Please verify your --include-* and "
+            "--exclude-* options. No units have been added for testing."
+        )
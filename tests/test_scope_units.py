@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from tests.helper import MockResult, execute_main
+from unittest.mock import patch
+
+from check_systemd import CliSource, Source
+from tests.helper import MockResult, MPopen, execute_main
 
 
 def execute(argv: list[str], units_suffix: str = "ok") -> MockResult:
@@ -41,3 +44,20 @@ class TestMultipleFailure:
         if result.first_line:
             assert "rtkit-daemon.service: failed" in result.first_line
             assert "smartd.service: failed" in result.first_line
+
+
+class TestDigest:
+    def test_only_failed_units_retained(self) -> None:
+        source = CliSource()
+        source.json_output = False
+        source.set_digest(Source.Digest())
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.return_value = MPopen(
+                stdout="systemctl-list-units_multiple-failure.txt"
+            )
+            digest = source.digest
+        assert digest.count == 3
+        assert [unit.name for unit in digest.units] == [
+            "rtkit-daemon.service",
+            "smartd.service",
+        ]
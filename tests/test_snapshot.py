@@ -0,0 +1,178 @@
+"""Test the on-disk snapshot of units and timers (--cache-dir, --cache-ttl)."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from check_systemd import CliSource, Source
+from tests.helper import MockResult, MPopen, execute_main
+
+
+class TestClassSnapshot:
+    def test_store_load(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), 30)
+        snapshot.store("cli-system-units", [["a.service", "active"], ["b.timer", 1]])
+        assert snapshot.load("cli-system-units") == [
+            ["a.service", "active"],
+            ["b.timer", 1],
+        ]
+
+    def test_missing(self, tmp_path: Path) -> None:
+        assert Source.Snapshot(str(tmp_path), 30).load("cli-system-units") is None
+
+    def test_stale(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), 30)
+        snapshot.store("cli-system-units", [["a.service"]])
+        past = time.time() - 60
+        os.utime(tmp_path / "cli-system-units.jsonl", (past, past))
+        assert snapshot.load("cli-system-units") is None
+
+    def test_create_directory(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path / "check_systemd"), 30)
+        snapshot.store("cli-system-timers", [])
+        assert (tmp_path / "check_systemd" / "cli-system-timers.jsonl").exists()
+
+    def test_directory_mode(self, tmp_path: Path) -> None:
+        umask = os.umask(0)
+        try:
+            Source.Snapshot(str(tmp_path / "check_systemd"), 30).store("units", [])
+        finally:
+            os.umask(umask)
+        assert (tmp_path / "check_systemd").stat().st_mode & 0o777 == 0o700
+
+    def test_not_writable(self, tmp_path: Path) -> None:
+        file = tmp_path / "file"
+        file.write_text("")
+        # No exception
+        Source.Snapshot(str(file / "check_systemd"), 30).store("key", [])
+
+    def test_writer(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), 30)
+        writer = snapshot.open("cli-system-units")
+        writer.write(["a.service", "active"])
+        assert snapshot.load("cli-system-units") is None
+        writer.commit()
+        assert snapshot.load("cli-system-units") == [["a.service", "active"]]
+
+    def test_writer_discard(self, tmp_path: Path) -> None:
+        writer = Source.Snapshot(str(tmp_path), 30).open("cli-system-units")
+        writer.write(["a.service", "active"])
+        writer.discard()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_writable_directory(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), 30)
+        snapshot.store("cli-system-units", [["a.service"]])
+        tmp_path.chmod(0o777)
+        assert snapshot.load("cli-system-units") is None
+
+    def test_writable_file(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), 30)
+        snapshot.store("cli-system-units", [["a.service"]])
+        (tmp_path / "cli-system-units.jsonl").chmod(0o620)
+        assert snapshot.load("cli-system-units") is None
+
+    def test_foreign_owner(self, tmp_path: Path) -> None:
+        snapshot = Source.Snapshot(str(tmp_path), 30)
+        snapshot.store("cli-system-units", [["a.service"]])
+        with patch("check_systemd.os.getuid", return_value=os.getuid() + 1):
+            assert snapshot.load("cli-system-units") is None
+
+
+class TestSnapshotKey:
+    def test_system(self) -> None:
+        assert CliSource()._get_snapshot_key("units") == "cli-system-units"
+
+    def test_user(self) -> None:
+        source = CliSource()
+        source.set_user(True)
+        assert source._get_snapshot_key("timers") == f"cli-user-{os.getuid()}-timers"
+
+
+class TestOptionCacheDir:
+    def test_reuse_units(self, tmp_path: Path) -> None:
+        argv = ["--cache-dir", str(tmp_path), "-n", "--no-performance-data"]
+        first = execute_main(
+            argv=list(argv), stdout=["systemctl-list-units_failed.txt"]
+        )
+        first.assert_critical()
+        assert len(first.commands) == 1
+
+        second = execute_main(argv=list(argv), stdout=[])
+        second.assert_critical()
+        second.assert_first_line("SYSTEMD CRITICAL - smartd.service: failed")
+        assert second.commands == []
+
+    def test_reuse_timers(self, tmp_path: Path) -> None:
+        argv = ["--cache-dir", str(tmp_path), "-t", "-n", "--no-performance-data"]
+        first = execute_main(
+            argv=list(argv),
+            stdout=["systemctl-list-units_3units.txt", "systemctl-list-timers_1.txt"],
+        )
+        first.assert_critical()
+
+        second = execute_main(argv=list(argv), stdout=[])
+        second.assert_critical()
+        second.assert_first_line("SYSTEMD CRITICAL - phpsessionclean.timer")
+        assert second.commands == []
+
+    def test_ttl(self, tmp_path: Path) -> None:
+        argv = ["--cache-dir", str(tmp_path), "--cache-ttl", "0", "-n", "-p"]
+        execute_main(argv=list(argv), stdout=["systemctl-list-units_failed.txt"])
+        time.sleep(0.01)
+        second = execute_main(argv=list(argv), stdout=["systemctl-list-units_ok.txt"])
+        second.assert_ok()
+        assert len(second.commands) == 1
+
+
+def execute_with_boot_id(tmp_path: Path, boot_id: str, stdout: list[str]) -> MockResult:
+    with patch("check_systemd.Source._read_boot_id", return_value=boot_id):
+        return execute_main(
+            argv=["--cache-dir", str(tmp_path), "-u", "nginx.service", "-p"],
+            stdout=["systemctl-show-nginx_active.txt", *stdout],
+        )
+
+
+class TestStartupTime:
+    def test_same_boot(self, tmp_path: Path) -> None:
+        first = execute_with_boot_id(tmp_path, "1", ["systemd-analyze_12.345.txt"])
+        assert ["systemd-analyze"] in first.commands
+
+        second = execute_with_boot_id(tmp_path, "1", [])
+        second.assert_ok()
+        assert len(second.commands) == 1
+        assert ["systemd-analyze"] not in second.commands
+
+    def test_reboot(self, tmp_path: Path) -> None:
+        execute_with_boot_id(tmp_path, "1", ["systemd-analyze_12.345.txt"])
+        second = execute_with_boot_id(tmp_path, "2", ["systemd-analyze_12.345.txt"])
+        assert ["systemd-analyze"] in second.commands
+
+    def test_bootup_not_finished(self, tmp_path: Path) -> None:
+        with patch("check_systemd.Source._read_boot_id", return_value="1"):
+            execute_main(
+                argv=["--cache-dir", str(tmp_path), "-p"],
+                popen=(
+                    MPopen(stdout="systemctl-list-units_ok.txt"),
+                    MPopen(returncode=1, stderr="systemd-analyze_not-finished.txt"),
+                ),
+            )
+        assert not (tmp_path / "system-startup-time.jsonl").exists()
+
+    def test_memoized_value(self, tmp_path: Path) -> None:
+        with patch("check_systemd.Source._read_boot_id", return_value="1"):
+            execute_main(
+                argv=["--cache-dir", str(tmp_path), "-p", "-c", "1"],
+                stdout=["systemctl-list-units_ok.txt", "systemd-analyze_12.345.txt"],
+            )
+            result = execute_main(
+                argv=["--cache-dir", str(tmp_path), "-p", "-c", "1"],
+                stdout=[],
+            )
+        result.assert_critical()
+        result.assert_first_line(
+            "SYSTEMD CRITICAL - startup_time is 12.3 (outside range 0:1)"
+        )
@@ -0,0 +1,71 @@
+"""Test the cold start of the plugin. The plugin is started for every check,
+so the import time is a large share of the total runtime of a check."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import check_systemd
+
+DEFERRED = (
+    "gi",
+    "hashlib",
+    "socket",
+    "urllib.parse",
+    "datetime",
+    "struct",
+    "concurrent.futures",
+    "array",
+)
+"""Modules that are only needed by other data sources or rare code paths."""
+
+SCRIPT = """
+import sys
+import check_systemd
+
+opts = check_systemd.normalize_argparser(
+    check_systemd.get_argparser().parse_args(["--cli"])
+)
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+def run(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+class TestColdStart:
+    def test_deferred_modules(self) -> None:
+        modules = run("-c", SCRIPT).stdout.split()
+        assert "check_systemd" in modules
+        for module in DEFERRED:
+            assert module not in modules
+
+
+class TestImportGi:
+    def test_not_imported_by_cli(self) -> None:
+        with patch("check_systemd.is_dbus", None):
+            check_systemd.normalize_argparser(
+                check_systemd.get_argparser().parse_args(["--cli"])
+            )
+            assert check_systemd.is_dbus is None
+
+    def test_dbus_falls_back_to_cli(self) -> None:
+        with (
+            patch("check_systemd.is_dbus", None),
+            patch.dict("sys.modules", {"gi": None, "gi.repository": None}),
+        ):
+            opts = check_systemd.normalize_argparser(
+                check_systemd.get_argparser().parse_args(["--dbus"])
+            )
+            assert check_systemd.is_dbus is False
+        assert opts.data_source == "cli"
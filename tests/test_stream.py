@@ -0,0 +1,146 @@
+"""Test the streaming of the stdout of the command line tools."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from nagiosplugin import CheckError
+
+from check_systemd import CheckSystemdError, CliSource
+from tests.helper import MPopen, convert_to_bytes
+
+Table = CliSource.Table
+
+
+def read_lines(file_name: str) -> list[str]:
+    return convert_to_bytes(file_name).decode("utf-8").splitlines()
+
+
+class TestStreamCli:
+    def test_lines(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.return_value = MPopen(stdout="line 1\nline 2\n")
+            assert list(CliSource.stream_cli(["command"])) == ["line 1", "line 2"]
+
+    def test_error_after_last_line(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.return_value = MPopen(returncode=1, stdout="line 1\n")
+            lines = CliSource.stream_cli(["command"])
+            assert next(lines) == "line 1"
+            with pytest.raises(CheckError, match="none-zero return code"):
+                next(lines)
+
+    def test_stderr(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.return_value = MPopen(stderr="Failed to connect to bus")
+            with pytest.raises(CheckError, match="Failed to connect"):
+                list(CliSource.stream_cli(["command"]))
+
+    def test_overlap(self, tmp_path: Path) -> None:
+        """The second line is only written after the first line has been
+        read."""
+        signal = tmp_path / "signal"
+        script = (
+            "import os, sys, time\n"
+            "print('first', flush=True)\n"
+            "for _ in range(500):\n"
+            f"    if os.path.exists({str(signal)!r}):\n"
+            "        print('second')\n"
+            "        sys.exit(0)\n"
+            "    time.sleep(0.01)\n"
+            "sys.exit(1)\n"
+        )
+        lines = CliSource.stream_cli([sys.executable, "-c", script])
+        assert next(lines) == "first"
+        signal.touch()
+        assert list(lines) == ["second"]
+
+    def test_close_early(self) -> None:
+        script = "while True: print('line')"
+        lines = CliSource.stream_cli([sys.executable, "-c", script])
+        assert next(lines) == "line"
+        # The command is terminated by SIGPIPE.
+        lines.close()
+
+
+class TestTableStream:
+    def test_same_as_list_rows(self) -> None:
+        lines = read_lines("systemctl-list-units_v246.txt")
+        columns = ("unit", "active", "sub", "load")
+        assert list(Table.stream(lines, *columns)) == [
+            tuple(row[column] for column in columns)
+            for row in Table("\n".join(lines)).list_rows()
+        ]
+
+    def test_timers(self) -> None:
+        rows = list(
+            Table.stream(
+                read_lines("systemctl-list-timers_all-n-a.txt"), "unit", "left"
+            )
+        )
+        assert ("systemd-readahead-done.timer", "n/a") in rows
+
+    def test_empty_table(self) -> None:
+        lines = ["  UNIT LOAD ACTIVE SUB DESCRIPTION", "0 loaded units listed."]
+        assert list(Table.stream(lines, "unit")) == []
+
+    def test_no_output(self) -> None:
+        assert list(Table.stream([], "unit")) == []
+
+    def test_unknown_column(self) -> None:
+        with pytest.raises(ValueError, match="couldn’t found"):
+            list(Table.stream(["  UNIT LOAD"], "active"))
+
+    def test_footer_is_read(self) -> None:
+        lines = iter(read_lines("systemctl-list-units_ok.txt"))
+        list(Table.stream(lines, "unit"))
+        assert next(lines, None) is None
+
+
+class TestDecodeRows:
+    def test_fixture(self) -> None:
+        text = convert_to_bytes("systemctl-list-units_json.txt").decode("utf-8")
+        chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+        assert list(CliSource.decode_rows(chunks)) == json.loads(text)
+
+    def test_row_across_chunks(self) -> None:
+        chunks = ['[{"unit": "a.ser', 'vice"}, {"unit"', ': "b.service"}]\n']
+        assert list(CliSource.decode_rows(chunks)) == [
+            {"unit": "a.service"},
+            {"unit": "b.service"},
+        ]
+
+    def test_number_across_chunks(self) -> None:
+        assert list(CliSource.decode_rows(["[1", "2, 3", "]"])) == [12, 3]
+
+    def test_rows_before_end(self) -> None:
+        rows = CliSource.decode_rows(iter(['[{"unit": "a"},', " {"]))
+        assert next(rows) == {"unit": "a"}
+
+    def test_empty_array(self) -> None:
+        assert list(CliSource.decode_rows(["[", "]"])) == []
+
+    def test_incomplete(self) -> None:
+        with pytest.raises(CheckSystemdError, match="incomplete"):
+            list(CliSource.decode_rows(['[{"unit": "a"}, {"un']))
+
+    def test_no_array(self) -> None:
+        with pytest.raises(CheckSystemdError, match="isn’t an array"):
+            list(CliSource.decode_rows(['{"unit": "a"}']))
+
+
+class TestStreamCliChunks:
+    def test_chunks(self) -> None:
+        with patch("check_systemd.subprocess.Popen") as Popen:
+            Popen.return_value = MPopen(stdout="line 1\nline 2\n")
+            chunks = list(CliSource.stream_cli(["command"], 4))
+        assert chunks == ["line", " 1\nl", "ine ", "2\n"]
+
+    def test_split_lines(self) -> None:
+        chunks = ["line", " 1\nl", "ine ", "2\n"]
+        assert list(CliSource.split_lines(chunks)) == ["line 1", "line 2"]
+        assert list(CliSource.split_lines(["a\nb"])) == ["a", "b"]
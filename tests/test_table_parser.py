@@ -71,3 +71,7 @@ class TestTable:
         assert "n/a" == row["last"]
         assert "n/a" == row["passed"]
         assert "systemd-readahead-done.timer" == row["unit"]
+
+    def test_empty_table(self) -> None:
+        parser = Table("  UNIT LOAD ACTIVE SUB DESCRIPTION\n0 loaded units listed.\n")
+        assert parser.row_count == 0
@@ -0,0 +1,406 @@
+"""Test the pure-Python D-Bus wire protocol client (--wire) against a fake bus
+listening on a unix socket."""
+
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from check_systemd import CheckSystemdError, WireSource
+from tests.helper import execute_main
+
+Reply = tuple[str, tuple[Any, ...]]
+"""A signature and the values of a reply"""
+
+
+def get_unit_tuple(name: str, active_state: str, sub_state: str) -> tuple[Any, ...]:
+    object_path = "/org/freedesktop/systemd1/unit/" + name.replace(".", "_2e")
+    return (name, "", "loaded", active_state, sub_state, "", object_path, 0, "", "/")
+
+
+UNITS = [
+    get_unit_tuple("nginx.service", "failed", "failed"),
+    get_unit_tuple("ssh.service", "active", "running"),
+    get_unit_tuple("fstrim.timer", "active", "waiting"),
+]
+
+SERVICE_PROPERTIES = {
+    "Id": ("s", "nginx.service"),
+    "ActiveState": ("s", "failed"),
+    "SubState": ("s", "failed"),
+    "LoadState": ("s", "loaded"),
+    "Restart": ("b", True),
+    "NRestarts": ("u", 3),
+}
+
+METHODS: dict[tuple[str, tuple[Any, ...]], Reply] = {
+    ("Hello", ()): ("s", (":1.42",)),
+    ("LoadUnit", ("nginx.service",)): (
+        "o",
+        ("/org/freedesktop/systemd1/unit/nginx_2eservice",),
+    ),
+    ("GetDefaultTarget", ()): ("s", ("graphical.target",)),
+    ("GetUnit", ("graphical.target",)): (
+        "o",
+        ("/org/freedesktop/systemd1/unit/graphical_2etarget",),
+    ),
+    ("ListUnits", ()): ("a(ssssssouso)", (UNITS,)),
+    (
+        "GetAll",
+        ("org.freedesktop.systemd1.Unit",),
+    ): ("a{sv}", (SERVICE_PROPERTIES,)),
+    ("Get", ("org.freedesktop.systemd1.Manager", "UserspaceTimestampMonotonic")): (
+        "v",
+        (("t", 2_000_000),),
+    ),
+    ("Get", ("org.freedesktop.systemd1.Unit", "ActiveEnterTimestampMonotonic")): (
+        "v",
+        (("t", 14_345_000),),
+    ),
+    ("Get", ("org.freedesktop.systemd1.Timer", "LastTriggerUSecMonotonic")): (
+        "v",
+        (("t", 3_600_000_000),),
+    ),
+    ("Get", ("org.freedesktop.systemd1.Timer", "NextElapseUSecMonotonic")): (
+        "v",
+        (("t", 7_200_000_000),),
+    ),
+}
+
+
+class FakeBus:
+    """A bus that answers the method calls of one client with the replies
+    in :data:`METHODS`."""
+
+    address: str
+
+    calls: list[tuple[str, tuple[Any, ...]]]
+
+    __server: socket.socket
+
+    __buffer: bytearray
+
+    __auth_reply: bytes
+
+    __connection: socket.socket | None = None
+
+    def __init__(self, path: Path, auth_reply: bytes = b"OK 1234deadbeef\r\n") -> None:
+        self.address = f"unix:path={path}"
+        self.calls = []
+        self.__buffer = bytearray()
+        self.__auth_reply = auth_reply
+        self.__server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__server.bind(str(path))
+        self.__server.listen(1)
+        threading.Thread(target=self.__serve, daemon=True).start()
+
+    def __receive_until(self, connection: socket.socket, end: bytes) -> bytes:
+        while end not in self.__buffer:
+            chunk = connection.recv(4096)
+            if not chunk:
+                raise EOFError
+            self.__buffer += chunk
+        index = self.__buffer.index(end) + len(end)
+        data = bytes(self.__buffer[:index])
+        del self.__buffer[:index]
+        return data
+
+    def __receive_exactly(self, connection: socket.socket, size: int) -> bytes:
+        while len(self.__buffer) < size:
+            chunk = connection.recv(4096)
+            if not chunk:
+                raise EOFError
+            self.__buffer += chunk
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        return data
+
+    @staticmethod
+    def build_message(
+        type: int, fields: list[tuple[int, tuple[str, Any]]], reply: Reply
+    ) -> bytes:
+        signature, values = reply
+        body = WireSource.Marshaller().write(signature, *values)
+        header = WireSource.Marshaller().write(
+            "yyyyuua(yv)",
+            ord("l"),
+            type,
+            0,
+            1,
+            len(body.buffer),
+            1000,
+            fields + [(8, ("g", signature))],
+        )
+        header.align(8)
+        return bytes(header.buffer + body.buffer)
+
+    def send_signal(
+        self, object_path: str, interface_name: str, member: str, body: Reply
+    ) -> None:
+        """Send a signal to the connected client."""
+        assert self.__connection is not None
+        self.__connection.sendall(
+            self.build_message(
+                4,
+                [
+                    (1, ("o", object_path)),
+                    (2, ("s", interface_name)),
+                    (3, ("s", member)),
+                ],
+                body,
+            )
+        )
+
+    def __serve(self) -> None:
+        connection, _ = self.__server.accept()
+        self.__connection = connection
+        with connection:
+            auth = self.__receive_until(connection, b"\r\n")
+            assert auth.startswith(b"\0AUTH EXTERNAL ")
+            connection.sendall(self.__auth_reply)
+            if not self.__auth_reply.startswith(b"OK"):
+                return
+            assert self.__receive_until(connection, b"\r\n") == b"BEGIN\r\n"
+            try:
+                while True:
+                    self.__answer(connection)
+            except EOFError:
+                pass
+
+    def __answer(self, connection: socket.socket) -> None:
+        fixed = self.__receive_exactly(connection, 16)
+        body_length, serial, fields_length = struct.unpack_from("<III", fixed, 4)
+        header_length = 16 + fields_length
+        header_length += -header_length % 8
+        data = fixed + self.__receive_exactly(
+            connection, header_length - 16 + body_length
+        )
+        (fields,) = WireSource.Unmarshaller(data, 12).read("a(yv)")
+        fields = dict(fields)
+        args: tuple[Any, ...] = ()
+        if 8 in fields:
+            args = WireSource.Unmarshaller(data, header_length).read(fields[8])
+        member = fields[3]
+        self.calls.append((member, args))
+        reply_fields: list[tuple[int, tuple[str, Any]]] = [
+            (5, ("u", serial)),
+            (7, ("s", "org.freedesktop.systemd1")),
+        ]
+        if member == "Hello":
+            # A signal before the reply
+            connection.sendall(
+                self.build_message(
+                    4,
+                    [
+                        (1, ("o", "/org/freedesktop/DBus")),
+                        (2, ("s", "org.freedesktop.DBus")),
+                        (3, ("s", "NameAcquired")),
+                    ],
+                    ("s", (":1.42",)),
+                )
+            )
+        reply = METHODS.get((member, args))
+        if reply is None:
+            connection.sendall(
+                self.build_message(
+                    3,
+                    reply_fields
+                    + [(4, ("s", "org.freedesktop.DBus.Error.UnknownMethod"))],
+                    ("s", (f"Unknown method {member}",)),
+                )
+            )
+        else:
+            connection.sendall(self.build_message(2, reply_fields, reply))
+
+
+@pytest.fixture
+def bus(tmp_path: Path) -> FakeBus:
+    return FakeBus(tmp_path / "bus")
+
+
+def connect(bus: FakeBus) -> WireSource.Connection:
+    with patch.dict("os.environ", {"DBUS_SYSTEM_BUS_ADDRESS": bus.address}):
+        connection = WireSource.Connection(timeout=5000)
+        # Connect and say hello
+        assert connection._socket is not None
+    return connection
+
+
+class TestSplitSignature:
+    def test_basic(self) -> None:
+        assert WireSource.split_signature("su") == ["s", "u"]
+
+    def test_containers(self) -> None:
+        assert WireSource.split_signature("sa{sv}(i(ii))aas") == [
+            "s",
+            "a{sv}",
+            "(i(ii))",
+            "aas",
+        ]
+
+
+class TestMarshaller:
+    def marshal(self, signature: str, *values: Any) -> bytes:
+        return bytes(WireSource.Marshaller().write(signature, *values).buffer)
+
+    def test_string(self) -> None:
+        assert self.marshal("s", "abc") == b"\x03\x00\x00\x00abc\x00"
+
+    def test_alignment(self) -> None:
+        assert self.marshal("yu", 1, 2) == b"\x01\x00\x00\x00\x02\x00\x00\x00"
+
+    def test_array(self) -> None:
+        assert self.marshal("as", ["a", "bc"]) == (
+            b"\x0f\x00\x00\x00" + b"\x01\x00\x00\x00a\x00\x00\x00\x02\x00\x00\x00bc\x00"
+        )
+
+    def test_dict_of_variants(self) -> None:
+        assert self.marshal("a{sv}", {"A": ("u", 1)}) == (
+            b"\x10\x00\x00\x00\x00\x00\x00\x00"
+            + b"\x01\x00\x00\x00A\x00"
+            + b"\x01u\x00\x00\x00\x00"
+            + b"\x01\x00\x00\x00"
+        )
+
+    def test_empty_array_of_structs(self) -> None:
+        # The padding to the alignment of the elements is not counted.
+        assert self.marshal("ua(ss)", 1, []) == b"\x01\x00\x00\x00" + b"\x00" * 4
+
+    def test_round_trip(self) -> None:
+        values = (UNITS, SERVICE_PROPERTIES, -3, 2.5, True)
+        data = self.marshal("a(ssssssouso)a{sv}xdb", *values)
+        assert WireSource.Unmarshaller(data).read("a(ssssssouso)a{sv}xdb") == (
+            UNITS,
+            {key: value for key, (_, value) in SERVICE_PROPERTIES.items()},
+            -3,
+            2.5,
+            True,
+        )
+
+
+class TestUnmarshaller:
+    def test_big_endian(self) -> None:
+        assert WireSource.Unmarshaller(b"\x00\x00\x01\x00", 0, ">").read("u") == (256,)
+
+    def test_offset_alignment(self) -> None:
+        data = b"\xff" * 4 + b"\x02\x00\x00\x00"
+        assert WireSource.Unmarshaller(data, 1).read("u") == (2,)
+
+
+class TestConnection:
+    def test_hello(self, bus: FakeBus) -> None:
+        connect(bus)
+        assert bus.calls == [("Hello", ())]
+
+    def test_call(self, bus: FakeBus) -> None:
+        connection = connect(bus)
+        assert connection.call(
+            "/org/freedesktop/systemd1",
+            "org.freedesktop.systemd1.Manager",
+            "LoadUnit",
+            "(s)",
+            "nginx.service",
+        ) == ("/org/freedesktop/systemd1/unit/nginx_2eservice",)
+
+    def test_error(self, bus: FakeBus) -> None:
+        connection = connect(bus)
+        with pytest.raises(CheckSystemdError, match="UnknownMethod"):
+            connection.call(
+                "/org/freedesktop/systemd1",
+                "org.freedesktop.systemd1.Manager",
+                "Reboot",
+            )
+
+    def test_get_many(self, bus: FakeBus) -> None:
+        connection = connect(bus)
+        object_path = "/org/freedesktop/systemd1/unit/fstrim_2etimer"
+        assert connection.get_many(
+            [
+                (object_path, "org.freedesktop.systemd1.Timer", name)
+                for name in (
+                    "LastTriggerUSecMonotonic",
+                    "NextElapseUSecMonotonic",
+                    "Unknown",
+                )
+            ]
+        ) == [3_600_000_000, 7_200_000_000, None]
+
+    def test_get_many_windows(self, bus: FakeBus) -> None:
+        connection = connect(bus)
+        object_path = "/org/freedesktop/systemd1/unit/fstrim_2etimer"
+        requests = [
+            (object_path, "org.freedesktop.systemd1.Timer", "LastTriggerUSecMonotonic")
+        ] * 5
+        with (
+            patch.object(WireSource.Connection, "MAX_PENDING", 2),
+            patch.object(
+                connection,
+                "_Connection__wait",
+                wraps=connection._Connection__wait,  # type: ignore
+            ) as wait,
+        ):
+            assert connection.get_many(requests) == [3_600_000_000] * 5
+        assert [len(call.args[0]) for call in wait.call_args_list] == [2, 2, 1]
+
+    def test_authentication_failed(self, tmp_path: Path) -> None:
+        bus = FakeBus(tmp_path / "bus", auth_reply=b"REJECTED EXTERNAL\r\n")
+        with pytest.raises(CheckSystemdError, match="authentication failed"):
+            connect(bus)
+
+    def test_no_bus(self, tmp_path: Path) -> None:
+        with (
+            patch.dict(
+                "os.environ",
+                {"DBUS_SYSTEM_BUS_ADDRESS": "unix:path={}".format(tmp_path / "bus")},
+            ),
+            pytest.raises(CheckSystemdError, match="Couldn't connect"),
+        ):
+            assert WireSource.Connection()._socket
+
+
+class TestAddress:
+    def test_system(self) -> None:
+        with patch.dict("os.environ", clear=True):
+            assert (
+                WireSource.Connection.get_address()
+                == "unix:path=/run/dbus/system_bus_socket"
+            )
+
+    def test_session(self) -> None:
+        with patch.dict(
+            "os.environ", {"XDG_RUNTIME_DIR": "/run/user/1000"}, clear=True
+        ):
+            assert (
+                WireSource.Connection.get_address(True)
+                == "unix:path=/run/user/1000/bus"
+            )
+
+
+def execute_wire(bus: FakeBus, *argv: str) -> Any:
+    with patch.dict("os.environ", {"DBUS_SYSTEM_BUS_ADDRESS": bus.address}):
+        return execute_main(argv=["--wire", *argv], stdout=[])
+
+
+class TestOptionWire:
+    def test_unit(self, bus: FakeBus) -> None:
+        result = execute_wire(bus, "-u", "nginx.service")
+        result.assert_critical()
+        output: str | None = result.output
+        assert output is not None
+        assert output.startswith("SYSTEMD CRITICAL - nginx.service: failed")
+        assert "startup_time=12.3;60;120" in output
+        assert "count_units=3" in output
+        assert result.commands == []
+
+    def test_timers(self, bus: FakeBus) -> None:
+        result = execute_wire(bus, "--timers", "-n", "-p")
+        result.assert_critical()
+        assert result.commands == []
+        # ListUnits is called only once.
+        assert [call[0] for call in bus.calls].count("ListUnits") == 1